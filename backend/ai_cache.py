@@ -0,0 +1,208 @@
+"""
+Response cache for /api/recipe prompts.
+
+Answers are keyed on the normalized prompt together with the model and the
+system prompt, so changing either never serves a stale answer. Prompts are
+normalized to lowercase words in sorted order, which makes
+"easy paneer recipe" and "Paneer recipe, easy!" the same key. Optionally,
+prompts whose normalized form is within a fuzzy similarity threshold of a
+cached one are served too.
+
+Two stores are available: an in-process LRU (default) and a SQLite file
+that survives restarts and can be shared by the workers on one host.
+Handlers use aget()/aput(), which run SQLite I/O and fuzzy scans in a
+worker thread so they never block the event loop.
+"""
+import asyncio
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from rapidfuzz import fuzz, process
+
+
+def normalize_prompt(prompt: str) -> str:
+    words = re.findall(r"[a-z0-9]+", prompt.lower())
+    return " ".join(sorted(words))
+
+
+class MemoryStore:
+    """LRU of namespace/key -> (normalized prompt, response, stored_at)."""
+
+    blocking = False
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def put(self, key, norm, response, now):
+        with self._lock:
+            self._data[key] = (norm, response, now)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def prompts(self, namespace):
+        """(normalized prompt, key) for every entry in `namespace`."""
+        with self._lock:
+            return [(norm, key) for key, (norm, _, _) in self._data.items() if key.startswith(namespace)]
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteStore:
+    """
+    Same interface as MemoryStore, persisted in a SQLite file. The fuzzy
+    candidates (key -> normalized prompt) are kept in memory and re-read
+    every `prompts_refresh` seconds to pick up other workers' entries.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, maxsize: int, prompts_refresh: float = 60.0):
+        self.maxsize = maxsize
+        self.prompts_refresh = prompts_refresh
+        self._prompts = None
+        self._prompts_at = 0.0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, norm TEXT NOT NULL, response TEXT NOT NULL,"
+            " stored_at REAL NOT NULL, used_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_used_at ON responses (used_at)")
+
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT norm, response, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                self._db.execute("UPDATE responses SET used_at = ? WHERE key = ?", (time.time(), key))
+            elif self._prompts is not None:
+                self._prompts.pop(key, None)  # evicted here or by another worker
+            return row
+
+    def put(self, key, norm, response, now):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)", (key, norm, response, now, now)
+            )
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.maxsize,),
+            )
+            if self._prompts is not None:
+                self._prompts[key] = norm
+
+    def delete(self, key):
+        with self._lock:
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            if self._prompts is not None:
+                self._prompts.pop(key, None)
+
+    def prompts(self, namespace):
+        with self._lock:
+            now = time.monotonic()
+            if self._prompts is None or now - self._prompts_at > self.prompts_refresh:
+                self._prompts = dict(self._db.execute("SELECT key, norm FROM responses").fetchall())
+                self._prompts_at = now
+            return [(norm, key) for key, norm in self._prompts.items() if key.startswith(namespace)]
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+class ResponseCache:
+    def __init__(self, store, ttl: float, model: str, system_prompt: str, fuzzy_threshold: float = 0):
+        self.store = store
+        self.ttl = ttl
+        self.fuzzy_threshold = fuzzy_threshold
+        # Keys are "<namespace>:<prompt hash>"; the namespace pins model + system prompt
+        self.namespace = hashlib.sha256(f"{model}\n{system_prompt}".encode("utf-8")).hexdigest()[:16] + ":"
+        self.hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+
+    def _key(self, norm: str) -> str:
+        return self.namespace + hashlib.sha256(norm.encode("utf-8")).hexdigest()
+
+    def _fresh(self, key):
+        entry = self.store.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry[2] > self.ttl:
+            self.store.delete(key)
+            return None
+        return entry[1]
+
+    def get(self, prompt: str):
+        norm = normalize_prompt(prompt)
+        if not norm:
+            return None
+        response = self._fresh(self._key(norm))
+        if response is not None:
+            self.hits += 1
+            return response
+
+        if self.fuzzy_threshold:
+            candidates = self.store.prompts(self.namespace)
+            best = process.extractOne(
+                norm, [c[0] for c in candidates], scorer=fuzz.ratio, score_cutoff=self.fuzzy_threshold
+            )
+            if best is not None:
+                response = self._fresh(candidates[best[2]][1])
+                if response is not None:
+                    self.fuzzy_hits += 1
+                    return response
+
+        self.misses += 1
+        return None
+
+    def put(self, prompt: str, response: str):
+        norm = normalize_prompt(prompt)
+        if norm and response:
+            self.store.put(self._key(norm), norm, response, time.time())
+
+    async def aget(self, prompt: str):
+        if self.store.blocking or self.fuzzy_threshold:
+            return await asyncio.to_thread(self.get, prompt)
+        return self.get(prompt)
+
+    async def aput(self, prompt: str, response: str):
+        if self.store.blocking:
+            await asyncio.to_thread(self.put, prompt, response)
+        else:
+            self.put(prompt, response)
+
+    def stats(self) -> dict:
+        total = self.hits + self.fuzzy_hits + self.misses
+        return {
+            "size": len(self.store),
+            "maxsize": self.store.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "fuzzy_hits": self.fuzzy_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.fuzzy_hits) / total, 4) if total else 0.0,
+        }
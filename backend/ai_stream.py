@@ -0,0 +1,88 @@
+"""
+Markdown cleanup and server-sent-event relay for the AI answers.
+
+clean_markdown() cleans a whole answer; MarkdownCleaner does the same for
+an answer that arrives in pieces. relay_answer() turns an OpenAI-style
+streaming completion (Perplexity's) into "data:" events for the browser
+and caches the raw answer once it is complete.
+"""
+import json
+import re
+
+_MARKS = re.compile(r'[*_`#>]+')
+_BLANK_RUNS = re.compile(r'\n{3,}')
+
+
+def clean_markdown(text: str) -> str:
+    # Remove markdown symbols but keep structure
+    text = _MARKS.sub('', text)          # remove **, ##, ###, etc.
+    text = _BLANK_RUNS.sub('\n\n', text)  # normalize spacing
+    return text.strip()
+
+class MarkdownCleaner:
+    """
+    clean_markdown for text that arrives in pieces. Feeding every chunk
+    and joining the outputs gives the same result as cleaning the whole
+    text at once: trailing whitespace is held back until more text arrives,
+    so blank-line runs and the final strip() work across chunk boundaries.
+    """
+
+    def __init__(self):
+        self.started = False
+        self.pending = ""
+
+    def feed(self, chunk: str) -> str:
+        text = self.pending + _MARKS.sub('', chunk)
+        if not self.started:
+            text = text.lstrip()
+            self.started = bool(text)
+        body = text.rstrip()
+        self.pending = text[len(body):]
+        return _BLANK_RUNS.sub('\n\n', body)
+
+def sse_event(data: dict, event: str = None) -> str:
+    head = f"event: {event}\n" if event else ""
+    return f"{head}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def relay_answer(http, upstream: str, request: dict, cache, prompt: str):
+    """
+    Relay a streaming completion as server-sent events, cleaning the
+    markdown as it goes. The generator only pulls the next upstream chunk
+    after the previous event was sent (backpressure), and when the browser
+    disconnects Starlette cancels it, which closes the upstream connection.
+    Failures, including UpstreamBusy, end the stream with an "error" event.
+    """
+    cached = await cache.aget(prompt)
+    if cached is not None:
+        yield sse_event({"text": clean_markdown(cached)})
+        yield sse_event({}, "done")
+        return
+
+    cleaner = MarkdownCleaner()
+    raw = []
+    try:
+        async with http.stream(upstream, **request) as res:
+            if res.status_code != 200:
+                details = (await res.aread()).decode("utf-8", errors="replace")
+                yield sse_event({"error": f"Perplexity API returned {res.status_code}", "details": details}, "error")
+                return
+            async for line in res.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                chunk = line[len("data:"):].strip()
+                if chunk == "[DONE]":
+                    break
+                try:
+                    delta = json.loads(chunk)["choices"][0].get("delta", {}).get("content") or ""
+                except (ValueError, KeyError, IndexError):
+                    continue
+                raw.append(delta)
+                text = cleaner.feed(delta)
+                if text:
+                    yield sse_event({"text": text})
+    except Exception as e:
+        yield sse_event({"error": str(e)}, "error")
+        return
+    # Only complete answers are cached; a cancelled stream never gets here
+    await cache.aput(prompt, "".join(raw))
+    yield sse_event({}, "done")
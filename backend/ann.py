@@ -0,0 +1,151 @@
+"""
+Approximate nearest-neighbour retrieval over the recipe embedding matrix.
+
+IVF-Flat in NumPy: spherical k-means splits the normalized rows into
+`nlist` clusters, the row ids are stored grouped by cluster, and a query
+only scores the rows of the `nprobe` clusters whose centroids are closest.
+The rows themselves are read from the caller's matrix (usually the
+memory-mapped embeddings), so the index adds only ids and centroids. Cost
+per query is about nprobe / nlist of a brute-force scan, at some loss of
+recall that grows as nprobe shrinks.
+
+Measure recall@k and latency against exact search with:
+    python -m backend.ann [embeddings.npy | artifact dir] [--k 10] [--nprobe 1,2,4,8,16,32]
+    python -m backend.ann --synthetic 20000
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+
+def _normalize(matrix):
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=-1, keepdims=True), 1e-12)
+
+def _top_k(scores, k: int):
+    """Indices of the k largest scores, best first."""
+    if len(scores) > k:
+        idx = np.argpartition(-scores, k - 1)[:k]
+    else:
+        idx = np.arange(len(scores))
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+class IVFIndex:
+    def __init__(self, centroids, indptr, ids, matrix, nprobe: int = 8):
+        self.centroids = centroids    # (nlist, dim) normalized
+        self.indptr = indptr          # cluster -> slice of ids
+        self.ids = ids                # row ids grouped by cluster
+        self.matrix = matrix          # the indexed rows, not copied
+        self.nprobe = nprobe
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, matrix, nlist: int = None, iterations: int = 10, nprobe: int = 8, seed: int = 0):
+        """Cluster the L2-normalized rows of `matrix` (n, dim); float32 input is not copied."""
+        matrix = np.asarray(matrix, dtype=np.float32)
+        n = len(matrix)
+        nlist = max(1, min(nlist or int(np.sqrt(n)), n))
+        rng = np.random.default_rng(seed)
+        centroids = matrix[rng.choice(n, nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            assign = cls._assign(matrix, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, matrix)
+            sizes = np.bincount(assign, minlength=nlist)
+            empty = sizes == 0
+            # Re-seed empty clusters with random rows so none is wasted
+            sums[empty] = matrix[rng.choice(n, int(empty.sum()), replace=False)]
+            centroids = _normalize(sums).astype(np.float32)
+
+        assign = cls._assign(matrix, centroids)
+        order = np.argsort(assign, kind="stable")
+        indptr = np.zeros(nlist + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(np.bincount(assign, minlength=nlist))
+        return cls(centroids, indptr, order.astype(np.int32), matrix, nprobe)
+
+    @staticmethod
+    def _assign(matrix, centroids, chunk: int = 8192):
+        return np.concatenate([
+            np.argmax(matrix[i:i + chunk] @ centroids.T, axis=1) for i in range(0, len(matrix), chunk)
+        ]) if len(matrix) else np.zeros(0, dtype=np.int64)
+
+    def search(self, query, k: int = 10, nprobe: int = None):
+        """(row ids, cosine scores) of the approximate top `k` for one normalized query vector."""
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        probes = _top_k(self.centroids @ query, nprobe)
+        slices = [np.arange(self.indptr[c], self.indptr[c + 1]) for c in probes.tolist()]
+        positions = np.concatenate(slices) if slices else np.zeros(0, dtype=np.int64)
+        ids = np.sort(self.ids[positions])  # ascending reads are kinder to a memory-mapped matrix
+        scores = self.matrix[ids] @ query
+        best = _top_k(scores, k)
+        return ids[best], scores[best]
+
+    def search_batch(self, queries, k: int = 10, nprobe: int = None):
+        return [self.search(q, k, nprobe) for q in queries]
+
+
+# ---------------- BENCHMARK ----------------
+def exact_search(matrix, query, k: int):
+    scores = matrix @ query
+    best = _top_k(scores, k)
+    return best, scores[best]
+
+def _load_matrix(path: str):
+    if os.path.isdir(path):
+        path = os.path.join(path, "embeddings.npy")
+    return np.load(path, mmap_mode="r")
+
+def _synthetic(n: int, dim: int = 384, topics: int = 200, seed: int = 0):
+    """Clustered unit vectors, roughly like ingredient-list embeddings."""
+    rng = np.random.default_rng(seed)
+    centres = _normalize(rng.standard_normal((topics, dim)))
+    rows = centres[rng.integers(0, topics, n)] + 1.5 * rng.standard_normal((n, dim)) / np.sqrt(dim)
+    return _normalize(rows).astype(np.float32)
+
+def _benchmark(matrix, k: int, nprobes, queries: int = 500, seed: int = 0):
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    # Queries near real rows: a recipe's vector plus noise
+    picks = matrix[rng.choice(len(matrix), queries)]
+    workload = _normalize(picks + 0.05 * rng.standard_normal(picks.shape)).astype(np.float32)
+
+    start = time.perf_counter()
+    index = IVFIndex.build(matrix)
+    build = time.perf_counter() - start
+    print(f"{len(matrix)} vectors x {matrix.shape[1]} dims, nlist={index.nlist}, built in {build:.2f}s")
+
+    def timed(fn):
+        samples, results = [], []
+        for q in workload:
+            t = time.perf_counter()
+            results.append(fn(q)[0])
+            samples.append((time.perf_counter() - t) * 1000)
+        samples.sort()
+        return results, samples[len(samples) // 2], samples[int(len(samples) * 0.99) - 1]
+
+    truth, p50, p99 = timed(lambda q: exact_search(matrix, q, k))
+    print(f"{'':12}{'recall@' + str(k):>10}{'p50 ms':>10}{'p99 ms':>10}")
+    print(f"{'exact':12}{1.0:>10.3f}{p50:>10.3f}{p99:>10.3f}")
+    for nprobe in nprobes:
+        found, p50, p99 = timed(lambda q: index.search(q, k, nprobe))
+        recall = np.mean([len(set(a.tolist()) & set(b.tolist())) / k for a, b in zip(found, truth)])
+        print(f"{'nprobe=' + str(nprobe):12}{recall:>10.3f}{p50:>10.3f}{p99:>10.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="IVF recall/latency benchmark against exact search")
+    parser.add_argument("embeddings", nargs="?", help="embeddings.npy or an embedding artifact directory")
+    parser.add_argument("--synthetic", type=int, default=0, help="benchmark N synthetic vectors instead")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", default="1,2,4,8,16,32")
+    args = parser.parse_args()
+    if not args.embeddings and not args.synthetic:
+        parser.error("give an embeddings file/artifact or --synthetic N")
+    data = _synthetic(args.synthetic) if args.synthetic else _load_matrix(args.embeddings)
+    _benchmark(data, args.k, [int(p) for p in args.nprobe.split(",")])
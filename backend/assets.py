@@ -0,0 +1,270 @@
+"""
+Static asset layer for the HTML pages and everything under /static.
+
+- Pages (PageCache) are read once and kept in memory together with their
+  gzip and brotli encodings, so a page request does no file I/O.
+- /static (StaticAssets) serves files from disk with a strong ETag (a hash
+  of the content, computed once per file version off the event loop). For
+  text assets it sends the precompressed <file>.br / <file>.gz written by
+  `python -m backend.assets` when the client accepts them.
+- Files with a content hash in their name (the recipe thumbnails) are sent
+  as immutable for a year; everything else is `no-cache`, i.e. the browser
+  revalidates and gets a 304 while it is unchanged. Both carry Last-Modified,
+  and If-Modified-Since is honoured when there is no If-None-Match.
+
+With dev=True (ASSETS_DEV=true) pages are re-read when they change on disk.
+brotli is optional; without it only gzip is produced and served.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import stat
+import sys
+import threading
+from dataclasses import dataclass
+from datetime import timezone
+from email.utils import formatdate, parsedate_to_datetime
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import StaticFiles
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = {".html", ".json", ".css", ".js", ".svg", ".txt", ".xml", ".map"}
+MIN_COMPRESS_SIZE = 1024
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))   # preference order
+HASHED_NAME = re.compile(r"(^|[-.])[0-9a-f]{12,}[-.]")  # e.g. 76cdcbf6b9238194-320.webp
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+
+def compress(data: bytes, encoding: str):
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(data, quality=11)
+    return None
+
+def accepted_encodings(headers) -> set:
+    accepted = set()
+    for part in headers.get("accept-encoding", "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if name:
+            accepted.add(name.strip().lower())
+    return accepted
+
+def http_date(mtime: float) -> str:
+    return formatdate(mtime, usegmt=True)
+
+def not_modified(headers, digest: str, mtime: float) -> bool:
+    """
+    If-None-Match against any encoding of the content with this digest;
+    without one, If-Modified-Since against the file's mtime.
+    """
+    value = headers.get("if-none-match")
+    if not value:
+        since = headers.get("if-modified-since")
+        if not since:
+            return False
+        try:
+            since = parsedate_to_datetime(since)
+        except (TypeError, ValueError, IndexError):
+            return False  # unparseable dates are ignored
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return int(mtime) <= since.timestamp()
+    for tag in value.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag.strip('"').split("-")[0] == digest:
+            return True
+    return False
+
+def etag(digest: str, encoding: str = None) -> str:
+    # Each encoding is a different representation, so it gets its own strong tag
+    return f'"{digest}-{encoding}"' if encoding else f'"{digest}"'
+
+def cache_control(name: str) -> str:
+    return IMMUTABLE if HASHED_NAME.search(name) else REVALIDATE
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()[:32]
+
+
+# ---------------- PAGES ----------------
+@dataclass
+class Page:
+    body: bytes
+    encoded: dict      # encoding -> compressed body
+    digest: str
+    version: tuple     # (mtime_ns, size) it was read at
+
+
+class PageCache:
+    def __init__(self, root: str, dev: bool = False):
+        self.root = root
+        self.dev = dev
+        self._pages = {}
+        self._lock = threading.Lock()
+
+    def _load(self, name: str, st) -> Page:
+        with open(os.path.join(self.root, name), "rb") as f:
+            body = f.read()
+        encoded = {}
+        if len(body) >= MIN_COMPRESS_SIZE:
+            for encoding, _ in ENCODINGS:
+                data = compress(body, encoding)
+                if data is not None and len(data) < len(body):
+                    encoded[encoding] = data
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        return Page(body, encoded, digest, (st.st_mtime_ns, st.st_size))
+
+    def get(self, name: str):
+        """The cached page, or None if the file does not exist."""
+        page = self._pages.get(name)
+        if page is not None and not self.dev:
+            return page
+        try:
+            st = os.stat(os.path.join(self.root, name))
+        except OSError:
+            return None
+        if page is None or page.version != (st.st_mtime_ns, st.st_size):
+            page = self._load(name, st)
+            with self._lock:
+                self._pages[name] = page
+        return page
+
+    def preload(self, names):
+        for name in names:
+            self.get(name)
+
+    def response(self, request, name: str):
+        """200 (compressed if accepted) or 304 for the page, or None if it does not exist."""
+        page = self.get(name)
+        if page is None:
+            return None
+        accepted = accepted_encodings(request.headers)
+        encoding = next((e for e, _ in ENCODINGS if e in accepted and e in page.encoded), None)
+        mtime = page.version[0] / 1e9
+        headers = {"ETag": etag(page.digest, encoding), "Last-Modified": http_date(mtime),
+                   "Cache-Control": REVALIDATE, "Vary": "Accept-Encoding"}
+        if not_modified(request.headers, page.digest, mtime):
+            return Response(status_code=304, headers=headers)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(page.encoded.get(encoding, page.body), media_type="text/html", headers=headers)
+
+
+# ---------------- /static ----------------
+class StaticAssets(StaticFiles):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._digests = {}   # path -> (mtime_ns, size, content digest)
+
+    def lookup_path(self, path):
+        # Runs in a worker thread, so hashing a new or changed file never blocks the event loop
+        full_path, st = super().lookup_path(path)
+        if st is not None and stat.S_ISREG(st.st_mode):
+            known = self._digests.get(full_path)
+            if known is None or known[:2] != (st.st_mtime_ns, st.st_size):
+                self._digests[full_path] = (st.st_mtime_ns, st.st_size, file_digest(full_path))
+        return full_path, st
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        full_path = os.fspath(full_path)
+        name = os.path.basename(full_path)
+        known = self._digests.get(full_path)
+        if known is None or known[:2] != (stat_result.st_mtime_ns, stat_result.st_size):
+            return super().file_response(full_path, stat_result, scope, status_code)
+        digest = known[2]
+
+        send_path, send_stat, encoding = full_path, stat_result, None
+        compressible = os.path.splitext(name)[1].lower() in COMPRESSIBLE
+        # Byte ranges always refer to the identity body
+        if compressible and "range" not in request_headers:
+            accepted = accepted_encodings(request_headers)
+            for enc, suffix in ENCODINGS:
+                if enc not in accepted:
+                    continue
+                try:
+                    st = os.stat(full_path + suffix)
+                except OSError:
+                    continue
+                if st.st_mtime >= stat_result.st_mtime:  # a stale sidecar is ignored
+                    send_path, send_stat, encoding = full_path + suffix, st, enc
+                    break
+
+        headers = {"ETag": etag(digest, encoding), "Last-Modified": http_date(stat_result.st_mtime),
+                   "Cache-Control": cache_control(name)}
+        if compressible:
+            headers["Vary"] = "Accept-Encoding"
+        if not_modified(request_headers, digest, stat_result.st_mtime):
+            return Response(status_code=304, headers=headers)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        return FileResponse(send_path, status_code=status_code, headers=headers,
+                            media_type=media_type, stat_result=send_stat)
+
+
+# ---------------- BUILD ----------------
+def precompress(root: str):
+    """Write <file>.gz / <file>.br next to every compressible file under root that lacks a fresh one."""
+    written = 0
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            if os.path.splitext(name)[1].lower() not in COMPRESSIBLE:
+                continue
+            path = os.path.join(dirpath, name)
+            st = os.stat(path)
+            if st.st_size < MIN_COMPRESS_SIZE:
+                continue
+            data = None
+            for encoding, suffix in ENCODINGS:
+                target = path + suffix
+                try:
+                    if os.stat(target).st_mtime >= st.st_mtime:
+                        continue
+                except OSError:
+                    pass
+                if data is None:
+                    with open(path, "rb") as f:
+                        data = f.read()
+                packed = compress(data, encoding)
+                if packed is None or len(packed) >= len(data) * 0.9:
+                    continue  # not worth a Content-Encoding
+                tmp = f"{target}.tmp{os.getpid()}"
+                with open(tmp, "wb") as f:
+                    f.write(packed)
+                os.replace(tmp, target)
+                written += 1
+                print(f"{os.path.relpath(target, root)}: {len(data)} -> {len(packed)} bytes")
+    return written
+
+
+if __name__ == "__main__":
+    root = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), "../frontend")
+    if brotli is None:
+        print("brotli is not installed; writing gzip only")
+    print(f"✅ {precompress(root)} precompressed files written under {root}")
@@ -0,0 +1,90 @@
+"""
+Ingredient autocomplete over the catalog's ingredient vocabulary.
+
+Every word start of every ingredient is a key in one sorted array ("green
+chilli" is stored as "green chilli" and "chilli"), so a prefix lookup is
+two binary searches and matches the start of any word, like the old
+in-browser substring filter mostly did. Matches are ranked by how many
+recipes use the ingredient. When nothing starts with the query, keys whose
+first len(query) letters are a close spelling are offered instead
+(rapidfuzz), so "corriander" still finds "coriander seeds".
+"""
+import re
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+FUZZY_CUTOFF = 70
+FUZZY_HEAD_LENGTHS = 8   # cut-key lists kept for the most recent query lengths
+
+
+def normalize_query(q: str) -> str:
+    return re.sub(r"\s+", " ", q.strip().lower())
+
+
+class PrefixIndex:
+    def __init__(self, terms, counts):
+        """terms: ingredient names; counts[i]: recipes using terms[i]."""
+        self.terms = list(terms)
+        self.counts = np.asarray(counts, dtype=np.int64)
+        keys = []
+        for i, term in enumerate(self.terms):
+            term = normalize_query(term)
+            for m in re.finditer(r"\S+", term):
+                keys.append((term[m.start():], i))
+        keys.sort()
+        self.keys = [k for k, _ in keys]
+        self.max_key_length = max((len(k) for k in self.keys), default=0)
+        self.key_terms = np.fromiter((i for _, i in keys), dtype=np.int32, count=len(keys))
+        # Sort key for ranking: most used first, then alphabetical
+        self._rank = np.empty(len(self.terms), dtype=np.int64)
+        self._rank[np.lexsort((np.arange(len(self.terms)), -self.counts))] = np.arange(len(self.terms))
+        self._heads = OrderedDict()  # cut length -> keys cut to it, for fuzzy matching (LRU)
+        self._heads_lock = threading.Lock()
+
+    def prefix(self, q: str, limit: int):
+        start = bisect_left(self.keys, q)
+        stop = bisect_left(self.keys, q + "\uffff", lo=start)
+        ids = np.unique(self.key_terms[start:stop])
+        if len(ids) > limit:
+            ids = ids[np.argpartition(self._rank[ids], limit - 1)[:limit]]
+        return ids[np.argsort(self._rank[ids])].tolist()
+
+    def _cut_keys(self, length: int):
+        # No key is longer than max_key_length, so longer queries share one list
+        length = min(length, self.max_key_length)
+        with self._heads_lock:
+            heads = self._heads.get(length)
+            if heads is not None:
+                self._heads.move_to_end(length)
+                return heads
+        heads = [k[:length] for k in self.keys]
+        with self._heads_lock:
+            self._heads[length] = heads
+            while len(self._heads) > FUZZY_HEAD_LENGTHS:
+                self._heads.popitem(last=False)
+        return heads
+
+    def fuzzy(self, q: str, limit: int):
+        """Typo-tolerant prefix match: compare q with every key cut to len(q)."""
+        heads = self._cut_keys(len(q))
+        matches = process.extract(q, heads, scorer=fuzz.ratio, score_cutoff=FUZZY_CUTOFF, limit=limit * 4)
+        best = {}
+        for _, score, pos in matches:
+            i = int(self.key_terms[pos])
+            best[i] = max(best.get(i, 0), score)
+        # Closest spelling first, busier ingredient on ties
+        return sorted(best, key=lambda i: (-best[i], self._rank[i]))[:limit]
+
+    def complete(self, q: str, limit: int = 10):
+        """Return (term ids, fuzzy?) for the query."""
+        q = normalize_query(q)
+        if not q:
+            return [], False
+        ids = self.prefix(q, limit)
+        if ids or len(q) < 3:
+            return ids, False
+        return self.fuzzy(q, limit), True
@@ -0,0 +1,398 @@
+"""
+Recipe catalog loading and on-disk snapshot.
+
+Parsing final_data_updated.recipes.json and rebuilding the lookup tables is
+the slowest part of starting a worker. This module does it once and writes a
+versioned snapshot next to the backend:
+
+    .catalog/v<VERSION>-<sha256 prefix of the source>/
+        meta.json             version, source hash, counts
+        index.json            names, ingredient vocabulary, name/id indexes
+        recipes.bin           one compact JSON document per recipe
+        *.npy                 record offsets, per-recipe flags and facet columns
+        graph/                RecipeGraph CSR arrays and ingredient vocabulary
+
+The .npy files and recipes.bin are memory-mapped, so every uvicorn worker on
+the host shares the same pages and recipes are only decoded when touched.
+A changed source file hashes to a new directory, so stale snapshots are
+never read.
+
+Build (or refresh) the snapshot ahead of a deploy with:
+    python -m backend.catalog
+"""
+import hashlib
+import json
+import mmap
+import os
+import re
+import shutil
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .recipe_graph import RecipeGraph
+
+SNAPSHOT_VERSION = 4
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_RECIPES_FILE = os.path.join(BASE_DIR, "../frontend", "final_data_updated.recipes.json")
+DEFAULT_SNAPSHOT_DIR = os.getenv("CATALOG_SNAPSHOT_DIR", os.path.join(BASE_DIR, ".catalog"))
+RECORD_CACHE_SIZE = int(os.getenv("CATALOG_RECORD_CACHE_SIZE", 1024))
+
+# Categorical fields stored as per-recipe codes, and numeric minute fields
+FACET_FIELDS = ("Cuisine", "Course", "Diet")
+TIME_FIELDS = ("PrepTimeInMins", "CookTimeInMins", "TotalTimeInMins")
+
+INDIC_SCRIPTS = re.compile("[\u0900-\u097F\u0980-\u09FF\u0A00-\u0A7F\u0A80-\u0AFF\u0B00-\u0B7F\u0B80-\u0BFF\u0C00-\u0C7F\u0C80-\u0CFF\u0D00-\u0D7F\u0D80-\u0DFF]")
+
+
+# ---------------- RECIPE HELPERS ----------------
+def preprocess_ingredient(ing):
+    synonyms = re.findall(r'([^\(\)]+)', ing.lower().strip())
+    return [s.strip() for s in synonyms]
+
+def is_non_english(text: str) -> bool:
+    """Detect Indian-language text using Unicode ranges."""
+    if not text:
+        return False
+    return bool(INDIC_SCRIPTS.search(text))
+
+def recipe_is_english(recipe: dict) -> bool:
+    """Return True if recipe title, ingredients, and instructions are all English."""
+    if is_non_english(recipe.get("TranslatedRecipeName", "")):
+        return False
+
+    for ing in recipe.get("TranslatedIngredients", []):
+        if is_non_english(ing):
+            return False
+
+    for step in recipe.get("TranslatedInstructions", []):
+        if is_non_english(step):
+            return False
+
+    return True
+
+def image_filename(recipe: dict, default: str = "") -> str:
+    img_path = recipe.get("image_path", default)
+    return os.path.basename(img_path).replace("\\", "/")
+
+def recipe_key(value) -> str:
+    """Normalize a Srno or Mongo _id (plain or {"$oid": ...}) to a route key."""
+    if isinstance(value, dict):
+        value = value.get("$oid", "")
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip().lower()
+
+def facet_value(recipe: dict, field: str) -> str:
+    value = recipe.get(field)
+    return value.strip() if isinstance(value, str) else ""
+
+def time_value(recipe: dict, field: str) -> float:
+    """Minutes as a float, NaN when missing or not a number."""
+    try:
+        return float(recipe.get(field))
+    except (TypeError, ValueError):
+        return float("nan")
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# ---------------- RECORD STORAGE ----------------
+class RecipeRecords:
+    """
+    Read-only list of recipe dicts backed by one JSON document per recipe.
+    Only the `cache_size` most recently used records are kept decoded, so a
+    worker never holds a Python copy of the whole mapped catalog; iterating
+    decodes without caching.
+    """
+
+    def __init__(self, blob, offsets, cache_size: int = RECORD_CACHE_SIZE):
+        self._blob = blob
+        self._offsets = offsets
+        self._list = None   # from_list: the records are already in memory
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_list(cls, recipes):
+        records = cls(b"", np.zeros(len(recipes) + 1, dtype=np.int64))
+        records._list = list(recipes)
+        return records
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def _decode(self, pos: int) -> dict:
+        start, end = int(self._offsets[pos]), int(self._offsets[pos + 1])
+        return json.loads(self._blob[start:end])
+
+    def __getitem__(self, pos):
+        if pos < 0:
+            pos += len(self)
+        if not 0 <= pos < len(self):
+            raise IndexError(pos)
+        if self._list is not None:
+            return self._list[pos]
+        with self._lock:
+            record = self._cache.get(pos)
+            if record is not None:
+                self._cache.move_to_end(pos)
+                return record
+        record = self._decode(pos)
+        with self._lock:
+            self._cache[pos] = record
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return record
+
+    def __iter__(self):
+        if self._list is not None:
+            yield from self._list
+            return
+        # Full scans (index builds) would only flush the hot records out of the cache
+        for pos in range(len(self)):
+            yield self._decode(pos)
+
+
+# ---------------- CATALOG ----------------
+class Catalog:
+    """
+    Parsed recipe catalog plus the tables the API looks things up in.
+
+    Recipe ids (rid) number the distinct recipe names in first-seen order;
+    catalog positions (pos) index `recipes`. When a name repeats, the rid
+    resolves to the last record with that name and keeps the union of their
+    ingredients. position_rids maps every pos back to its rid.
+
+    Facet columns are per rid: facets[field] is (distinct values, int32 code
+    per rid) and times[field] is float32 minutes per rid (NaN if unknown).
+    """
+
+    def __init__(self, recipes, names, name_positions, position_rids, graph, english,
+                 image_files, name_index, id_index, facets, times):
+        self.recipes = recipes
+        self.names = names
+        self.name_positions = name_positions
+        self.position_rids = position_rids
+        self.graph = graph
+        self.english = english
+        self.image_files = image_files
+        self.name_index = name_index
+        self.id_index = id_index
+        self.facets = facets
+        self.times = times
+        self.source_hash = None  # set by load_catalog
+
+    @classmethod
+    def from_recipes(cls, recipes):
+        rids = {}
+        names = []
+        name_positions = []
+        position_rids = []
+        id_index = {}
+        adjacency = []
+
+        for pos, r in enumerate(recipes):
+            recipe_name = r["TranslatedRecipeName"]
+            if recipe_name not in rids:
+                rids[recipe_name] = len(names)
+                names.append(recipe_name)
+                name_positions.append(pos)
+                adjacency.append(set())
+            rid = rids[recipe_name]
+            name_positions[rid] = pos
+            position_rids.append(rid)
+            for field in ("Srno", "_id"):
+                if r.get(field) is not None:
+                    id_index.setdefault(recipe_key(r[field]), pos)
+            for ing in r.get("main_ingredients", []):
+                adjacency[rid].update(preprocess_ingredient(ing))
+
+        # Normalized name -> catalog position; the first name in catalog
+        # order wins, as with the old linear scan over recipe names
+        name_index = {}
+        for rid, name in enumerate(names):
+            name_index.setdefault(name.strip().lower(), name_positions[rid])
+
+        records = [recipes[p] for p in name_positions]
+
+        facets = {}
+        for field in FACET_FIELDS:
+            codes_by_value = {}
+            codes = np.fromiter(
+                (codes_by_value.setdefault(facet_value(r, field), len(codes_by_value)) for r in records),
+                dtype=np.int32, count=len(records),
+            )
+            facets[field] = (list(codes_by_value), codes)
+        times = {
+            field: np.fromiter((time_value(r, field) for r in records), dtype=np.float32, count=len(records))
+            for field in TIME_FIELDS
+        }
+
+        return cls(
+            recipes=RecipeRecords.from_list(recipes),
+            names=names,
+            name_positions=np.asarray(name_positions, dtype=np.int64),
+            position_rids=np.asarray(position_rids, dtype=np.int64),
+            graph=RecipeGraph.from_adjacency(adjacency),
+            english=np.fromiter((recipe_is_english(r) for r in records), dtype=np.uint8, count=len(records)),
+            image_files=[image_filename(r) for r in records],
+            name_index=name_index,
+            id_index=id_index,
+            facets=facets,
+            times=times,
+        )
+
+    def record(self, rid: int) -> dict:
+        return self.recipes[int(self.name_positions[rid])]
+
+    def rid(self, pos: int) -> int:
+        return int(self.position_rids[pos])
+
+    # -------- snapshot I/O --------
+    def save(self, path: str, source_hash: str):
+        """Write the snapshot into `path` (must not exist yet)."""
+        os.makedirs(path)
+        offsets = [0]
+        with open(os.path.join(path, "recipes.bin"), "wb") as f:
+            for r in self.recipes:
+                doc = json.dumps(r, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                f.write(doc)
+                offsets.append(offsets[-1] + len(doc))
+        np.save(os.path.join(path, "recipe_offsets.npy"), np.asarray(offsets, dtype=np.int64))
+        np.save(os.path.join(path, "name_positions.npy"), self.name_positions)
+        np.save(os.path.join(path, "position_rids.npy"), self.position_rids)
+        np.save(os.path.join(path, "english.npy"), self.english)
+        for field, (_, codes) in self.facets.items():
+            np.save(os.path.join(path, f"facet_{field}.npy"), codes)
+        for field, minutes in self.times.items():
+            np.save(os.path.join(path, f"time_{field}.npy"), minutes)
+        os.makedirs(os.path.join(path, "graph"))
+        self.graph.save(os.path.join(path, "graph"))
+        with open(os.path.join(path, "index.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "names": self.names,
+                "image_files": self.image_files,
+                "name_index": self.name_index,
+                "id_index": self.id_index,
+                "facet_values": {field: values for field, (values, _) in self.facets.items()},
+            }, f, ensure_ascii=False)
+        # meta.json goes last: a snapshot without it is incomplete
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "version": SNAPSHOT_VERSION,
+                "source_sha256": source_hash,
+                "recipes": len(self.recipes),
+                "names": len(self.names),
+                "ingredients": len(self.graph.ingredients),
+            }, f, indent=2)
+
+    @classmethod
+    def load(cls, path: str):
+        def array(name):
+            return np.load(os.path.join(path, name), mmap_mode="r")
+
+        with open(os.path.join(path, "index.json"), "r", encoding="utf-8") as f:
+            index = json.load(f)
+        with open(os.path.join(path, "recipes.bin"), "rb") as f:
+            # An empty file cannot be mapped
+            blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+        return cls(
+            recipes=RecipeRecords(blob, array("recipe_offsets.npy")),
+            names=index["names"],
+            name_positions=array("name_positions.npy"),
+            position_rids=array("position_rids.npy"),
+            graph=RecipeGraph.load(os.path.join(path, "graph")),
+            english=array("english.npy"),
+            image_files=index["image_files"],
+            name_index=index["name_index"],
+            id_index=index["id_index"],
+            facets={
+                field: (values, array(f"facet_{field}.npy"))
+                for field, values in index["facet_values"].items()
+            },
+            times={field: array(f"time_{field}.npy") for field in TIME_FIELDS},
+        )
+
+
+def snapshot_path(snapshot_dir: str, source_hash: str) -> str:
+    return os.path.join(snapshot_dir, f"v{SNAPSHOT_VERSION}-{source_hash[:16]}")
+
+def read_snapshot(path: str, source_hash: str):
+    """Return the Catalog stored at `path`, or None if it is missing or stale."""
+    if not os.path.isdir(path):
+        return None
+    try:
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != SNAPSHOT_VERSION or meta.get("source_sha256") != source_hash:
+            return None
+        return Catalog.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Ignoring catalog snapshot at {path}: {e}")
+        return None
+
+def write_snapshot(catalog: Catalog, snapshot_dir: str, source_hash: str) -> str:
+    """
+    Publish the snapshot atomically. Workers starting together may race;
+    whoever renames first wins and the others drop their copy.
+    """
+    final = snapshot_path(snapshot_dir, source_hash)
+    tmp = f"{final}.tmp{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    catalog.save(tmp, source_hash)
+    try:
+        os.rename(tmp, final)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        return final
+
+    # Drop snapshots of older sources / formats
+    for entry in os.listdir(snapshot_dir):
+        path = os.path.join(snapshot_dir, entry)
+        if path != final and ".tmp" not in entry:
+            shutil.rmtree(path, ignore_errors=True)
+    return final
+
+def load_catalog(source_path: str, snapshot_dir: str = DEFAULT_SNAPSHOT_DIR) -> Catalog:
+    """
+    Load the catalog from a snapshot matching the current source file,
+    falling back to parsing the JSON and (re)building the snapshot.
+    """
+    source_hash = file_sha256(source_path)
+    catalog = read_snapshot(snapshot_path(snapshot_dir, source_hash), source_hash)
+    if catalog is not None:
+        catalog.source_hash = source_hash
+        return catalog
+
+    with open(source_path, "r", encoding="utf-8") as f:
+        catalog = Catalog.from_recipes(json.load(f))
+    catalog.source_hash = source_hash
+    try:
+        os.makedirs(snapshot_dir, exist_ok=True)
+        write_snapshot(catalog, snapshot_dir, source_hash)
+    except OSError as e:
+        # A read-only deploy still works, it just parses JSON every start
+        print(f"Could not write catalog snapshot to {snapshot_dir}: {e}")
+    return catalog
+
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_RECIPES_FILE
+    source_hash = file_sha256(source)
+    with open(source, "r", encoding="utf-8") as f:
+        catalog = Catalog.from_recipes(json.load(f))
+    os.makedirs(DEFAULT_SNAPSHOT_DIR, exist_ok=True)
+    final = snapshot_path(DEFAULT_SNAPSHOT_DIR, source_hash)
+    shutil.rmtree(final, ignore_errors=True)
+    path = write_snapshot(catalog, DEFAULT_SNAPSHOT_DIR, source_hash)
+    print(f"✅ Snapshot of {len(catalog.recipes)} recipes / {len(catalog.graph.ingredients)} ingredients written to {path}")
@@ -1,10 +1,6 @@
 import json
 import re
 
-# ===== Load your recipes file =====
-with open("final_data_updated.recipes.json", "r", encoding="utf-8") as f:
-    recipes = json.load(f)
-
 # ===== Junk / measurement / descriptive words =====
 JUNK_WORDS = {
     "fresh", "dry", "dried", "few", "handful", "mixed", "large", "small", "medium",
@@ -37,26 +33,24 @@ def normalize_word(word):
             return v
     return word.capitalize()
 
-# ===== Main cleaning logic =====
-def clean_ingredient(text):
-    # Remove content in parentheses like (Jeera)
-    text = re.sub(r"\(.*?\)", "", text)
-
+# ===== Tokenizer (also used by the full-text search index) =====
+def tokenize(text):
     # Remove numbers and symbols
     text = re.sub(r"[\d½¼¾/]+", " ", text)
 
     # Keep only alphabets and spaces
     text = re.sub(r"[^a-zA-Z\s]", " ", text)
 
-    # Split words
+    # Split words, dropping junk words anywhere
     words = [w.strip().lower() for w in text.split() if w.strip()]
+    return [w for w in words if w not in JUNK_WORDS]
 
-    # Remove all leading junk words
-    while words and words[0] in JUNK_WORDS:
-        words.pop(0)
+# ===== Main cleaning logic =====
+def clean_ingredient(text):
+    # Remove content in parentheses like (Jeera)
+    text = re.sub(r"\(.*?\)", "", text)
 
-    # Remove junk words from middle too
-    words = [w for w in words if w not in JUNK_WORDS]
+    words = tokenize(text)
 
     if not words:
         return None
@@ -69,22 +63,27 @@ def clean_ingredient(text):
 
     return text
 
-# ===== Process all recipes =====
-ingredients_set = set()
+if __name__ == "__main__":
+    # ===== Load your recipes file =====
+    with open("final_data_updated.recipes.json", "r", encoding="utf-8") as f:
+        recipes = json.load(f)
+
+    # ===== Process all recipes =====
+    ingredients_set = set()
 
-for recipe in recipes:
-    main_ing = recipe.get("main_ingredients", [])
-    if isinstance(main_ing, list):
-        for ing in main_ing:
-            cleaned = clean_ingredient(ing)
-            if cleaned:
-                ingredients_set.add(cleaned)
+    for recipe in recipes:
+        main_ing = recipe.get("main_ingredients", [])
+        if isinstance(main_ing, list):
+            for ing in main_ing:
+                cleaned = clean_ingredient(ing)
+                if cleaned:
+                    ingredients_set.add(cleaned)
 
-# ===== Deduplicate ignoring case =====
-unique_ingredients = sorted({i.lower(): i.capitalize() for i in ingredients_set}.values())
+    # ===== Deduplicate ignoring case =====
+    unique_ingredients = sorted({i.lower(): i.capitalize() for i in ingredients_set}.values())
 
-# ===== Save cleaned list =====
-with open("ingredients.json", "w", encoding="utf-8") as f:
-    json.dump(unique_ingredients, f, ensure_ascii=False, indent=2)
+    # ===== Save cleaned list =====
+    with open("ingredients.json", "w", encoding="utf-8") as f:
+        json.dump(unique_ingredients, f, ensure_ascii=False, indent=2)
 
-print(f"✅ Cleaned {len(unique_ingredients)} unique ingredients saved to ingredients.json")
+    print(f"✅ Cleaned {len(unique_ingredients)} unique ingredients saved to ingredients.json")
@@ -1,9 +1,10 @@
-import pandas as pd
+import argparse
 import json
 import os
-from pymongo import MongoClient
 from dotenv import load_dotenv
 
+from . import ingest
+
 load_dotenv()
 MONGO_URI = os.getenv("MONGO_URI")
 if not MONGO_URI:
@@ -11,9 +12,10 @@ if not MONGO_URI:
 
 # Load Excel
 xl_path = r"C:\Users\tirum\Downloads\testing.xlsx"
-df = pd.read_excel(xl_path)
+images_path = r"C:\Users\tirum\OneDrive\Desktop\AIRecipes\ingredients.images.json"
 
 required_columns = [
+    "Srno",
     "TranslatedRecipeName",
     "TranslatedInstructions",
     "CookTimeInMins",
@@ -25,33 +27,34 @@ required_columns = [
     "Diet",
     "TranslatedIngredients"
 ]
-df = df[required_columns]
 
-# Load image JSON
-with open(r"C:\Users\tirum\OneDrive\Desktop\AIRecipes\ingredients.images.json", "r", encoding="utf-8") as f:
-    image_data = json.load(f)
-df_images = pd.DataFrame(image_data)
 
-# Normalize names for merging
-df["TranslatedRecipeName"] = df["TranslatedRecipeName"].str.strip().str.lower()
-df_images["TranslatedRecipeName"] = df_images["TranslatedRecipeName"].str.strip().str.lower()
+def load_image_paths(path):
+    """Normalized recipe name -> image_path."""
+    with open(path, "r", encoding="utf-8") as f:
+        image_data = json.load(f)
+    return {
+        str(r.get("TranslatedRecipeName", "")).strip().lower(): r.get("image_path")
+        for r in image_data if r.get("TranslatedRecipeName")
+    }
+
 
-# Merge image paths
-df = df.merge(df_images[["TranslatedRecipeName", "image_path"]], on="TranslatedRecipeName", how="left")
+def main():
+    parser = argparse.ArgumentParser(description="Load the recipe workbook into final_data.recipes")
+    ingest.add_arguments(parser, xl_path)
+    parser.add_argument("--images", default=images_path)
+    args = parser.parse_args()
 
-# Split ingredients and instructions into lists
-df["TranslatedIngredients"] = df["TranslatedIngredients"].apply(lambda x: [i.strip() for i in str(x).split(',') if i.strip()])
-df["TranslatedInstructions"] = df["TranslatedInstructions"].apply(lambda x: [i.strip() for i in str(x).split('.') if i.strip()])
+    client = ingest.connect(MONGO_URI)
+    collection = client["final_data"]["recipes"]
 
-# Convert to dict for MongoDB
-recipes_dict = df.to_dict(orient="records")
-print(f"Total recipes processed: {len(recipes_dict)} ✅")
+    # Rows stream through the process pool: names normalized, image paths merged,
+    # ingredients and instructions split into lists, upserted by Srno
+    totals = ingest.run(args.path, collection, "recipes", columns=required_columns,
+                        images=load_image_paths(args.images), chunk_size=args.chunk_size,
+                        processes=args.processes, prune=args.prune)
+    print(f"✅ {totals['rows']} recipes loaded into MongoDB with ingredients and instructions as lists! {totals}")
 
-# Insert into MongoDB
-client = MongoClient(MONGO_URI)
-db = client["final_data"]
-collection = db["recipes"]
 
-collection.drop()  # reset collection
-collection.insert_many(recipes_dict)
-print("✅ All recipes inserted into MongoDB with ingredients and instructions as lists!")
+if __name__ == "__main__":
+    main()
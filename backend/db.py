@@ -0,0 +1,260 @@
+"""
+Async MongoDB access for the API.
+
+Every route talks to Mongo through the repositories below, which use Motor
+so a database round trip never blocks the event loop. Indexes are declared
+here and created at startup:
+
+    users     email (unique)
+    userdata  email (unique)
+    reviews   createdAt, _id (newest first; also serves pagination)
+    history   email, kind, at, _id (newest first); capped at HISTORY_CAP_BYTES
+
+Pool sizing comes from MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE,
+MONGO_MAX_IDLE_MS and MONGO_TIMEOUT_MS. Setting MONGO_URI=mongomock://
+swaps in an in-process stand-in (needs the mongomock-motor package), which
+is enough to run the API locally or in tests without a mongod.
+"""
+import base64
+import json
+import os
+from datetime import datetime
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import PyMongoError
+
+AUTH_DB = "myapp"
+
+
+def connect(uri: str):
+    """Create the async client for `uri` with pool settings from the environment."""
+    if uri and uri.startswith("mongomock://"):
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError as e:
+            raise RuntimeError("MONGO_URI=mongomock:// needs the mongomock-motor package") from e
+        return AsyncMongoMockClient()
+
+    from motor.motor_asyncio import AsyncIOMotorClient
+    return AsyncIOMotorClient(
+        uri,
+        maxPoolSize=int(os.getenv("MONGO_MAX_POOL_SIZE", 100)),
+        minPoolSize=int(os.getenv("MONGO_MIN_POOL_SIZE", 0)),
+        maxIdleTimeMS=int(os.getenv("MONGO_MAX_IDLE_MS", 60000)),
+        serverSelectionTimeoutMS=int(os.getenv("MONGO_TIMEOUT_MS", 10000)),
+    )
+
+
+class UserRepository:
+    def __init__(self, col):
+        self.col = col
+
+    async def find_by_email(self, email: str, projection: dict = None):
+        return await self.col.find_one({"email": email}, projection)
+
+    async def exists(self, email: str) -> bool:
+        return await self.col.find_one({"email": email}, {"_id": 1}) is not None
+
+    async def create(self, user: dict):
+        """Insert a user; raises DuplicateKeyError if the email is taken."""
+        return await self.col.insert_one(user)
+
+    async def set_password(self, user_id, hashed: str):
+        await self.col.update_one({"_id": user_id}, {"$set": {"password": hashed}})
+
+
+class UserDataRepository:
+    """Profile extras keyed by email: address, picture, favorites, activity."""
+
+    def __init__(self, col):
+        self.col = col
+
+    async def get(self, email: str, projection: dict = None):
+        return await self.col.find_one({"email": email}, projection)
+
+    async def set_fields(self, email: str, fields: dict, upsert: bool = True):
+        await self.col.update_one({"email": email}, {"$set": fields}, upsert=upsert)
+
+    async def add_favorite(self, email: str, favorite: dict):
+        await self.col.update_one({"email": email}, {"$addToSet": {"favorites": favorite}}, upsert=True)
+
+    async def remove_favorite(self, email: str, title: str):
+        await self.col.update_one({"email": email}, {"$pull": {"favorites": {"title": title}}})
+
+    async def push_activity(self, email: str, activity: str):
+        await self.col.update_one(
+            {"email": email},
+            {"$push": {"activity": {"$each": [activity], "$position": 0}}},
+            upsert=True
+        )
+
+
+class ReviewRepository:
+    """
+    Reviews plus a running aggregate (count, rating sum, histogram) kept in
+    review_stats so the average never needs a collection scan.
+    """
+
+    STATS_ID = "reviews"
+    PROJECTION = {"name": 1, "rating": 1, "review": 1, "createdAt": 1}
+
+    def __init__(self, col, stats_col):
+        self.col = col
+        self.stats_col = stats_col
+
+    # -------- keyset cursors --------
+    # createdAt is a datetime for reviews posted through the API, but older
+    # ones may hold a string or nothing. Mongo sorts those after the dates
+    # (dates, then strings, then missing) and $lt only compares values of the
+    # same type, so the cursor remembers which of the three the key was.
+    @staticmethod
+    def cursor(review: dict) -> str:
+        """Opaque cursor for the page after `review`."""
+        created = review.get("createdAt")
+        if isinstance(created, datetime):
+            key = ["d", created.isoformat()]
+        elif isinstance(created, str):
+            key = ["s", created]
+        else:
+            key = ["n", None]
+        raw = json.dumps(key + [str(review["_id"])])
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def parse_cursor(cursor: str):
+        """(createdAt, _id) from cursor(); raises ValueError if it is not one."""
+        try:
+            kind, value, oid = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            created = {"d": datetime.fromisoformat, "s": str, "n": lambda v: None}[kind](value)
+            return created, ObjectId(oid)
+        except (ValueError, TypeError, KeyError, InvalidId, UnicodeDecodeError) as e:
+            raise ValueError("invalid cursor") from e
+
+    @staticmethod
+    def _after(created, oid) -> dict:
+        if created is None:
+            return {"createdAt": None, "_id": {"$lt": oid}}
+        later = [
+            {"createdAt": {"$lt": created}},
+            {"createdAt": created, "_id": {"$lt": oid}},
+        ]
+        # Everything of a lower-sorting kind comes after the whole current kind
+        later.append({"createdAt": {"$not": {"$type": "date"}}} if isinstance(created, datetime)
+                     else {"createdAt": None})
+        return {"$or": later}
+
+    async def page(self, limit: int, before=None):
+        """
+        Up to `limit` reviews, newest first. `before` is the (createdAt, _id)
+        of the last review of the previous page (see parse_cursor).
+        """
+        query = self._after(*before) if before is not None else {}
+        cursor = (
+            self.col.find(query, self.PROJECTION)
+            .sort([("createdAt", DESCENDING), ("_id", DESCENDING)])
+            .limit(limit)
+        )
+        return await cursor.to_list(length=limit)
+
+    async def insert(self, review: dict):
+        res = await self.col.insert_one(review)
+        await self.stats_col.update_one(
+            {"_id": self.STATS_ID},
+            {"$inc": {"count": 1, "sum": review["rating"], f"histogram.{review['rating']}": 1}},
+            upsert=True,
+        )
+        return res
+
+    async def rebuild_stats(self):
+        """Recompute the aggregate from the reviews themselves."""
+        histogram = {str(i): 0 for i in range(1, 6)}
+        async for row in self.col.aggregate([{"$group": {"_id": "$rating", "n": {"$sum": 1}}}]):
+            if str(row["_id"]) in histogram:
+                histogram[str(row["_id"])] = row["n"]
+        count = sum(histogram.values())
+        total = sum(int(k) * v for k, v in histogram.items())
+        await self.stats_col.replace_one(
+            {"_id": self.STATS_ID},
+            {"count": count, "sum": total, "histogram": histogram},
+            upsert=True,
+        )
+
+    async def ensure_stats(self):
+        """Seed the aggregate from existing reviews before the first $inc lands on it."""
+        if await self.stats_col.find_one({"_id": self.STATS_ID}) is None:
+            await self.rebuild_stats()
+
+    async def stats(self) -> dict:
+        doc = await self.stats_col.find_one({"_id": self.STATS_ID})
+        if doc is None:
+            await self.rebuild_stats()
+            doc = await self.stats_col.find_one({"_id": self.STATS_ID}) or {}
+        count = doc.get("count", 0)
+        histogram = doc.get("histogram", {})
+        return {
+            "count": count,
+            "average": round(doc.get("sum", 0) / count, 2) if count else 0.0,
+            "histogram": {str(i): histogram.get(str(i), 0) for i in range(1, 6)},
+        }
+
+
+class HistoryRepository:
+    """
+    Append-only search/view history. The collection is capped, so Mongo
+    drops the oldest entries once it is full and it never needs trimming.
+    """
+
+    def __init__(self, col):
+        self.col = col
+
+    async def insert_many(self, docs: list):
+        if docs:
+            await self.col.insert_many(docs, ordered=False)
+
+    async def recent(self, email: str, kind: str, limit: int):
+        cursor = (
+            self.col.find({"email": email, "kind": kind}, {"data": 1, "at": 1, "kind": 1})
+            # `at` is stored to the millisecond; _id orders entries recorded within one
+            .sort([("at", DESCENDING), ("_id", DESCENDING)])
+            .limit(limit)
+        )
+        return await cursor.to_list(length=limit)
+
+
+class Database:
+    def __init__(self, client, name: str = AUTH_DB):
+        self.client = client
+        db = client[name]
+        self.users = UserRepository(db["users"])
+        self.userdata = UserDataRepository(db["userdata"])
+        self.reviews = ReviewRepository(db["reviews"], db["review_stats"])
+        self.history = HistoryRepository(db["history"])
+        self._db = db
+
+    async def ensure_history_collection(self, cap_bytes: int):
+        """Create history as a capped collection on first boot (an existing one is left alone)."""
+        try:
+            if "history" not in await self._db.list_collection_names():
+                await self._db.create_collection("history", capped=True, size=cap_bytes)
+        except PyMongoError as e:
+            print(f"Could not create capped history collection: {e}")
+
+    async def ensure_indexes(self):
+        specs = [
+            (self.users.col, [("email", ASCENDING)], {"unique": True}),
+            (self.userdata.col, [("email", ASCENDING)], {"unique": True}),
+            (self.reviews.col, [("createdAt", DESCENDING), ("_id", DESCENDING)], {}),
+            (self.history.col, [("email", ASCENDING), ("kind", ASCENDING), ("at", DESCENDING), ("_id", DESCENDING)], {}),
+        ]
+        for col, keys, options in specs:
+            try:
+                await col.create_index(keys, **options)
+            except PyMongoError as e:
+                # e.g. duplicate emails already stored, or Mongo unreachable at boot;
+                # the app still works without the index
+                print(f"Could not create index {keys} on {col.name}: {e}")
+
+    def close(self):
+        self.client.close()
@@ -0,0 +1,247 @@
+"""
+Recipe embedding artifacts for the hybrid search in search.py.
+
+Encoding every recipe with SentenceTransformer is far too slow to do when a
+worker starts, so it is a build step:
+
+    python -m backend.embeddings [path/to/separted_ing.json] [--batch-size 256] [--processes 4]
+
+The build writes a versioned artifact directory:
+
+    .embeddings/v<VERSION>-<model>-<sha256 prefix of the recipe file>/
+        embeddings.npy   float32, one L2-normalized row per recipe
+        hashes.json      content hash of each row's text
+        meta.json        version, model, dimensions, source hash (written last)
+
+Rows are keyed by a hash of the encoded text, so a rebuild after the recipe
+file changes copies every unchanged row from the previous artifact and only
+sends new or edited recipes to the model. The API memory-maps the artifact
+that matches its recipe file.
+
+Query embeddings go through a small LRU (QueryEncoder), so repeated
+ingredient lists never reach the model.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .catalog import file_sha256
+
+ARTIFACT_VERSION = 1
+MODEL_NAME = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ARTIFACT_DIR = os.getenv("EMBEDDINGS_DIR", os.path.join(BASE_DIR, ".embeddings"))
+DEFAULT_RECIPES_FILE = os.getenv("SEPARATED_RECIPES_FILE", r"C:\Users\tirum\OneDrive\Desktop\AIRecipes\separted_ing.json")
+
+
+def recipe_text(recipe: dict) -> str:
+    return " ".join(recipe.get("main_ingredients", []))
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def normalize_rows(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+def load_model(model_name: str = MODEL_NAME):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+def encode_texts(model, texts, batch_size: int = 256, processes: int = 1):
+    """Encode in large batches; with processes > 1 the batches are spread over CPU worker processes."""
+    if not texts:
+        return np.zeros((0, model.get_sentence_embedding_dimension()), dtype=np.float32)
+    if processes > 1:
+        pool = model.start_multi_process_pool(target_devices=["cpu"] * processes)
+        try:
+            matrix = model.encode_multi_process(texts, pool, batch_size=batch_size)
+        finally:
+            model.stop_multi_process_pool(pool)
+    else:
+        matrix = model.encode(texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=len(texts) > 1000)
+    return normalize_rows(matrix)
+
+
+# ---------------- ARTIFACTS ----------------
+def _model_slug(model_name: str) -> str:
+    return model_name.replace("/", "_")
+
+def artifact_path(artifact_dir: str, source_hash: str, model_name: str = MODEL_NAME) -> str:
+    return os.path.join(artifact_dir, f"v{ARTIFACT_VERSION}-{_model_slug(model_name)}-{source_hash[:16]}")
+
+def read_artifact(path: str, expected_rows: int = None):
+    """Memory-map (embeddings, hashes) from `path`, or None if missing/incomplete/mismatched."""
+    try:
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != ARTIFACT_VERSION:
+            return None
+        matrix = np.load(os.path.join(path, "embeddings.npy"), mmap_mode="r")
+        with open(os.path.join(path, "hashes.json"), "r", encoding="utf-8") as f:
+            hashes = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if matrix.dtype != np.float32 or len(hashes) != matrix.shape[0]:
+        return None
+    if expected_rows is not None and matrix.shape[0] != expected_rows:
+        return None
+    return matrix, hashes
+
+def _previous_rows(artifact_dir: str, model_name: str):
+    """text hash -> row from every complete artifact of this model (newest wins)."""
+    rows = {}
+    prefix = f"v{ARTIFACT_VERSION}-{_model_slug(model_name)}-"
+    try:
+        entries = sorted(
+            (e for e in os.listdir(artifact_dir) if e.startswith(prefix) and ".tmp" not in e),
+            key=lambda e: os.path.getmtime(os.path.join(artifact_dir, e)),
+        )
+    except OSError:
+        return rows
+    for entry in entries:
+        found = read_artifact(os.path.join(artifact_dir, entry))
+        if found is not None:
+            matrix, hashes = found
+            rows.update({h: matrix[i] for i, h in enumerate(hashes)})
+    return rows
+
+def build_artifact(recipes_file: str, artifact_dir: str = DEFAULT_ARTIFACT_DIR, model=None,
+                   model_name: str = MODEL_NAME, batch_size: int = 256, processes: int = 1):
+    """Build (or refresh) the artifact for `recipes_file`; returns (path, rows re-encoded)."""
+    source_hash = file_sha256(recipes_file)
+    with open(recipes_file, "r", encoding="utf-8") as f:
+        recipes = json.load(f)
+    texts = [recipe_text(r) for r in recipes]
+    hashes = [text_hash(t) for t in texts]
+
+    previous = _previous_rows(artifact_dir, model_name)
+    missing = sorted({h: t for h, t in zip(hashes, texts) if h not in previous}.items())
+    if missing:
+        model = model or load_model(model_name)
+        encoded = encode_texts(model, [t for _, t in missing], batch_size, processes)
+        previous.update({h: encoded[i] for i, (h, _) in enumerate(missing)})
+
+    dim = len(next(iter(previous.values()))) if previous else 0
+    matrix = np.zeros((len(recipes), dim), dtype=np.float32)
+    for i, h in enumerate(hashes):
+        matrix[i] = previous[h]
+
+    os.makedirs(artifact_dir, exist_ok=True)
+    final = artifact_path(artifact_dir, source_hash, model_name)
+    tmp = f"{final}.tmp{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    np.save(os.path.join(tmp, "embeddings.npy"), matrix)
+    with open(os.path.join(tmp, "hashes.json"), "w", encoding="utf-8") as f:
+        json.dump(hashes, f)
+    # meta.json goes last: an artifact without it is incomplete
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "version": ARTIFACT_VERSION,
+            "model": model_name,
+            "dimensions": dim,
+            "rows": len(recipes),
+            "source_sha256": source_hash,
+        }, f, indent=2)
+    shutil.rmtree(final, ignore_errors=True)
+    os.rename(tmp, final)
+
+    # Older artifacts of this model have been folded into the new one
+    prefix = f"v{ARTIFACT_VERSION}-{_model_slug(model_name)}-"
+    for entry in os.listdir(artifact_dir):
+        path = os.path.join(artifact_dir, entry)
+        if entry.startswith(prefix) and path != final and ".tmp" not in entry:
+            shutil.rmtree(path, ignore_errors=True)
+    return final, len(missing)
+
+def load_embeddings(recipes_file: str, expected_rows: int, artifact_dir: str = DEFAULT_ARTIFACT_DIR,
+                    model=None, model_name: str = MODEL_NAME):
+    """
+    Memory-map the artifact for `recipes_file`. If none was built yet it is
+    built now (reusing any older artifact's rows), which is slow; run the
+    CLI ahead of deploys instead.
+    """
+    path = artifact_path(artifact_dir, file_sha256(recipes_file), model_name)
+    found = read_artifact(path, expected_rows)
+    if found is None:
+        print(f"No embedding artifact at {path}; building it now (run python -m backend.embeddings ahead of time)")
+        path, _ = build_artifact(recipes_file, artifact_dir, model=model, model_name=model_name)
+        found = read_artifact(path, expected_rows)
+    return found[0]
+
+
+# ---------------- QUERY SIDE ----------------
+class QueryEncoder:
+    """Encode query texts through an LRU so repeated ingredient lists skip the model."""
+
+    def __init__(self, model, maxsize: int = 1024):
+        self.model = model
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(text: str) -> str:
+        # The model's tokenizer is uncased, so case and spacing do not change the vector
+        return " ".join(text.lower().split())
+
+    def encode(self, texts):
+        """(len(texts), dim) float32, L2-normalized."""
+        keys = [self._key(t) for t in texts]
+        rows = {}
+        with self._lock:
+            for k in keys:
+                if k in self._cache:
+                    self._cache.move_to_end(k)
+                    rows[k] = self._cache[k]
+        missing = [k for k in dict.fromkeys(keys) if k not in rows]
+        if missing:
+            encoded = encode_texts(self.model, missing, batch_size=max(len(missing), 1))
+            with self._lock:
+                for k, row in zip(missing, encoded):
+                    rows[k] = self._cache[k] = row
+                    self._cache.move_to_end(k)
+                while len(self._cache) > self.maxsize:
+                    self._cache.popitem(last=False)
+        with self._lock:
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+        return np.stack([rows[k] for k in keys]) if keys else np.zeros((0, 0), dtype=np.float32)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._cache),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+if __name__ == "__main__":
+    import time
+
+    parser = argparse.ArgumentParser(description="Build the recipe embedding artifact")
+    parser.add_argument("recipes_file", nargs="?", default=DEFAULT_RECIPES_FILE)
+    parser.add_argument("--out", default=DEFAULT_ARTIFACT_DIR)
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--processes", type=int, default=1, help="CPU worker processes for encoding")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    path, encoded = build_artifact(args.recipes_file, args.out, model_name=args.model,
+                                   batch_size=args.batch_size, processes=args.processes)
+    print(f"✅ {path}: {encoded} recipes encoded in {time.perf_counter() - start:.1f}s, the rest reused")
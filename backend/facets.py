@@ -0,0 +1,156 @@
+"""
+Faceted filtering over Cuisine, Course, Diet and the time fields.
+
+Every facet value owns a bitset (NumPy packed bits, one bit per recipe id)
+of the recipes carrying it, and every time field has a range index: recipe
+ids sorted by minutes, so "at most N minutes" is a binary search plus one
+slice. A query ORs the bitsets of the values picked within a facet, ANDs
+across facets and ranges, and unpacks the survivors to ids. For a few
+thousand recipes a bitset is a few hundred bytes, so typical combinations
+stay well under a millisecond.
+
+Facet counts are disjunctive: the counts for a facet apply every filter
+except that facet's own, so the UI can show how many recipes each
+alternative value would give.
+
+Time a workload of random combinations with:
+    python -m backend.facets [path/to/recipes.json]
+"""
+import sys
+
+import numpy as np
+
+
+class FacetIndex:
+    def __init__(self, facets, times, universe):
+        """
+        facets: field -> (values, int32 code per rid); times: field -> float32
+        minutes per rid; universe: the rids that may be returned at all.
+        """
+        self.size = len(next(iter(times.values()))) if times else len(universe)
+        self.universe = self._bits(universe)
+
+        self.values = {}    # field -> [value, ...]
+        self.lookup = {}    # field -> lowercased value -> code
+        self.codes = {}     # field -> value code per rid, for counting
+        self.bitsets = {}   # field -> (num values, packed bytes) uint8 matrix
+        for field, (values, codes) in facets.items():
+            codes = np.asarray(codes)
+            member = np.zeros((len(values), self.size), dtype=bool)
+            member[codes, np.arange(self.size)] = True
+            self.values[field] = values
+            self.lookup[field] = {v.lower(): code for code, v in enumerate(values) if v}
+            self.codes[field] = codes
+            self.bitsets[field] = np.packbits(member, axis=1) & self.universe
+
+        self.ranges = {}    # field -> (sorted minutes, rids in that order); unknown times left out
+        for field, minutes in times.items():
+            minutes = np.asarray(minutes)
+            known = np.flatnonzero(~np.isnan(minutes))
+            order = known[np.argsort(minutes[known], kind="stable")]
+            self.ranges[field] = (minutes[order], order)
+
+    def _bits(self, rids):
+        member = np.zeros(self.size, dtype=bool)
+        member[rids] = True
+        return np.packbits(member)
+
+    def _rids(self, bits):
+        return np.flatnonzero(np.unpackbits(bits, count=self.size))
+
+    # -------- building blocks --------
+    def value_bits(self, field: str, values):
+        """Union of the bitsets of `values` (case-insensitive); unknown values match nothing."""
+        lookup = self.lookup[field]
+        codes = [lookup[v.strip().lower()] for v in values if v.strip().lower() in lookup]
+        if not codes:
+            return np.zeros_like(self.universe)
+        return np.bitwise_or.reduce(self.bitsets[field][codes], axis=0)
+
+    def range_bits(self, field: str, low: float = None, high: float = None):
+        """Recipes whose `field` minutes fall in [low, high]."""
+        minutes, order = self.ranges[field]
+        start = 0 if low is None else np.searchsorted(minutes, low, side="left")
+        stop = len(minutes) if high is None else np.searchsorted(minutes, high, side="right")
+        return self._bits(order[start:stop])
+
+    def counts(self, field: str, bits):
+        """value -> count over the recipes in `bits`, non-empty values only, largest first."""
+        codes = self.codes[field][self._rids(bits)]
+        totals = np.bincount(codes, minlength=len(self.values[field]))
+        order = np.argsort(-totals, kind="stable")
+        return [{"value": self.values[field][c], "count": int(totals[c])}
+                for c in order.tolist() if totals[c] and self.values[field][c]]
+
+    # -------- queries --------
+    def search(self, filters: dict = None, ranges: dict = None, within=None, counts: bool = True):
+        """
+        filters: field -> list of values (OR within a field, AND across fields).
+        ranges: time field -> (low, high), either end may be None.
+        within: optional rids to restrict to (e.g. a text match); counts honour it.
+        Returns (ascending rids, {field: counts} or None).
+        """
+        facet_bits = {f: self.value_bits(f, vals) for f, vals in (filters or {}).items() if vals}
+        base = self.universe.copy()
+        if within is not None:
+            base &= self._bits(np.asarray(within, dtype=np.int64))
+        for field, (low, high) in (ranges or {}).items():
+            if low is not None or high is not None:
+                base &= self.range_bits(field, low, high)
+
+        bits = base.copy()
+        for b in facet_bits.values():
+            bits &= b
+        rids = self._rids(bits)
+        if not counts:
+            return rids, None
+
+        facet_counts = {}
+        for field in self.values:
+            if field in facet_bits:
+                others = base.copy()
+                for f, b in facet_bits.items():
+                    if f != field:
+                        others &= b
+            else:
+                others = bits
+            facet_counts[field] = self.counts(field, others)
+        return rids, facet_counts
+
+
+# ---------------- BENCHMARK ----------------
+def _benchmark(recipes_file: str, queries: int = 2000):
+    import json
+    import random
+    import time
+
+    from .catalog import Catalog
+
+    with open(recipes_file, "r", encoding="utf-8") as f:
+        catalog = Catalog.from_recipes(json.load(f))
+    start = time.perf_counter()
+    index = FacetIndex(catalog.facets, catalog.times, np.flatnonzero(catalog.english))
+    build = time.perf_counter() - start
+
+    rng = random.Random(0)
+    workload = []
+    for _ in range(queries):
+        filters = {f: [rng.choice(index.values[f])] for f in index.values if rng.random() < 0.6}
+        ranges = {"TotalTimeInMins": (None, rng.choice([15, 30, 45, 60, 120]))} if rng.random() < 0.5 else {}
+        workload.append((filters, ranges))
+
+    for with_counts in (False, True):
+        samples = []
+        for filters, ranges in workload:
+            start = time.perf_counter()
+            index.search(filters, ranges, counts=with_counts)
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        label = "with counts" if with_counts else "ids only"
+        print(f"{label:12} p50 {samples[len(samples) // 2]:.3f} ms  p99 {samples[int(len(samples) * 0.99) - 1]:.3f} ms")
+    print(f"{index.size} recipes, index built in {build * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    from .catalog import DEFAULT_RECIPES_FILE
+    _benchmark(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_RECIPES_FILE)
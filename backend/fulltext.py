@@ -0,0 +1,271 @@
+"""
+Full-text recipe search: an in-process inverted index ranked with BM25.
+
+Each recipe id (rid) is one document made of TranslatedRecipeName,
+TranslatedIngredients and TranslatedInstructions, tokenized with the rules
+from cleaned.py (letters only, junk/measurement words dropped, chilli
+spellings folded). Term frequencies are field-weighted so a hit in the name
+counts for more than one in the instructions.
+
+Postings are CSR arrays (term -> rids, weighted tf). A query adds up the
+BM25 contribution of each term's postings into a dense score vector and
+takes the top k with argpartition. Query words also match vocabulary terms
+they are a prefix of ("panee" -> "paneer"), and words that are not in the
+vocabulary fall back to the closest spellings (rapidfuzz), both at a
+discount.
+
+The built index lives under .search/ next to the backend, keyed by the
+recipe file hash. Tokenized documents are cached by content hash, so when
+the recipe file changes only new or edited recipes are re-tokenized.
+Build ahead of a deploy with:
+    python -m backend.fulltext
+"""
+import hashlib
+import json
+import os
+import shutil
+import sys
+from bisect import bisect_left
+from collections import Counter
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from .cleaned import REPLACEMENTS, tokenize
+
+INDEX_VERSION = 1
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_INDEX_DIR = os.getenv("SEARCH_INDEX_DIR", os.path.join(BASE_DIR, ".search"))
+
+FIELD_WEIGHTS = {
+    "TranslatedRecipeName": 3.0,
+    "TranslatedIngredients": 1.5,
+    "TranslatedInstructions": 1.0,
+}
+K1 = 1.2
+B = 0.75
+PREFIX_WEIGHT = 0.7       # a prefix expansion scores at 70% of an exact hit
+PREFIX_EXPANSIONS = 20    # most frequent completions kept per query word
+FUZZY_CUTOFF = 80         # rapidfuzz ratio for typo matches
+FUZZY_EXPANSIONS = 3
+
+# Single-word spelling variants from cleaned.py, e.g. "chillies" -> "chili"
+TOKEN_VARIANTS = {k: v.lower() for k, v in REPLACEMENTS.items() if " " not in k}
+
+
+def search_tokens(text) -> list:
+    if isinstance(text, list):
+        text = " ".join(t for t in text if isinstance(t, str))
+    if not isinstance(text, str):
+        return []
+    return [TOKEN_VARIANTS.get(w, w) for w in tokenize(text)]
+
+def document_terms(recipe: dict) -> dict:
+    """term -> field-weighted frequency for one recipe."""
+    tf = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        for token in search_tokens(recipe.get(field, "")):
+            tf[token] += weight
+    return dict(tf)
+
+def document_hash(recipe: dict) -> str:
+    text = json.dumps([recipe.get(f) for f in FIELD_WEIGHTS], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class SearchIndex:
+    def __init__(self, terms, indptr, doc_ids, tfs, doc_len):
+        self.terms = terms                      # sorted vocabulary
+        self.term_ids = {t: i for i, t in enumerate(terms)}
+        self.indptr = indptr                    # term id -> slice of postings
+        self.doc_ids = doc_ids                  # int32 rids
+        self.tfs = tfs                          # float32 weighted tf
+        self.doc_len = doc_len                  # float32 weighted length per rid
+        self.num_docs = len(doc_len)
+        self.avg_len = float(doc_len.mean()) if self.num_docs else 0.0
+        df = np.diff(indptr)
+        self.df = df
+        self.idf = np.log1p((self.num_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        # Length normalisation is per document, so it is computed once
+        self._norm = (K1 * (1 - B + B * doc_len / self.avg_len)).astype(np.float32) if self.num_docs else doc_len
+        self._by_initial = {}
+        for t in terms:
+            self._by_initial.setdefault(t[0], []).append(t)
+
+    @classmethod
+    def from_documents(cls, documents):
+        """documents[rid] is a term -> weighted tf dict."""
+        terms = sorted({t for doc in documents for t in doc})
+        ids = {t: i for i, t in enumerate(terms)}
+        postings = [[] for _ in terms]
+        for rid, doc in enumerate(documents):
+            for t, tf in doc.items():
+                postings[ids[t]].append((rid, tf))
+        indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(p) for p in postings])
+        doc_ids = np.fromiter((rid for p in postings for rid, _ in p), dtype=np.int32, count=int(indptr[-1]))
+        tfs = np.fromiter((tf for p in postings for _, tf in p), dtype=np.float32, count=int(indptr[-1]))
+        doc_len = np.fromiter((sum(doc.values()) for doc in documents), dtype=np.float32, count=len(documents))
+        return cls(terms, indptr, doc_ids, tfs, doc_len)
+
+    # -------- query expansion --------
+    def prefix_terms(self, word: str):
+        """Vocabulary terms starting with `word` (excluding it), most frequent first."""
+        start = bisect_left(self.terms, word)
+        stop = bisect_left(self.terms, word + "\uffff", lo=start)
+        ids = [i for i in range(start, stop) if self.terms[i] != word]
+        if len(ids) > PREFIX_EXPANSIONS:
+            ids = sorted(ids, key=lambda i: -self.df[i])[:PREFIX_EXPANSIONS]
+        return ids
+
+    def fuzzy_terms(self, word: str):
+        """(term id, similarity) for close spellings sharing the first letter."""
+        candidates = self._by_initial.get(word[0], [])
+        matches = process.extract(word, candidates, scorer=fuzz.ratio,
+                                  score_cutoff=FUZZY_CUTOFF, limit=FUZZY_EXPANSIONS)
+        return [(self.term_ids[m[0]], m[1] / 100) for m in matches]
+
+    def expand(self, query: str):
+        """term id -> weight for the query words plus their prefix / typo matches."""
+        weights = {}
+        for word in dict.fromkeys(search_tokens(query)):
+            exact = self.term_ids.get(word)
+            if exact is not None:
+                weights[exact] = max(weights.get(exact, 0), 1.0)
+            prefixed = self.prefix_terms(word) if len(word) >= 3 else []
+            for i in prefixed:
+                weights[i] = max(weights.get(i, 0), PREFIX_WEIGHT)
+            if exact is None and not prefixed and len(word) >= 3:
+                for i, similarity in self.fuzzy_terms(word):
+                    weights[i] = max(weights.get(i, 0), PREFIX_WEIGHT * similarity)
+        return weights
+
+    # -------- queries --------
+    def scores(self, query: str):
+        """Dense BM25 score per rid (zeros where nothing matched)."""
+        scores = np.zeros(self.num_docs, dtype=np.float32)
+        for term_id, weight in self.expand(query).items():
+            start, stop = self.indptr[term_id], self.indptr[term_id + 1]
+            docs = self.doc_ids[start:stop]
+            tf = self.tfs[start:stop]
+            # rids are unique within one posting list, so += is safe
+            scores[docs] += weight * self.idf[term_id] * tf * (K1 + 1) / (tf + self._norm[docs])
+        return scores
+
+    def search(self, query: str, k: int = 10, allowed=None):
+        """
+        Return ([(rid, score)] for the top `k`, best first with ties by rid,
+        number of matching rids). `allowed` is an optional boolean mask over rids.
+        """
+        scores = self.scores(query)
+        if allowed is not None:
+            scores[~allowed] = 0
+        hits = np.flatnonzero(scores > 0)
+        total = len(hits)
+        if total > k:
+            values = scores[hits]
+            cut = values[np.argpartition(-values, k - 1)[k - 1]]  # k-th best score
+            # argpartition picks arbitrarily among scores equal to the cut; keep the lowest rids
+            above = hits[values > cut]
+            hits = np.concatenate([above, hits[values == cut][:k - len(above)]])
+        order = np.lexsort((hits, -scores[hits]))
+        return [(int(hits[i]), float(scores[hits[i]])) for i in order], total
+
+    # -------- persistence --------
+    def save(self, path: str):
+        os.makedirs(path)
+        np.save(os.path.join(path, "indptr.npy"), self.indptr)
+        np.save(os.path.join(path, "doc_ids.npy"), self.doc_ids)
+        np.save(os.path.join(path, "tfs.npy"), self.tfs)
+        np.save(os.path.join(path, "doc_len.npy"), self.doc_len)
+        with open(os.path.join(path, "terms.json"), "w", encoding="utf-8") as f:
+            json.dump(self.terms, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str):
+        def array(name):
+            return np.load(os.path.join(path, name), mmap_mode="r")
+
+        with open(os.path.join(path, "terms.json"), "r", encoding="utf-8") as f:
+            terms = json.load(f)
+        return cls(terms, array("indptr.npy"), array("doc_ids.npy"), array("tfs.npy"),
+                   np.asarray(array("doc_len.npy")))
+
+
+# ---------------- BUILD / LOAD ----------------
+def _index_path(index_dir: str, source_hash: str) -> str:
+    return os.path.join(index_dir, f"v{INDEX_VERSION}-{source_hash[:16]}")
+
+def _document_cache_path(index_dir: str) -> str:
+    return os.path.join(index_dir, f"documents-v{INDEX_VERSION}.json")
+
+def build_index(catalog, index_dir: str = DEFAULT_INDEX_DIR):
+    """
+    Tokenize the catalog, reusing cached term counts for recipes whose
+    searchable text is unchanged. Returns (index, content hash -> term
+    counts for the current recipes, number of recipes re-tokenized).
+    """
+    try:
+        with open(_document_cache_path(index_dir), "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+
+    documents, fresh, tokenized = [], {}, 0
+    for rid in range(len(catalog.names)):
+        recipe = catalog.record(rid)
+        key = document_hash(recipe)
+        doc = cache.get(key)
+        if doc is None:
+            doc = document_terms(recipe)
+            tokenized += 1
+        fresh[key] = doc
+        documents.append(doc)
+    return SearchIndex.from_documents(documents), fresh, tokenized
+
+def load_index(catalog, source_hash: str, index_dir: str = DEFAULT_INDEX_DIR) -> SearchIndex:
+    """Load the index built for `source_hash`, (re)building it if needed."""
+    path = _index_path(index_dir, source_hash)
+    if os.path.isdir(path):
+        try:
+            return SearchIndex.load(path)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring search index at {path}: {e}")
+
+    index, documents, tokenized = build_index(catalog, index_dir)
+    print(f"Search index built: {tokenized} of {len(documents)} recipes tokenized")
+    try:
+        os.makedirs(index_dir, exist_ok=True)
+        tmp = f"{path}.tmp{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        index.save(tmp)
+        try:
+            os.rename(tmp, path)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)  # another worker won the race
+        # Keep only the current document cache (entries for deleted recipes drop out)
+        cache_tmp = f"{_document_cache_path(index_dir)}.tmp{os.getpid()}"
+        with open(cache_tmp, "w", encoding="utf-8") as f:
+            json.dump(documents, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(cache_tmp, _document_cache_path(index_dir))
+        for entry in os.listdir(index_dir):
+            if entry.startswith("v") and os.path.join(index_dir, entry) != path and ".tmp" not in entry:
+                shutil.rmtree(os.path.join(index_dir, entry), ignore_errors=True)
+    except OSError as e:
+        print(f"Could not write search index to {index_dir}: {e}")
+    return index
+
+
+if __name__ == "__main__":
+    import time
+
+    from .catalog import DEFAULT_RECIPES_FILE, file_sha256, load_catalog
+
+    source = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_RECIPES_FILE
+    source_hash = file_sha256(source)
+    catalog = load_catalog(source)
+    shutil.rmtree(_index_path(DEFAULT_INDEX_DIR, source_hash), ignore_errors=True)
+    start = time.perf_counter()
+    index = load_index(catalog, source_hash)
+    print(f"✅ {len(index.terms)} terms over {index.num_docs} recipes in {time.perf_counter() - start:.2f}s")
@@ -1,11 +1,23 @@
+"""
+Standalone graph-based recipe suggestion API.
+
+    python -m backend.graph            # from the repo root
+    python backend/graph.py            # or as a plain script
+    uvicorn backend.graph:app
+
+GRAPH_API_HOST / GRAPH_API_PORT pick the address (default 127.0.0.1:8001).
+"""
 from fastapi import FastAPI
 from pydantic import BaseModel
 import json
 import re
-import networkx as nx
 from rapidfuzz import process, fuzz
 from fastapi.middleware.cors import CORSMiddleware
 import os
+try:
+    from .recipe_graph import RecipeGraph
+except ImportError:  # run as a script: python backend/graph.py
+    from recipe_graph import RecipeGraph
 
 # ---------------- FASTAPI APP ----------------
 app = FastAPI(title="Graph-Based Recipe Suggestion API")
@@ -36,24 +48,24 @@ def preprocess_ingredient(ing):
     synonyms = re.findall(r'([^\(\)]+)', ing)
     return [s.strip() for s in synonyms]
 
-G = nx.Graph()
-all_ingredients_set = set()
 recipe_info_map = {}
+recipe_ids = {}
+adjacency = []
 
 for r in RECIPES:
     recipe_name = r["TranslatedRecipeName"]
     recipe_info_map[recipe_name] = r
-    G.add_node(recipe_name, type='recipe')
+    if recipe_name not in recipe_ids:
+        recipe_ids[recipe_name] = len(adjacency)
+        adjacency.append(set())
 
     main_ings = r.get("main_ingredients", [])
     for ing in main_ings:
-        ing_list = preprocess_ingredient(ing)
-        for i in ing_list:
-            all_ingredients_set.add(i)
-            G.add_node(i, type='ingredient')
-            G.add_edge(recipe_name, i)
+        adjacency[recipe_ids[recipe_name]].update(preprocess_ingredient(ing))
 
-all_ingredients_list = list(all_ingredients_set)
+recipe_names = list(recipe_ids)
+G = RecipeGraph.from_adjacency(adjacency)
+all_ingredients_list = G.ingredients
 
 # ---------------- UTILITY FUNCTIONS ----------------
 def correct_ingredient(user_ing):
@@ -65,17 +77,16 @@ def correct_ingredient(user_ing):
 def suggest_recipes(user_ingredients, top_n=9):
     corrected_ings = [correct_ingredient(ing) for ing in user_ingredients]
 
-    recipe_scores = []
-    for recipe in [n for n, d in G.nodes(data=True) if d['type'] == 'recipe']:
-        main_ing_neighbors = set(G.neighbors(recipe))
-        matched = main_ing_neighbors & set(corrected_ings)
-        if matched:
-            recipe_scores.append((recipe, matched))
+    query_ids = G.lookup(corrected_ings)
 
-    recipe_scores.sort(key=lambda x: len(x[1]), reverse=True)
+    recipe_scores = []
+    for rid in G.ranked_overlap(query_ids):
+        recipe_scores.append((recipe_names[rid], G.matched(rid, query_ids)))
+        if len(recipe_scores) == top_n:
+            break
 
     results = []
-    for recipe_name, matched_set in recipe_scores[:top_n]:
+    for recipe_name, matched_set in recipe_scores:
         r = recipe_info_map[recipe_name]
         img_path = r.get("image_path", "default.jpg")
         img_filename = os.path.basename(img_path)  # Extract filename
@@ -102,3 +113,7 @@ def get_recipe_suggestions(data: IngredientsInput):
 # ---------------- STATIC FILES ----------------
 from fastapi.staticfiles import StaticFiles
 app.mount("/static", StaticFiles(directory=os.path.join(STATIC_DIR, "recipes_images")), name="static")
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host=os.getenv("GRAPH_API_HOST", "127.0.0.1"), port=int(os.getenv("GRAPH_API_PORT", 8001)))
@@ -0,0 +1,163 @@
+"""
+Per-user search and view history.
+
+Writes are append-only and never wait on Mongo: record() adds the entry to
+the user's cached ring buffer (if one is loaded) and to a pending list, and
+a background task writes pending entries to the capped `history`
+collection with one insert_many every `flush_interval` seconds, or sooner
+once `batch_size` entries are waiting.
+
+Reads come from an LRU of per-user ring buffers holding the latest `limit`
+entries of each kind. A buffer older than `cache_ttl` seconds is reloaded
+from Mongo, so entries recorded by another worker appear within one flush
+interval plus the TTL. Entries this worker has not flushed yet are merged
+into every reload, so a user always sees their own latest actions.
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo.errors import PyMongoError
+
+KINDS = ("searched", "viewed")
+
+
+class HistoryStore:
+    def __init__(self, repo, limit: int = 10, batch_size: int = 100, flush_interval: float = 1.0,
+                 max_pending: int = 10000, cache_users: int = 1024, cache_ttl: float = 5.0):
+        self.repo = repo
+        self.limit = limit
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.cache_users = cache_users
+        self.cache_ttl = cache_ttl
+        self._pending = deque()
+        self._inflight = []
+        self._cache = OrderedDict()   # email -> (loaded_at, {kind: deque of docs})
+        self._lock = threading.Lock()
+        self._task = None
+        self._wake = None
+        self._loop = None
+        self.flushed = 0
+        self.dropped = 0
+        self.hits = 0
+        self.misses = 0
+
+    # -------- writes --------
+    def record(self, email: str, kind: str, data: dict):
+        """Queue one entry for `email`; safe to call from any thread."""
+        doc = {"_id": ObjectId(), "email": email, "kind": kind, "data": data, "at": datetime.utcnow()}
+        with self._lock:
+            cached = self._cache.get(email)
+            if cached is not None:
+                cached[1][kind].appendleft(doc)
+            self._pending.append(doc)
+            if len(self._pending) > self.max_pending:
+                # Mongo is down or far behind: drop the oldest rather than grow forever
+                self._pending.popleft()
+                self.dropped += 1
+            full = len(self._pending) >= self.batch_size
+        if full and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def flush(self):
+        with self._lock:
+            batch = self._inflight = list(self._pending)
+            self._pending.clear()
+        if not batch:
+            return 0
+        try:
+            await self.repo.insert_many(batch)
+        except PyMongoError as e:
+            print(f"History flush failed, will retry {len(batch)} entries: {e}")
+            with self._lock:
+                self._pending.extendleft(reversed(batch))
+                while len(self._pending) > self.max_pending:
+                    self._pending.popleft()
+                    self.dropped += 1
+                self._inflight = []
+            return 0
+        with self._lock:
+            self._inflight = []
+            self.flushed += len(batch)
+        return len(batch)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flusher and write whatever is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._wake = None
+        await self.flush()
+
+    # -------- reads --------
+    def _unflushed(self, email: str):
+        # Caller holds self._lock
+        return [d for d in self._inflight + list(self._pending) if d["email"] == email]
+
+    def _buffers(self, docs):
+        buffers = {kind: {} for kind in KINDS}
+        for d in docs:
+            buffers[d["kind"]][d["_id"]] = d
+        return {
+            kind: deque(sorted(found.values(), key=lambda d: (d["at"], d["_id"]), reverse=True)[:self.limit],
+                        maxlen=self.limit)
+            for kind, found in buffers.items()
+        }
+
+    async def get(self, email: str) -> dict:
+        """{kind: [entry data, latest first]} for `email`."""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(email)
+            if cached is not None and now - cached[0] < self.cache_ttl:
+                self._cache.move_to_end(email)
+                self.hits += 1
+                return {kind: [d["data"] for d in docs] for kind, docs in cached[1].items()}
+            self.misses += 1
+            # Taken before and after the reads, so an entry flushed while they run still shows up
+            docs = self._unflushed(email)
+
+        for kind in KINDS:
+            docs += await self.repo.recent(email, kind, self.limit)
+        with self._lock:
+            buffers = self._buffers(docs + self._unflushed(email))
+            self._cache[email] = (now, buffers)
+            self._cache.move_to_end(email)
+            while len(self._cache) > self.cache_users:
+                self._cache.popitem(last=False)
+            return {kind: [d["data"] for d in docs] for kind, docs in buffers.items()}
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "pending": len(self._pending),
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "cached_users": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
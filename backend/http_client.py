@@ -0,0 +1,126 @@
+"""
+Shared async HTTP client for outbound calls (Perplexity, reCAPTCHA).
+
+One pooled httpx.AsyncClient is reused for every request so connections
+stay alive between calls. Each upstream gets its own timeout, a semaphore
+that caps in-flight calls, and retry with exponential backoff for failures
+that are safe to repeat: the connection never opened, or the upstream
+answered 429/502/503/504.
+
+Base URLs come from the environment, so a local stub server can stand in
+for either upstream, e.g. PERPLEXITY_URL=http://127.0.0.1:9000/chat/completions.
+"""
+import asyncio
+import os
+import random
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+import httpx
+
+RETRY_STATUSES = {429, 502, 503, 504}
+
+# Raised before the request reached the upstream, so retrying cannot duplicate it
+RETRY_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+@dataclass
+class Upstream:
+    name: str
+    url: str
+    timeout: float
+    max_concurrency: int
+    retries: int = 2
+    backoff: float = 0.5  # seconds, doubled per attempt
+
+
+class UpstreamBusy(Exception):
+    """All retries were spent on retryable failures."""
+
+
+class AsyncHTTP:
+    def __init__(self, upstreams, max_connections: int = 100, keepalive: float = 30.0, transport=None):
+        """`transport` (e.g. httpx.MockTransport) replaces the network, for tests."""
+        self.upstreams = {u.name: u for u in upstreams}
+        self._transport = transport
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=keepalive,
+        )
+        self._semaphores = {u.name: asyncio.Semaphore(u.max_concurrency) for u in upstreams}
+        self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(limits=self._limits, transport=self._transport)
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def post(self, upstream: str, **kwargs) -> httpx.Response:
+        """POST to the named upstream, retrying only when it is safe to."""
+        u = self.upstreams[upstream]
+        async with self._semaphores[upstream]:
+            for attempt in range(u.retries + 1):
+                last = attempt == u.retries
+                try:
+                    res = await self.client.post(u.url, timeout=u.timeout, **kwargs)
+                except RETRY_ERRORS as e:
+                    if last:
+                        raise UpstreamBusy(f"{u.name} unreachable: {e}") from e
+                    await asyncio.sleep(self._delay(u, attempt))
+                    continue
+                if res.status_code not in RETRY_STATUSES or last:
+                    return res
+                await asyncio.sleep(self._delay(u, attempt, res.headers.get("retry-after")))
+        raise UpstreamBusy(u.name)  # unreachable: the last attempt always returns or raises
+
+    @asynccontextmanager
+    async def stream(self, upstream: str, **kwargs):
+        """
+        POST to the named upstream and yield the response before its body is
+        read. Retries happen only before any body has been handed out; the
+        connection is released when the block exits or is cancelled.
+        """
+        u = self.upstreams[upstream]
+        async with self._semaphores[upstream]:
+            for attempt in range(u.retries + 1):
+                last = attempt == u.retries
+                request = self.client.build_request("POST", u.url, timeout=u.timeout, **kwargs)
+                try:
+                    res = await self.client.send(request, stream=True)
+                except RETRY_ERRORS as e:
+                    if last:
+                        raise UpstreamBusy(f"{u.name} unreachable: {e}") from e
+                    await asyncio.sleep(self._delay(u, attempt))
+                    continue
+                if res.status_code in RETRY_STATUSES and not last:
+                    await res.aclose()
+                    await asyncio.sleep(self._delay(u, attempt, res.headers.get("retry-after")))
+                    continue
+                try:
+                    yield res
+                finally:
+                    await res.aclose()
+                return
+
+    @staticmethod
+    def _delay(u: Upstream, attempt: int, retry_after: str = None) -> float:
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), u.timeout)
+        return u.backoff * (2 ** attempt) * (0.5 + random.random())
+
+
+def upstream_from_env(name: str, prefix: str, url: str, timeout: float, max_concurrency: int) -> Upstream:
+    return Upstream(
+        name=name,
+        url=os.getenv(f"{prefix}_URL", url),
+        timeout=float(os.getenv(f"{prefix}_TIMEOUT", timeout)),
+        max_concurrency=int(os.getenv(f"{prefix}_MAX_CONCURRENCY", max_concurrency)),
+        retries=int(os.getenv(f"{prefix}_RETRIES", 2)),
+    )
@@ -1,68 +1,359 @@
-import os
+"""
+Recipe image crawler.
+
+For every recipe with a URL, fetch the recipe page, take its og:image (or
+the first <img>) and save it as <TranslatedRecipeName cleaned>.<ext> in the
+output folder. Runs on asyncio with one pooled httpx client:
+
+    python -m backend.images [recipes.json] [--out DIR] [--concurrency 16]
+                             [--per-host 2] [--delay 1.0] [--refresh]
+
+- At most --concurrency requests are in flight overall, at most --per-host
+  to one host, and requests to one host start at least --delay seconds apart.
+- 429/5xx answers and failed connects are retried with backoff (Retry-After
+  is honoured).
+- Images are streamed to a .part file and renamed when complete.
+- Every finished recipe is appended to <out>/.crawl-manifest.jsonl, so an
+  interrupted run resumes where it stopped. Recipes already saved are
+  skipped; with --refresh they are revalidated with If-None-Match /
+  If-Modified-Since and only re-downloaded when they changed.
+
+Any http:// URL works, so a local fixture server can stand in for the
+recipe site.
+"""
+import argparse
+import asyncio
 import json
-import time
-import requests
-from bs4 import BeautifulSoup
-from tqdm import tqdm
+import mimetypes
+import os
 import re
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
 
+import httpx
 
-JSON_FILE = r"C:\Users\tirum\OneDrive\Desktop\AIRecipes\separted_ing.json"        
-URL_KEY = "URL"                     
-NAME_KEY = "TranslatedRecipeName"   
-OUTPUT_DIR = r"C:\Users\tirum\OneDrive\Desktop\AIRecipes\recipes_images"       
-DELAY = 1                           
+from .http_client import RETRY_ERRORS, RETRY_STATUSES
 
-# --- Setup ---
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+JSON_FILE = os.getenv("SEPARATED_RECIPES_FILE", r"C:\Users\tirum\OneDrive\Desktop\AIRecipes\separted_ing.json")
+OUTPUT_DIR = os.getenv("RECIPE_IMAGES_DIR", os.path.join(BASE_DIR, "../frontend/recipes_images"))
+URL_KEY = "URL"
+NAME_KEY = "TranslatedRecipeName"
+MANIFEST_NAME = ".crawl-manifest.jsonl"
 
-# --- Load JSON ---
-with open(JSON_FILE, "r", encoding="utf-8") as f:
-    data = json.load(f)
+USER_AGENT = "Mozilla/5.0"
+TIMEOUT = 15
+RETRIES = 3
+BACKOFF = 1.0                      # seconds, doubled per attempt
+MAX_IMAGE_BYTES = 20 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
 
-# --- Loop over all URLs ---
-for i, item in enumerate(tqdm(data, desc="Scraping images")):
-    url = item.get(URL_KEY)
-    if not url:
-        continue
+DONE = {"ok", "no_image", "gone"}  # statuses a normal run does not retry
 
-    recipe_name = item.get(NAME_KEY, f"recipe_{i+1}")
-    # Clean recipe name for file name
-    recipe_name_clean = re.sub(r'[^A-Za-z0-9]+', '_', recipe_name).strip('_')
 
-    try:
-        resp = requests.get(url, timeout=15, headers={'User-Agent': 'Mozilla/5.0'})
-        if resp.status_code != 200:
-            print(f"Skipping {url} — status {resp.status_code}")
-            continue
+def clean_name(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", name).strip("_")
+
+
+class ImageFinder(HTMLParser):
+    """og:image content, else the first <img src>."""
+
+    def __init__(self):
+        super().__init__()
+        self.og_image = None
+        self.first_img = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "meta" and self.og_image is None and attrs.get("property") == "og:image" and attrs.get("content"):
+            self.og_image = attrs["content"].strip()
+        elif tag == "img" and self.first_img is None and attrs.get("src"):
+            self.first_img = attrs["src"].strip()
+
+def find_image_url(html: str, page_url: str):
+    finder = ImageFinder()
+    finder.feed(html)
+    found = finder.og_image or finder.first_img
+    # urljoin also fixes protocol-relative ("//cdn/...") and relative paths
+    return urljoin(page_url, found) if found else None
+
+
+# ---------------- MANIFEST ----------------
+class Manifest:
+    """Append-only JSON lines, one per finished recipe; the last line per URL wins."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # a line cut off by a crash
+                    self.entries[entry["url"]] = entry
+        except OSError:
+            pass
+        self._file = None
+
+    def get(self, url: str):
+        return self.entries.get(url)
+
+    def record(self, entry: dict):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        entry["at"] = datetime.utcnow().isoformat(timespec="seconds")
+        self.entries[entry["url"]] = entry
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def compact(self):
+        """Rewrite with one line per URL."""
+        self.close()
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for entry in self.entries.values():
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(tmp, self.path)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
 
-        soup = BeautifulSoup(resp.text, "html.parser")
 
-        # 1️⃣ Try og:image first
-        meta_img = soup.find("meta", property="og:image")
-        if meta_img and meta_img.get("content"):
-            img_url = meta_img.get("content")
-        else:
-            # 2️⃣ Fallback: first <img> tag
-            image_tag = soup.find("img")
-            img_url = image_tag.get("src") if image_tag else None
+# ---------------- POLITENESS ----------------
+class HostLimiter:
+    """At most `per_host` requests in flight per host, started `delay` seconds apart."""
 
-        if not img_url:
-            print(f"No image found at {url}")
-            continue
+    def __init__(self, per_host: int, delay: float):
+        self.per_host = per_host
+        self.delay = delay
+        self._semaphores = {}
+        self._locks = {}
+        self._next_start = {}
 
-        if img_url.startswith("//"):  # fix protocol-relative URLs
-            img_url = "https:" + img_url
+    @asynccontextmanager
+    async def slot(self, host: str):
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self.per_host))
+        async with semaphore:
+            if self.delay > 0:
+                async with self._locks.setdefault(host, asyncio.Lock()):
+                    loop = asyncio.get_running_loop()
+                    wait = self._next_start.get(host, 0) - loop.time()
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                    self._next_start[host] = loop.time() + self.delay
+            yield
 
-        # Download image
-        img_data = requests.get(img_url, timeout=15).content
-        img_ext = os.path.splitext(img_url.split("?")[0])[1] or ".jpg"
-        img_path = os.path.join(OUTPUT_DIR, f"{recipe_name_clean}{img_ext}")
 
-        with open(img_path, "wb") as f:
-            f.write(img_data)
+class GiveUp(Exception):
+    """The recipe cannot be finished this run."""
 
-        time.sleep(DELAY)  # be polite to the server
 
-    except Exception as e:
-        print(f"Error scraping {url}: {e}")
+# ---------------- CRAWLER ----------------
+class ImageCrawler:
+    def __init__(self, out_dir: str, concurrency: int = 16, per_host: int = 2, delay: float = 1.0,
+                 refresh: bool = False, retries: int = RETRIES, backoff: float = BACKOFF):
+        self.out_dir = out_dir
+        self.concurrency = concurrency
+        self.refresh = refresh
+        self.retries = retries
+        self.backoff = backoff
+        self.hosts = HostLimiter(per_host, delay)
+        self.manifest = Manifest(os.path.join(out_dir, MANIFEST_NAME))
+        self.counts = {"downloaded": 0, "not_modified": 0, "skipped": 0, "no_image": 0, "gone": 0, "error": 0}
+        self.client = None
+
+    async def _request(self, url: str, headers: dict, handle):
+        """
+        GET with politeness and retries; `handle(response)` runs while the
+        host slot is still held, so the body transfer counts against the limits.
+        """
+        host = urlsplit(url).netloc
+        for attempt in range(self.retries + 1):
+            last = attempt == self.retries
+            retry_after = None
+            async with self.hosts.slot(host):
+                try:
+                    async with self.client.stream("GET", url, headers=headers) as res:
+                        if res.status_code not in RETRY_STATUSES or last:
+                            return await handle(res)
+                        retry_after = res.headers.get("retry-after")
+                except RETRY_ERRORS as e:
+                    if last:
+                        raise GiveUp(f"unreachable: {e}") from e
+                except httpx.HTTPError as e:
+                    raise GiveUp(str(e)) from e
+                except (httpx.InvalidURL, ValueError) as e:
+                    # A malformed URL (e.g. an og:image of "http://[bad") will not get better on retry
+                    raise GiveUp(f"invalid url: {e}") from e
+            await asyncio.sleep(self._delay(attempt, retry_after))
+        raise GiveUp("retries exhausted")  # unreachable: the last attempt always returns or raises
+
+    def _delay(self, attempt: int, retry_after=None) -> float:
+        if retry_after:
+            try:
+                return min(float(retry_after), 60.0)
+            except ValueError:
+                pass
+        return self.backoff * (2 ** attempt)
+
+    @staticmethod
+    def _validators(res) -> dict:
+        return {"etag": res.headers.get("etag"), "last_modified": res.headers.get("last-modified")}
+
+    @staticmethod
+    def _conditional(previous) -> dict:
+        headers = {}
+        if previous:
+            if previous.get("etag"):
+                headers["If-None-Match"] = previous["etag"]
+            if previous.get("last_modified"):
+                headers["If-Modified-Since"] = previous["last_modified"]
+        return headers
+
+    async def _page_image_url(self, url: str, previous):
+        """(image url, page validators); the url is None if the page has no image."""
+        page_prev = previous.get("page") if previous else None
+
+        async def handle(res):
+            if res.status_code == 304:
+                return previous.get("image_url"), page_prev
+            if res.status_code in (404, 410):
+                raise GiveUp("gone")
+            if res.status_code != 200:
+                raise GiveUp(f"page status {res.status_code}")
+            await res.aread()
+            return find_image_url(res.text, str(res.url)), self._validators(res)
+
+        return await self._request(url, self._conditional(page_prev), handle)
+
+    def _extension(self, img_url: str, content_type: str) -> str:
+        ext = os.path.splitext(urlsplit(img_url).path)[1].lower()
+        if not re.fullmatch(r"\.[a-z0-9]{1,5}", ext):
+            ext = mimetypes.guess_extension((content_type or "").split(";")[0].strip()) or ".jpg"
+        return ext
+
+    async def _download(self, img_url: str, name: str, previous):
+        """Stream the image to disk; returns (file name, validators, changed?)."""
+        image_prev = previous.get("image") if previous else None
+        prev_file = previous.get("file") if previous else None
+        have_file = prev_file and os.path.exists(os.path.join(self.out_dir, prev_file))
+        same_url = previous and previous.get("image_url") == img_url
+        headers = self._conditional(image_prev) if have_file and same_url else {}
+
+        async def handle(res):
+            if res.status_code == 304:
+                return prev_file, image_prev, False
+            if res.status_code != 200:
+                raise GiveUp(f"image status {res.status_code}")
+            file_name = f"{name}{self._extension(img_url, res.headers.get('content-type'))}"
+            path = os.path.join(self.out_dir, file_name)
+            part = f"{path}.part"
+            size = 0
+            try:
+                with open(part, "wb") as f:
+                    async for chunk in res.aiter_bytes(CHUNK_SIZE):
+                        size += len(chunk)
+                        if size > MAX_IMAGE_BYTES:
+                            raise GiveUp(f"image larger than {MAX_IMAGE_BYTES} bytes")
+                        f.write(chunk)
+                os.replace(part, path)
+            except BaseException:
+                if os.path.exists(part):
+                    os.remove(part)
+                raise
+            return file_name, self._validators(res), True
+
+        return await self._request(img_url, headers, handle)
+
+    async def crawl_one(self, url: str, name: str):
+        previous = self.manifest.get(url)
+        if previous and previous.get("status") in DONE and not self.refresh:
+            if previous["status"] != "ok" or os.path.exists(os.path.join(self.out_dir, previous.get("file", ""))):
+                self.counts["skipped"] += 1
+                return
+
+        entry = {"url": url}
+        try:
+            img_url, page_validators = await self._page_image_url(url, previous)
+            entry["page"] = page_validators
+            if not img_url:
+                entry["status"] = "no_image"
+            else:
+                file_name, image_validators, changed = await self._download(img_url, name, previous)
+                entry.update(status="ok", image_url=img_url, file=file_name, image=image_validators)
+                self.counts["downloaded" if changed else "not_modified"] += 1
+        except GiveUp as e:
+            entry["status"] = "gone" if str(e) == "gone" else "error"
+            entry["error"] = str(e)
+            if entry["status"] == "error":
+                print(f"Error scraping {url}: {e}")
+        except Exception as e:
+            # Recorded like any other failure so one bad page cannot stop the run
+            # (CancelledError is not an Exception and still propagates)
+            entry.update(status="error", error=f"{type(e).__name__}: {e}")
+            print(f"Error scraping {url}: {entry['error']}")
+        if entry["status"] != "ok":
+            self.counts[entry["status"]] += 1
+        self.manifest.record(entry)
+
+    async def run(self, recipes):
+        os.makedirs(self.out_dir, exist_ok=True)
+        jobs = asyncio.Queue()
+        for i, item in enumerate(recipes):
+            url = item.get(URL_KEY)
+            if url:
+                jobs.put_nowait((url, clean_name(item.get(NAME_KEY) or f"recipe_{i + 1}")))
+        total = jobs.qsize()
+        start = time.perf_counter()
+
+        async def worker():
+            while True:
+                try:
+                    url, name = jobs.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                await self.crawl_one(url, name)
+                done = total - jobs.qsize()
+                if done % 100 == 0:
+                    print(f"{done}/{total} recipes ({time.perf_counter() - start:.0f}s) {self.counts}")
+
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(limits=limits, timeout=TIMEOUT, follow_redirects=True,
+                                     headers={"User-Agent": USER_AGENT}) as client:
+            self.client = client
+            try:
+                await asyncio.gather(*(worker() for _ in range(max(1, min(self.concurrency, total)))))
+            finally:
+                self.client = None
+                self.manifest.compact()
+        return self.counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download recipe images (resumable)")
+    parser.add_argument("recipes_file", nargs="?", default=JSON_FILE)
+    parser.add_argument("--out", default=OUTPUT_DIR)
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight overall")
+    parser.add_argument("--per-host", type=int, default=2, help="requests in flight per host")
+    parser.add_argument("--delay", type=float, default=1.0, help="seconds between request starts per host")
+    parser.add_argument("--refresh", action="store_true", help="revalidate images that were already saved")
+    args = parser.parse_args()
+
+    with open(args.recipes_file, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    start = time.perf_counter()
+    crawler = ImageCrawler(args.out, args.concurrency, args.per_host, args.delay, args.refresh)
+    try:
+        counts = asyncio.run(crawler.run(data))
+    except KeyboardInterrupt:
+        print("Interrupted; run again to resume")
+        raise SystemExit(1)
+    print(f"✅ {counts} in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,205 @@
+"""
+Streaming workbook -> MongoDB loader shared by data.py and dataset2.py.
+
+Rows are read from the workbook a chunk at a time (openpyxl read-only mode,
+or csv), turned into documents by a transform in a process pool, and
+written with unordered bulk upserts keyed on Srno, so re-running a load
+updates recipes in place instead of dropping the collection. Rows without
+a Srno are keyed on RowKey, a hash of their name and ingredients, so they
+are upserted too (identical rows collapse into one document). Progress and
+rows/s are printed per chunk.
+
+Transforms take a whole chunk and live here (module level, so pool workers
+can import them):
+
+    recipes   data.py: lowercased name, image_path from the images JSON,
+              ingredients / instructions split into lists
+    parsed    dataset2.py: TranslatedIngredients parsed into
+              {item, quantity, note} dicts (ingredients.py)
+
+MONGO_URI=mongomock:// loads into an in-process mongomock database, which
+is enough to try a workbook without a mongod (nothing is kept afterwards).
+"""
+import csv
+import hashlib
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from pymongo import ReplaceOne
+
+from .ingredients import parse_ingredients_batch
+
+KEY = "Srno"
+ROW_KEY = "RowKey"   # for rows without a Srno
+CHUNK_SIZE = 1000
+
+
+def connect(uri: str):
+    """Blocking client for offline scripts; mongomock:// needs the mongomock package."""
+    if uri and uri.startswith("mongomock://"):
+        import mongomock
+        return mongomock.MongoClient()
+    from pymongo import MongoClient
+    return MongoClient(uri, serverSelectionTimeoutMS=30000, socketTimeoutMS=30000, connectTimeoutMS=30000)
+
+
+# ---------------- READING ----------------
+def iter_rows(path: str, columns=None):
+    """Yield one dict per data row (header row = keys), streaming the file."""
+    if path.lower().endswith(".csv"):
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            for row in csv.DictReader(f):
+                # Empty cells are None, as openpyxl reads them
+                yield {k: v if v != "" else None for k, v in row.items() if columns is None or k in columns}
+        return
+
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(h).strip() if h is not None else None for h in next(rows, [])]
+        keep = [(i, h) for i, h in enumerate(header) if h and (columns is None or h in columns)]
+        for values in rows:
+            if values is None or all(v is None for v in values):
+                continue
+            yield {h: values[i] if i < len(values) else None for i, h in keep}
+    finally:
+        workbook.close()
+
+def iter_chunks(rows, size: int = CHUNK_SIZE):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# ---------------- TRANSFORMS ----------------
+_images = {}
+
+def _init_worker(images):
+    global _images
+    _images = images
+
+def _split(value, sep: str):
+    if value is None:
+        return []
+    return [part.strip() for part in str(value).split(sep) if part.strip()]
+
+def recipe_document(row: dict) -> dict:
+    doc = dict(row)
+    name = str(doc.get("TranslatedRecipeName") or "").strip().lower()
+    doc["TranslatedRecipeName"] = name
+    doc["image_path"] = _images.get(name)
+    doc["TranslatedIngredients"] = _split(doc.get("TranslatedIngredients"), ",")
+    doc["TranslatedInstructions"] = _split(doc.get("TranslatedInstructions"), ".")
+    return doc
+
+def recipe_documents(chunk):
+    return [recipe_document(row) for row in chunk]
+
+def parsed_documents(chunk):
+    # One batch call per chunk, so fragments repeated across its rows are parsed once
+    raw = [row.get("TranslatedIngredients") or row.get("Ingredients", "") for row in chunk]
+    return [dict(row, TranslatedIngredients=parsed) for row, parsed in zip(chunk, parse_ingredients_batch(raw))]
+
+TRANSFORMS = {"recipes": recipe_documents, "parsed": parsed_documents}
+
+def transform_chunk(name: str, chunk):
+    return TRANSFORMS[name](chunk)
+
+
+# ---------------- WRITING ----------------
+def row_key(doc: dict) -> str:
+    """Deterministic key for a document without a Srno: hash of its name and ingredients."""
+    content = json.dumps([doc.get("TranslatedRecipeName"), doc.get("TranslatedIngredients")],
+                         ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:32]
+
+def upsert_filter(doc: dict) -> dict:
+    if doc.get(KEY) is not None:
+        return {KEY: doc[KEY]}
+    doc[ROW_KEY] = row_key(doc)
+    return {ROW_KEY: doc[ROW_KEY]}
+
+def write_chunk(collection, docs):
+    """Upsert docs on Srno (or RowKey); returns (upserted, modified)."""
+    ops = [(upsert_filter(d), d) for d in docs]
+    if not ops:
+        return 0, 0
+    if type(collection).__module__.startswith("mongomock"):
+        # mongomock's bulk_write does not accept current pymongo ReplaceOne objects
+        upserted = modified = 0
+        for flt, d in ops:
+            result = collection.replace_one(flt, d, upsert=True)
+            upserted += result.upserted_id is not None
+            modified += result.modified_count
+        return upserted, modified
+    result = collection.bulk_write([ReplaceOne(flt, d, upsert=True) for flt, d in ops], ordered=False)
+    return result.upserted_count, result.modified_count
+
+def run(path: str, collection, transform: str, columns=None, images=None,
+        chunk_size: int = CHUNK_SIZE, processes: int = None, prune: bool = False):
+    """
+    Load `path` into `collection`. With prune=True, documents whose Srno
+    (or RowKey) is not in this workbook are deleted afterwards. Returns the
+    totals; `row_keyed` counts rows without a Srno.
+    """
+    collection.create_index(KEY)
+    collection.create_index(ROW_KEY, sparse=True)
+    totals = {"rows": 0, "row_keyed": 0, "upserted": 0, "modified": 0, "deleted": 0}
+    seen, seen_rows = set(), set()
+    start = time.perf_counter()
+
+    def write(docs):
+        upserted, modified = write_chunk(collection, docs)
+        for d in docs:
+            if d.get(KEY) is not None:
+                seen.add(d[KEY])
+            else:
+                seen_rows.add(d[ROW_KEY])
+                totals["row_keyed"] += 1
+        totals["rows"] += len(docs)
+        totals["upserted"] += upserted
+        totals["modified"] += modified
+        rate = totals["rows"] / max(time.perf_counter() - start, 1e-9)
+        print(f"{totals['rows']} rows, {rate:.0f} rows/s "
+              f"(upserted {totals['upserted']}, updated {totals['modified']}, without Srno {totals['row_keyed']})")
+
+    chunks = iter_chunks(iter_rows(path, columns), chunk_size)
+    if processes == 0:
+        _init_worker(images or {})
+        for chunk in chunks:
+            write(transform_chunk(transform, chunk))
+    else:
+        workers = processes or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(images or {},)) as pool:
+            # A few chunks in flight keep the workers busy while the main process
+            # writes, without reading the whole workbook ahead
+            in_flight = deque()
+            for chunk in chunks:
+                in_flight.append(pool.submit(transform_chunk, transform, chunk))
+                if len(in_flight) >= 2 * workers:
+                    write(in_flight.popleft().result())
+            while in_flight:
+                write(in_flight.popleft().result())
+
+    if prune and (seen or seen_rows):
+        totals["deleted"] = collection.delete_many({"$or": [
+            {KEY: {"$exists": True, "$ne": None, "$nin": list(seen)}},
+            {ROW_KEY: {"$exists": True, "$nin": list(seen_rows)}},
+        ]}).deleted_count
+    totals["seconds"] = round(time.perf_counter() - start, 2)
+    return totals
+
+
+def add_arguments(parser, default_path: str):
+    parser.add_argument("path", nargs="?", default=default_path, help=".xlsx or .csv")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--processes", type=int, default=None, help="transform workers (0: in-process)")
+    parser.add_argument("--prune", action="store_true", help="delete documents whose Srno / RowKey is not in the file")
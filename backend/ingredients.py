@@ -0,0 +1,127 @@
+"""
+Ingredient-line parser for the recipe loaders (dataset2.py, ingest.py).
+
+"2 1 / 2 cups Rice - soaked, Salt to taste" becomes
+[{"item": "Rice", "quantity": "2-1/2 cups", "note": "soaked"},
+ {"quantity": "to taste", "item": "Salt"}].
+
+All patterns are compiled once. parse_ingredients_batch() parses a whole
+column and parses each distinct fragment ("Salt to taste", "1 teaspoon
+Mustard seeds", ...) only once per call, which is where most of a workbook
+load's parsing time went.
+
+tests/test_ingredients.py checks both entry points against a golden corpus
+(tests/data/ingredients_golden.json); `python -m tests.bench_ingredients`
+compares their speed with the previous parser.
+"""
+import re
+
+UNITS = {
+    "cup","cups","tablespoon","tablespoons","tbsp","tbsp.","teaspoon","teaspoons","tsp","tsp.","1/2 tablespoon","1/2 tablespoons",
+    "gram","grams","g","gm","kg","kgs","kilogram","kilograms","kl","ml","l","litre","liter","pinch","inch","inches","a pinch",
+    "bunch","clove","cloves","slice","slices","piece","pieces","packet","packets","can","cans","optional","roasting",
+    "stick","sticks","ounce","oz","lb","pound","pkg"
+}
+
+# Checked in this order when a fragment has more than one
+TASTE_PHRASES = ("to taste", "as required", "as per taste")
+
+_SLASH = re.compile(r"\s*/\s*")
+_MIXED = re.compile(r"(\d+)\s+(\d+/\d+)")
+_DASH = re.compile(r"\s*-\s*")
+_QUANTITY = re.compile(r"\d+(?:-\d+/\d+)?|\d+/\d+|\d+(?:\.\d+)?")
+_TASTE = re.compile(r"\b(" + "|".join(TASTE_PHRASES) + r")\b")
+_TASTE_NAME_END = {phrase: re.compile("-|" + phrase, re.I) for phrase in TASTE_PHRASES}
+
+
+def normalize_fraction_string(q: str) -> str:
+    """
+    Normalize mixed fractions anywhere in the string.
+    Example: '2 1 / 2' -> '2-1/2'
+    """
+    if not q:
+        return q
+    s = str(q).strip()
+    if "/" in s:
+        s = _MIXED.sub(r"\1-\2", _SLASH.sub("/", s))
+    if "-" in s:
+        s = _DASH.sub("-", s)
+    return s.strip()
+
+def split_item_and_note(text):
+    """Split item and note at the first dash if present."""
+    if "-" not in text:
+        return text.strip(), ""
+    parts = _DASH.split(text, maxsplit=1)
+    return parts[0].strip(), parts[1].strip()
+
+def _is_empty(value) -> bool:
+    # None, NaN from pandas, or blank
+    return value is None or value != value or str(value).strip() == ""
+
+def parse_fragment(s: str) -> dict:
+    """One comma-separated fragment (already stripped, non-empty) -> {item, quantity?, note?}."""
+    s = normalize_fraction_string(s)
+
+    # "to taste", "as required", "as per taste"
+    lower = s.lower()
+    match = _TASTE.search(lower)
+    if match:
+        phrase = match.group(1)
+        if phrase != TASTE_PHRASES[0]:
+            found = set(_TASTE.findall(lower))
+            phrase = next(p for p in TASTE_PHRASES if p in found)
+        end = _TASTE_NAME_END[phrase].search(s)
+        name = (s[:end.start()] if end else s).strip().strip("- ").strip()
+        return {"quantity": phrase, "item": name}
+
+    # Quantity token, then an optional known unit, then "item - note"
+    tokens = s.split()
+    if _QUANTITY.fullmatch(tokens[0]):
+        qty_display = tokens[0]
+        idx = 1
+        if len(tokens) > 1 and tokens[1].lower().rstrip(".,") in UNITS:
+            qty_display = f"{tokens[0]} {tokens[1]}"
+            idx = 2
+        item_part = " ".join(tokens[idx:])
+        if not item_part:
+            item_part = s[len(qty_display):].strip()
+        item, note = split_item_and_note(item_part)
+        parsed = {"item": item, "quantity": qty_display}
+    else:
+        item, note = split_item_and_note(s)
+        parsed = {"item": item}
+    if note:
+        parsed["note"] = note
+    return parsed
+
+def parse_ingredients(ingredient_str):
+    """Parse ingredients into dicts with only item, quantity, note if present."""
+    if _is_empty(ingredient_str):
+        return []
+    parsed = []
+    for raw in str(ingredient_str).split(","):
+        s = raw.strip()
+        if s:
+            parsed.append(parse_fragment(s))
+    return parsed
+
+def parse_ingredients_batch(values):
+    """parse_ingredients over a whole column; each distinct fragment is parsed once."""
+    seen = {}
+    out = []
+    for value in values:
+        if _is_empty(value):
+            out.append([])
+            continue
+        row = []
+        for raw in str(value).split(","):
+            s = raw.strip()
+            if not s:
+                continue
+            parsed = seen.get(s)
+            if parsed is None:
+                parsed = seen[s] = parse_fragment(s)
+            row.append(dict(parsed))  # rows must not share dicts
+        out.append(row)
+    return out
@@ -1,22 +1,28 @@
 from fastapi import FastAPI, Request, Response, HTTPException,status,Form,UploadFile, File,Depends
-from fastapi.responses import HTMLResponse,FileResponse, JSONResponse, RedirectResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import HTMLResponse,FileResponse, JSONResponse, RedirectResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, EmailStr
-from pymongo import MongoClient
-from passlib.context import CryptContext
+from pymongo.errors import DuplicateKeyError, PyMongoError
 from dotenv import load_dotenv
 from jose import jwt, JWTError
 from datetime import datetime, timedelta
-import os, requests, json, re
+import os, json, threading, time
+from collections import OrderedDict
+import numpy as np
 from rapidfuzz import process, fuzz
-import networkx as nx
 from fastapi.templating import Jinja2Templates
-import requests 
-from sqlalchemy import Column, Integer, String, DateTime, JSON
-from sqlalchemy.orm import Session
-from sqlalchemy.ext.declarative import declarative_base
-Base = declarative_base()
+from .catalog import load_catalog, recipe_is_english, image_filename, recipe_key
+from .http_client import AsyncHTTP, UpstreamBusy, upstream_from_env
+from .ai_cache import MemoryStore, SQLiteStore, ResponseCache
+from .ai_stream import clean_markdown, relay_answer
+from .passwords import PasswordHasher, PasswordQueueFull, make_context
+from .db import Database, connect
+from .facets import FacetIndex
+from .fulltext import load_index
+from .autocomplete import PrefixIndex
+from .history import HistoryStore
+from .thumbnails import read_manifest as read_thumbnail_manifest
+from .assets import PageCache, StaticAssets
 
 load_dotenv()
 MONGO_URI = os.getenv("MONGO_URI")
@@ -35,14 +41,24 @@ COOKIE_SECURE = os.getenv("COOKIE_SECURE", "false").lower() == "true"
 MAX_BCRYPT_LEN = 72  
 origins = os.getenv("FRONTEND_ORIGINS","http://127.0.0.1:8000" ).split(",")
 
-client = MongoClient(MONGO_URI)
-auth_db = client["myapp"]
-users_col = auth_db["users"]
-history_col=auth_db["History"]
+# Async repositories for users, userdata and reviews (see db.py)
+db = Database(connect(MONGO_URI))
 
 
 app = FastAPI(title="Recipe Suggestion + Auth API")
 
+@app.on_event("startup")
+async def create_indexes():
+    await db.ensure_indexes()
+    try:
+        await db.reviews.ensure_stats()
+    except PyMongoError as e:
+        print("Could not seed review stats:", e)
+
+@app.on_event("shutdown")
+def close_db():
+    db.close()
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -52,8 +68,24 @@ app.add_middleware(
 )
 API_KEY = os.getenv("PERPLEXITY_API_KEY")
 MODEL = os.getenv("PERPLEXITY_MODEL", "sonar-medium-chat")  # or sonar, sonar-reasoning etc.
-# ✅ Mount static files
-app.mount("/static", StaticFiles(directory=FRONTEND_DIR), name="static")
+# ✅ Mount static files: strong ETags, precompressed bodies, 304s (see assets.py)
+ASSETS_DEV = os.getenv("ASSETS_DEV", "false").lower() == "true"  # re-read pages when they change
+app.mount("/static", StaticAssets(directory=FRONTEND_DIR), name="static")
+
+# Shared, pooled client for outbound calls (see http_client.py)
+http = AsyncHTTP(
+    [
+        upstream_from_env("perplexity", "PERPLEXITY", "https://api.perplexity.ai/chat/completions",
+                          timeout=60, max_concurrency=20),
+        upstream_from_env("recaptcha", "RECAPTCHA", "https://www.google.com/recaptcha/api/siteverify",
+                          timeout=10, max_concurrency=50),
+    ],
+    max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", 100)),
+)
+
+@app.on_event("shutdown")
+async def close_http_client():
+    await http.aclose()
 
 SYSTEM_PROMPT = (
     "You are CookingHub AI, an expert chef and nutrition assistant. "
@@ -66,11 +98,39 @@ SYSTEM_PROMPT = (
     "\"I can only help with food and cooking questions. Please ask about recipes, ingredients, or cooking.\""
 )
 
-def clean_markdown(text: str) -> str:
-    # Remove markdown symbols but keep structure
-    text = re.sub(r'[*_`#>]+', '', text)   # remove **, ##, ###, etc.
-    text = re.sub(r'\n{3,}', '\n\n', text) # normalize spacing
-    return text.strip()
+# Cache of AI answers (see ai_cache.py). AI_CACHE_BACKEND=sqlite keeps it across restarts.
+AI_CACHE_SIZE = int(os.getenv("AI_CACHE_SIZE", 1000))
+if os.getenv("AI_CACHE_BACKEND", "memory").lower() == "sqlite":
+    ai_cache_store = SQLiteStore(os.getenv("AI_CACHE_PATH", os.path.join(BASE_DIR, "ai_cache.sqlite3")), AI_CACHE_SIZE)
+else:
+    ai_cache_store = MemoryStore(AI_CACHE_SIZE)
+ai_cache = ResponseCache(
+    ai_cache_store,
+    ttl=float(os.getenv("AI_CACHE_TTL", 24 * 3600)),
+    model=MODEL,
+    system_prompt=SYSTEM_PROMPT,
+    fuzzy_threshold=float(os.getenv("AI_CACHE_FUZZY_THRESHOLD", 0)),  # 0 = exact (normalized) matches only
+)
+
+def perplexity_request(prompt: str) -> dict:
+    return {
+        "headers": {
+            "Authorization": f"Bearer {API_KEY}",
+            "Content-Type": "application/json",
+        },
+        "json": {
+            "model": MODEL,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+        },
+    }
+
+def stream_perplexity(prompt: str):
+    request = perplexity_request(prompt)
+    request["json"]["stream"] = True
+    return relay_answer(http, "perplexity", request, ai_cache, prompt)
 
 @app.post("/api/recipe")
 async def ask_perplexity(request: Request):
@@ -80,24 +140,21 @@ async def ask_perplexity(request: Request):
     if not API_KEY:
         return JSONResponse({"error": "Missing Perplexity API key"}, status_code=400)
 
-    try:
-        payload = {
-            "model": MODEL,
-            "messages": [
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": prompt}
-            ],
-        }
-
-        res = requests.post(
-            "https://api.perplexity.ai/chat/completions",
-            headers={
-                "Authorization": f"Bearer {API_KEY}",
-                "Content-Type": "application/json",
-            },
-            json=payload,
+    # Streaming mode: {"stream": true} or Accept: text/event-stream
+    if data.get("stream") or "text/event-stream" in request.headers.get("accept", ""):
+        return StreamingResponse(
+            stream_perplexity(prompt),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
         )
 
+    cached = await ai_cache.aget(prompt)
+    if cached is not None:
+        return {"text": cached}
+
+    try:
+        res = await http.post("perplexity", **perplexity_request(prompt))
+
         if res.status_code != 200:
             return JSONResponse(
                 {
@@ -112,21 +169,27 @@ async def ask_perplexity(request: Request):
         # ✅ Clean markdown formatting
         clean_text = clean_markdown(text)
 
+        await ai_cache.aput(prompt, text)
         return {"text": text or "No response from AI."}
-        
+
+    except UpstreamBusy as e:
+        return JSONResponse({"error": str(e)}, status_code=503)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
-class History(Base):
-    __tablename__ = "history"
-    id = Column(Integer, primary_key=True, index=True)
-    user_email = Column(String, index=True)
-    action_type = Column(String)  # "searched" or "viewed"
-    data = Column(JSON)
-    timestamp = Column(DateTime, default=datetime.utcnow)
-
+# bcrypt runs in a bounded thread pool (see passwords.py). Setting BCRYPT_ROUNDS
+# re-hashes older hashes to that cost on their next successful login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 0)) or None
+pwd_context = make_context(BCRYPT_ROUNDS)
+passwords = PasswordHasher(
+    pwd_context,
+    max_workers=int(os.getenv("PASSWORD_WORKERS", 4)),
+    max_queue=int(os.getenv("PASSWORD_MAX_QUEUE", 0)),
+)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+@app.on_event("shutdown")
+def shutdown_password_pool():
+    passwords.shutdown()
 templates = Jinja2Templates(directory="templates")
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
@@ -145,37 +208,33 @@ def verify_token(token: str):
 
 
 # ---------------- HTML ROUTES ----------------
+# Pages are read once and served from memory, gzip/brotli encoded, with
+# ETags so revisits are answered with 304 (see assets.py)
+pages = PageCache(FRONTEND_DIR, dev=ASSETS_DEV)
+pages.preload(["index.html", "login.html", "dashboard.html", "cuisine.html", "aichat.html",
+               "reviews.html", "profile.html"])
+
+def page_response(request: Request, name: str, missing: str):
+    response = pages.response(request, name)
+    if response is None:
+        raise HTTPException(status_code=404, detail=missing)
+    return response
+
 @app.get("/", response_class=HTMLResponse)
-async def signup_page():
-    path = os.path.join(FRONTEND_DIR, "index.html")
-    if not os.path.exists(path):
-        raise HTTPException(status_code=404, detail="Signup page not found")
-    with open(path, "r", encoding="utf-8") as f:
-        return HTMLResponse(content=f.read())
+async def signup_page(request: Request):
+    return page_response(request, "index.html", "Signup page not found")
 
 @app.get("/login", response_class=HTMLResponse)
-async def login_page():
-    path = os.path.join(FRONTEND_DIR, "login.html")
-    if not os.path.exists(path):
-        raise HTTPException(status_code=404, detail="Login page not found")
-    with open(path, "r", encoding="utf-8") as f:
-        return HTMLResponse(content=f.read())
+async def login_page(request: Request):
+    return page_response(request, "login.html", "Login page not found")
 
 @app.get("/dashboard", response_class=HTMLResponse)
-async def dashboard_page():
-    path = os.path.join(FRONTEND_DIR, "dashboard.html")
-    if not os.path.exists(path):
-        raise HTTPException(status_code=404, detail="Dashboard not found")
-    with open(path, "r", encoding="utf-8") as f:
-        return HTMLResponse(content=f.read())
+async def dashboard_page(request: Request):
+    return page_response(request, "dashboard.html", "Dashboard not found")
     
 @app.get("/cuisine", response_class=HTMLResponse)
-async def cuisine_page():
-    path = os.path.join(FRONTEND_DIR,"cuisine.html")
-    if not os.path.exists(path):
-        raise HTTPException(status_code=404, detail="Cuisine not found")
-    with open(path, "r", encoding="utf-8") as f:
-        return HTMLResponse(content=f.read())
+async def cuisine_page(request: Request):
+    return page_response(request, "cuisine.html", "Cuisine not found")
 
 
 @app.get("/items", response_class=HTMLResponse)
@@ -183,12 +242,9 @@ async def items_page(request: Request, cuisine: str):
     return templates.TemplateResponse("items.html", {"request": request, "cuisine": cuisine})
 
 
-@app.get("/ai", response_class=FileResponse)
-async def open_ai_page():
-    path = os.path.join(FRONTEND_DIR, "aichat.html")
-    if not os.path.exists(path):
-        raise HTTPException(status_code=404, detail="aichat.html not found")
-    return FileResponse(path)
+@app.get("/ai", response_class=HTMLResponse)
+async def open_ai_page(request: Request):
+    return page_response(request, "aichat.html", "aichat.html not found")
 # ---------------- MODELS ----------------
 class SignupModel(BaseModel):
     name: str
@@ -206,16 +262,44 @@ class IngredientsInput(BaseModel):
 class ForgotPasswordRequest(BaseModel):
     email: str
 
-# ============ GLOBAL SEARCH & VIEW HISTORY ============
-search_history = []
-view_history = []
+# ============ SEARCH & VIEW HISTORY ============
+# Per signed-in user only (anonymous actions are not recorded; see get_history).
+# Stored in the capped Mongo `history` collection through a batched background
+# writer and read from per-user ring buffers (history.py)
+HISTORY_LIMIT = int(os.getenv("HISTORY_LIMIT", 10))
+HISTORY_CAP_BYTES = int(os.getenv("HISTORY_CAP_BYTES", 256 * 1024 * 1024))
+history = HistoryStore(
+    db.history,
+    limit=HISTORY_LIMIT,
+    batch_size=int(os.getenv("HISTORY_BATCH_SIZE", 100)),
+    flush_interval=float(os.getenv("HISTORY_FLUSH_INTERVAL", 1.0)),
+    max_pending=int(os.getenv("HISTORY_MAX_PENDING", 10000)),
+    cache_users=int(os.getenv("HISTORY_CACHE_USERS", 1024)),
+    cache_ttl=float(os.getenv("HISTORY_CACHE_TTL", 5.0)),
+)
+
+@app.on_event("startup")
+async def start_history_writer():
+    await db.ensure_history_collection(HISTORY_CAP_BYTES)
+    history.start()
+
+@app.on_event("shutdown")
+async def stop_history_writer():
+    await history.stop()
+
+def history_email(request: Request):
+    """Signed-in user's email, or None (anonymous actions are not recorded)."""
+    payload = verify_token(request.cookies.get("access_token") or "")
+    return payload.get("sub") if payload else None
+
+def history_timestamp() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
 @app.post("/forgot-password")
 async def forgot_password(req: ForgotPasswordRequest):
     try:
         email = req.email.strip().lower()
-        user = users_col.find_one({"email": email})
-        if not user:
+        if not await db.users.exists(email):
             raise HTTPException(status_code=404, detail="User not found")
         
         # Here you would send an actual email (for now we simulate)
@@ -231,28 +315,34 @@ async def signup(data: SignupModel):
         # Verify reCAPTCHA
         if not RECAPTCHA_SECRET:
             raise HTTPException(status_code=500, detail="reCAPTCHA secret not configured")
-        resp = requests.post(
-            "https://www.google.com/recaptcha/api/siteverify",
+        resp = await http.post(
+            "recaptcha",
             data={"secret": RECAPTCHA_SECRET, "response": data.recaptcha}
         )
-        if not resp.ok or not resp.json().get("success"):
+        if not resp.is_success or not resp.json().get("success"):
             raise HTTPException(status_code=400, detail="reCAPTCHA verification failed")
 
         # Check if email exists
-        if users_col.find_one({"email": data.email}):
+        if await db.users.exists(data.email):
             raise HTTPException(status_code=400, detail="Email already exists")
 
         # Hash password
-        hashed_pw = pwd_context.hash(data.password[:MAX_BCRYPT_LEN])
+        hashed_pw = await passwords.hash(data.password[:MAX_BCRYPT_LEN])
 
         # Save user
-        users_col.insert_one({
-            "name": data.name,
-            "email": data.email,
-            "password": hashed_pw,
-            "createdAt": datetime.utcnow()
-        })
+        try:
+            await db.users.create({
+                "name": data.name,
+                "email": data.email,
+                "password": hashed_pw,
+                "createdAt": datetime.utcnow()
+            })
+        except DuplicateKeyError:
+            # Lost a race with a concurrent signup for the same email
+            raise HTTPException(status_code=400, detail="Email already exists")
         return {"message": "Signup successful"}
+    except PasswordQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -260,9 +350,14 @@ async def signup(data: SignupModel):
 @app.post("/login")
 async def login(data: LoginModel, response: Response):
     try:
-        user = users_col.find_one({"email": data.email})
-        if not user or not pwd_context.verify(data.password[:MAX_BCRYPT_LEN], user.get("password", "")):
+        user = await db.users.find_by_email(data.email)
+        if not user:
+            raise HTTPException(status_code=401, detail="Invalid email or password")
+        valid, new_hash = await passwords.verify_and_update(data.password[:MAX_BCRYPT_LEN], user.get("password", ""))
+        if not valid:
             raise HTTPException(status_code=401, detail="Invalid email or password")
+        if new_hash:
+            await db.users.set_password(user["_id"], new_hash)
 
         token = create_access_token({"sub": data.email})
         response.set_cookie(
@@ -275,6 +370,8 @@ async def login(data: LoginModel, response: Response):
             path="/"
         )
         return {"message": "Login successful", "name": user["name"]}
+    except PasswordQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -312,7 +409,7 @@ async def api_dashboard(request: Request):
         raise HTTPException(status_code=401, detail="Session expired, please log in again.")
 
     email = payload.get("sub")
-    user = users_col.find_one({"email": email}, {"password": 0})
+    user = await db.users.find_by_email(email, {"password": 0})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     user["_id"] = str(user["_id"])
@@ -320,115 +417,265 @@ async def api_dashboard(request: Request):
 
 # ---------------- LOAD RECIPE DATA ----------------
 RECIPES_FILE = os.path.join(FRONTEND_DIR, "final_data_updated.recipes.json")
+CATALOG_SNAPSHOT_DIR = os.getenv("CATALOG_SNAPSHOT_DIR", os.path.join(BASE_DIR, ".catalog"))
 if not os.path.exists(RECIPES_FILE):
     raise FileNotFoundError(f"{RECIPES_FILE} not found")
 
-with open(RECIPES_FILE, "r", encoding="utf-8") as f:
-    RECIPES = json.load(f)
+# Loaded from the on-disk snapshot when it matches RECIPES_FILE, otherwise
+# parsed from JSON (and the snapshot rebuilt). See catalog.py.
+catalog = load_catalog(RECIPES_FILE, CATALOG_SNAPSHOT_DIR)
+RECIPES = catalog.recipes
 
-# Build graph
-G = nx.Graph()
-all_ingredients_set = set()
-recipe_info_map = {}
+# A recipe id (rid) is the position of its name in recipe_names (first-seen order)
+recipe_names = catalog.names
+all_ingredients_list = catalog.graph.ingredients
+all_ingredients_set = set(all_ingredients_list)
 
-def preprocess_ingredient(ing):
-    synonyms = re.findall(r'([^\(\)]+)', ing.lower().strip())
-    return [s.strip() for s in synonyms]
+# Catalog positions for O(1) detail lookups by name or by Srno/_id
+recipe_name_index = catalog.name_index
+recipe_id_index = catalog.id_index
 
-for r in RECIPES:
-    recipe_name = r["TranslatedRecipeName"]
-    recipe_info_map[recipe_name] = r
-    G.add_node(recipe_name, type="recipe")
-    main_ings = r.get("main_ingredients", [])
-    for ing in main_ings:
-        for i in preprocess_ingredient(ing):
-            all_ingredients_set.add(i)
-            G.add_node(i, type="ingredient")
-            G.add_edge(recipe_name, i)
 
-all_ingredients_list = list(all_ingredients_set)
+def ranked_recipe_ids(ingredient_ids):
+    """
+    Yield recipe ids by matched ingredient count (descending), ties broken
+    by catalog order. Only recipes sharing an ingredient are visited.
+    """
+    return catalog.graph.ranked_overlap(ingredient_ids)
+
+# ---------------- INGREDIENT CORRECTION ----------------
+CORRECTION_CACHE_SIZE = int(os.getenv("CORRECTION_CACHE_SIZE", 4096))
+
+class LRUCache:
+    """Small thread-safe LRU mapping that counts hits and misses."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+correction_cache = LRUCache(CORRECTION_CACHE_SIZE)
+
+def correct_ingredients(user_ings):
+    """
+    Map each user term to the closest known ingredient (fuzz.WRatio).
+    Known ingredients are returned as-is, repeated terms come from the LRU
+    cache, and the remaining terms are scored together in one cdist call.
+    """
+    terms = [u.lower() for u in user_ings]
+    corrected = {}
+    pending = []
+    for t in terms:
+        if t in corrected:
+            continue
+        if t in all_ingredients_set:
+            # An exact match always scores 100 and wins; skip fuzzy scoring
+            corrected[t] = t
+            continue
+        hit = correction_cache.get(t)
+        if hit is not None:
+            corrected[t] = hit
+        else:
+            corrected[t] = None
+            pending.append(t)
+
+    if len(pending) == 1:
+        match, score, _ = process.extractOne(pending[0], all_ingredients_list, scorer=fuzz.WRatio)
+        corrected[pending[0]] = match
+    elif pending:
+        scores = process.cdist(pending, all_ingredients_list, scorer=fuzz.WRatio, workers=-1)
+        # argmax keeps the first best choice, same tie-break as extractOne
+        for t, best in zip(pending, scores.argmax(axis=1)):
+            corrected[t] = all_ingredients_list[best]
+    for t in pending:
+        correction_cache.put(t, corrected[t])
+
+    return [corrected[t] for t in terms]
 
 def correct_ingredient(user_ing):
-    match, score, _ = process.extractOne(user_ing.lower(), all_ingredients_list, scorer=fuzz.WRatio)
-    return match
+    return correct_ingredients([user_ing])[0]
 
 
-# ---------- Language Detection Helper ----------
-def is_non_english(text: str) -> bool:
-    """Detect Indian-language text using Unicode ranges."""
-    if not text:
-        return False
-    return bool(re.search(r"[\u0900-\u097F\u0980-\u09FF\u0A00-\u0A7F\u0A80-\u0AFF\u0B00-\u0B7F\u0B80-\u0BFF\u0C00-\u0C7F\u0C80-\u0CFF\u0D00-\u0D7F\u0D80-\u0DFF]", text))
+# ---------------- RECIPE ELIGIBILITY ----------------
+# Computed once per recipe id so the request path does no regex work and no
+# filesystem stats. English-ness never changes for a loaded catalog; image
+# presence is refreshed when files are added to recipes_images.
+RECIPE_IMAGES_DIR = os.path.join(FRONTEND_DIR, "recipes_images")
+IMAGE_WATCH_INTERVAL = float(os.getenv("IMAGE_WATCH_INTERVAL", 30))  # seconds, 0 disables
 
-def recipe_is_english(recipe: dict) -> bool:
-    """Return True if recipe title, ingredients, and instructions are all English."""
-    if is_non_english(recipe.get("TranslatedRecipeName", "")):
-        return False
+# Resized JPEG/WebP variants built by python -m backend.thumbnails
+RECIPE_THUMBS_DIR = os.path.join(FRONTEND_DIR, "recipe_thumbs")
+THUMBNAIL_WIDTH = int(os.getenv("THUMBNAIL_WIDTH", 640))  # the JPEG `thumbnail`; `srcset` lists every width
 
-    for ing in recipe.get("TranslatedIngredients", []):
-        if is_non_english(ing):
-            return False
+recipe_english = catalog.english
+recipe_image_urls = []  # recipe id -> "/static/recipes_images/<file>" or None
+recipe_image_variants = []  # recipe id -> {"thumbnail", "srcset"} or None
+image_generation = 0  # bumped on every refresh; part of the detail cache key
+_images_dir_mtime = None
+_thumbs_manifest_mtime = None
 
-    for step in recipe.get("TranslatedInstructions", []):
-        if is_non_english(step):
-            return False
+def _thumbs_mtime():
+    try:
+        return os.stat(os.path.join(RECIPE_THUMBS_DIR, "manifest.json")).st_mtime
+    except OSError:
+        return None
+
+def image_variants(entry):
+    variants = entry.get("variants") if entry else None
+    if not variants:
+        return None
+    card = max((v for v in variants if v["width"] <= THUMBNAIL_WIDTH), key=lambda v: v["width"], default=variants[0])
+    return {
+        "thumbnail": f"/static/recipe_thumbs/{card['jpeg']}",
+        "srcset": ", ".join(f"/static/recipe_thumbs/{v['webp']} {v['width']}w" for v in variants),
+    }
 
-    return True
+def refresh_image_eligibility():
+    """Re-resolve every recipe image with one directory listing."""
+    global recipe_image_urls, recipe_image_variants, image_generation, _images_dir_mtime, _thumbs_manifest_mtime
+    try:
+        _images_dir_mtime = os.stat(RECIPE_IMAGES_DIR).st_mtime
+        present = {os.path.normcase(f) for f in os.listdir(RECIPE_IMAGES_DIR)}
+    except OSError:
+        _images_dir_mtime, present = None, set()
+
+    urls = []
+    for img_filename in catalog.image_files:
+        if not img_filename:
+            found = False
+        elif "/" in img_filename:
+            # Nested path, not covered by the listing
+            found = os.path.isfile(os.path.join(RECIPE_IMAGES_DIR, img_filename))
+        else:
+            found = os.path.normcase(img_filename) in present
+        urls.append(f"/static/recipes_images/{img_filename}" if found else None)
+
+    _thumbs_manifest_mtime = _thumbs_mtime()
+    derived = (read_thumbnail_manifest(RECIPE_THUMBS_DIR) or {}).get("images", {})
+    variants = [image_variants(derived.get(f)) if u else None for f, u in zip(catalog.image_files, urls)]
+
+    # swap in whole lists; readers never see a partial one
+    recipe_image_urls, recipe_image_variants = urls, variants
+    image_generation += 1
+    return sum(u is not None for u in urls)
+
+def _watch_recipe_images():
+    while True:
+        time.sleep(IMAGE_WATCH_INTERVAL)
+        try:
+            mtime = os.stat(RECIPE_IMAGES_DIR).st_mtime
+        except OSError:
+            mtime = None
+        if mtime != _images_dir_mtime or _thumbs_mtime() != _thumbs_manifest_mtime:
+            refresh_image_eligibility()
+
+refresh_image_eligibility()
+
+@app.on_event("startup")
+def start_image_watcher():
+    if IMAGE_WATCH_INTERVAL > 0:
+        threading.Thread(target=_watch_recipe_images, daemon=True, name="image-watcher").start()
+
+@app.post("/api/reload_images")
+def reload_images():
+    with_images = refresh_image_eligibility()
+    with_thumbnails = sum(v is not None for v in recipe_image_variants)
+    return {"recipes": len(recipe_names), "with_images": with_images, "with_thumbnails": with_thumbnails}
+
+# ---------------- INGREDIENT AUTOCOMPLETE ----------------
+AUTOCOMPLETE_MAX_RESULTS = 20
+AUTOCOMPLETE_MAX_QUERY = 100  # characters; longer input cannot name an ingredient anyway
+
+def _english_recipe_counts():
+    """Number of English recipes using each ingredient id."""
+    graph = catalog.graph
+    owners = np.repeat(np.arange(len(all_ingredients_list)), np.diff(graph.ing_indptr))
+    return np.bincount(owners, weights=recipe_english[graph.ing_indices], minlength=len(all_ingredients_list))
+
+ingredient_counts = _english_recipe_counts().astype(np.int64)
+ingredient_prefixes = PrefixIndex(all_ingredients_list, ingredient_counts)
+
+@app.get("/api/ingredients/complete")
+def complete_ingredient(q: str = "", limit: int = 10):
+    ids, fuzzy = ingredient_prefixes.complete(q[:AUTOCOMPLETE_MAX_QUERY], max(1, min(limit, AUTOCOMPLETE_MAX_RESULTS)))
+    return {
+        "query": q,
+        "fuzzy": fuzzy,
+        "suggestions": [{"ingredient": all_ingredients_list[i], "recipes": int(ingredient_counts[i])} for i in ids],
+    }
 
 # ---------------- SUGGEST RECIPES ----------------
 @app.post("/suggest_recipes")
-def get_recipe_suggestions(data: IngredientsInput):
+def get_recipe_suggestions(data: IngredientsInput, request: Request):
     if not data.ingredients:
         return {"message": "Please provide at least one ingredient."}
 
-    corrected_ings = [correct_ingredient(ing) for ing in data.ingredients]
-
-    # ✅ Keep latest 10 searches
-    search_history.append({
-        "ingredients": corrected_ings,
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    })
-    if len(search_history) > 10:
-        search_history.pop(0)
-
-    recipe_scores = []
-    for recipe in [n for n, d in G.nodes(data=True) if d['type'] == 'recipe']:
-        main_ing_neighbors = set(G.neighbors(recipe))
-        matched = main_ing_neighbors & set(corrected_ings)
-        if not matched:
-            continue
+    corrected_ings = correct_ingredients(data.ingredients)
 
-        r = recipe_info_map[recipe]
+    # ✅ Save search for the signed-in user
+    email = history_email(request)
+    if email:
+        history.record(email, "searched", {"ingredients": corrected_ings, "timestamp": history_timestamp()})
 
-        # 🛑 Skip if recipe contains Hindi/Indian text
-        if not recipe_is_english(r):
-            continue
+    query_ids = catalog.graph.lookup(corrected_ings)
 
-        # Check image path
-        img_path = r.get("image_path", "")
-        if not img_path:
-            continue
-        img_filename = os.path.basename(img_path).replace("\\", "/")
-        full_img_path = os.path.join(FRONTEND_DIR, "recipes_images", img_filename)
-        if not os.path.isfile(full_img_path):
+    recipe_scores = []
+    for rid in ranked_recipe_ids(query_ids):
+        # 🛑 Skip if recipe contains Hindi/Indian text or has no image on disk
+        image_url = recipe_image_urls[rid]
+        if not recipe_english[rid] or image_url is None:
             continue
 
-        recipe_scores.append((recipe, matched, img_filename))
-
-    # Sort by number of matched ingredients (descending)
-    recipe_scores.sort(key=lambda x: len(x[1]), reverse=True)
+        recipe_scores.append((rid, catalog.graph.matched(rid, query_ids), image_url))
+        # Candidates arrive best-first, so stop once the page is full
+        if len(recipe_scores) == 9:
+            break
 
     # Prepare results (max 9)
     results = []
-    for recipe_name, matched_set, img_filename in recipe_scores[:9]:
-        r = recipe_info_map[recipe_name]
+    for rid, matched_set, image_url in recipe_scores:
+        r = catalog.record(rid)
         results.append({
             "TranslatedRecipeName": r.get("TranslatedRecipeName"),
             "main_ingredients": r.get("main_ingredients", []),
             "common_ingredients": r.get("common_ingredients", []),
             "matched_ingredients": list(matched_set),
             "matched_count": len(matched_set),
-            "image": f"/static/recipes_images/{img_filename}"
+            "image": image_url,
+            **(recipe_image_variants[rid] or {"thumbnail": image_url, "srcset": None}),
         })
 
     if not results:
@@ -438,56 +685,233 @@ def get_recipe_suggestions(data: IngredientsInput):
 
 
 # ---------------- GET RECIPE DETAILS ----------------
-@app.get("/get_recipe")
-def get_recipe(name: str):
-    normalized_name = name.strip().lower().replace("%20", " ")
-
-    matched_recipe = None
-    for key in recipe_info_map.keys():
-        if key.strip().lower() == normalized_name:
-            matched_recipe = recipe_info_map[key]
-            break
-
-    if not matched_recipe:
-        raise HTTPException(status_code=404, detail=f"Recipe '{name}' not found")
+DETAIL_CACHE_SIZE = int(os.getenv("DETAIL_CACHE_SIZE", 2048))
+detail_cache = LRUCache(DETAIL_CACHE_SIZE)
+
+def recipe_detail_payload(pos: int):
+    """Return the serialized detail body for RECIPES[pos], or None if it is not English."""
+    key = (pos, image_generation)
+    payload = detail_cache.get(key)
+    if payload is None:
+        recipe = RECIPES[pos]
+        if not recipe_is_english(recipe):
+            payload = b""
+        else:
+            img_filename = image_filename(recipe, "default.jpg")
+            # Variants are per rid; a repeated name's other records may carry another image
+            rid = catalog.rid(pos)
+            variants = recipe_image_variants[rid] if catalog.image_files[rid] == img_filename else None
+            payload = json.dumps({
+                "TranslatedRecipeName": recipe.get("TranslatedRecipeName"),
+                "TranslatedIngredients": recipe.get("TranslatedIngredients", []),
+                "TranslatedInstructions": recipe.get("TranslatedInstructions", []),
+                "PrepTimeInMins": recipe.get("PrepTimeInMins", ""),
+                "CookTimeInMins": recipe.get("CookTimeInMins", ""),
+                "Servings": recipe.get("Servings", ""),
+                "Course": recipe.get("Course", ""),
+                "Cuisine": recipe.get("Cuisine", ""),
+                "Diet": recipe.get("Diet", ""),
+                "image": f"/static/recipes_images/{img_filename}",
+                "srcset": (variants or {}).get("srcset"),
+            }, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        detail_cache.put(key, payload)
+    return payload or None
+
+def recipe_detail_response(pos: int, name: str, request: Request):
+    payload = recipe_detail_payload(pos)
 
     # 🛑 Skip non-English recipes
-    if not recipe_is_english(matched_recipe):
+    if payload is None:
         raise HTTPException(status_code=400, detail="Recipe not available in English")
 
     # ✅ Save viewed recipe
-    view_history.append({
-        "recipe_name": matched_recipe.get("TranslatedRecipeName", name),
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    })
-    if len(view_history) > 10:
-        view_history.pop(0)
+    email = history_email(request)
+    if email:
+        history.record(email, "viewed", {
+            "recipe_name": RECIPES[pos].get("TranslatedRecipeName", name),
+            "timestamp": history_timestamp()
+        })
+
+    return Response(content=payload, media_type="application/json")
 
-    img_path = matched_recipe.get("image_path", "default.jpg")
-    img_filename = os.path.basename(img_path).replace("\\", "/")
+@app.get("/get_recipe")
+def get_recipe(name: str, request: Request):
+    normalized_name = name.strip().lower().replace("%20", " ")
+    pos = recipe_name_index.get(normalized_name)
+    if pos is None:
+        raise HTTPException(status_code=404, detail=f"Recipe '{name}' not found")
+    return recipe_detail_response(pos, name, request)
+
+@app.get("/recipes/{recipe_id}")
+def get_recipe_by_id(recipe_id: str, request: Request):
+    """Stable lookup by Srno or Mongo _id."""
+    pos = recipe_id_index.get(recipe_key(recipe_id))
+    if pos is None:
+        raise HTTPException(status_code=404, detail=f"Recipe '{recipe_id}' not found")
+    return recipe_detail_response(pos, recipe_id, request)
+
+# ---------------- CATALOG BROWSING ----------------
+# Cuisine pages and catalog listings are served a page at a time from the
+# facet index, so browsers no longer download the whole catalog. Only
+# English recipes are listed, in catalog order.
+BROWSE_PAGE_SIZE = int(os.getenv("BROWSE_PAGE_SIZE", 24))
+BROWSE_MAX_PAGE_SIZE = int(os.getenv("BROWSE_MAX_PAGE_SIZE", 200))
+DEFAULT_RECIPE_IMAGE = "/static/recipes_images/icon.png"
+DEFAULT_BROWSE_FIELDS = ("id", "name", "image", "thumbnail", "srcset", "cuisine", "course", "diet", "total_time")
+
+def _joined(value):
+    return " ".join(value).strip() if isinstance(value, list) else (value or "").strip()
+
+# Item fields (same names as the old filtered_recipes_by_cuisine.json) -> getter(rid, record)
+BROWSE_FIELDS = {
+    "id": lambda rid, r: recipe_key(r.get("Srno", r.get("_id", ""))),
+    "name": lambda rid, r: _joined(r.get("TranslatedRecipeName", "")),
+    "instructions": lambda rid, r: _joined(r.get("TranslatedInstructions", "")),
+    "ingredients": lambda rid, r: _joined(r.get("TranslatedIngredients", "")),
+    "cook_time": lambda rid, r: r.get("CookTimeInMins", ""),
+    "prep_time": lambda rid, r: r.get("PrepTimeInMins", ""),
+    "total_time": lambda rid, r: r.get("TotalTimeInMins", ""),
+    "servings": lambda rid, r: r.get("Servings", ""),
+    "course": lambda rid, r: r.get("Course", ""),
+    "cuisine": lambda rid, r: r.get("Cuisine", ""),
+    "diet": lambda rid, r: r.get("Diet", ""),
+    "image": lambda rid, r: recipe_image_urls[rid] or DEFAULT_RECIPE_IMAGE,
+    "thumbnail": lambda rid, r: (recipe_image_variants[rid] or {}).get("thumbnail") or recipe_image_urls[rid] or DEFAULT_RECIPE_IMAGE,
+    "srcset": lambda rid, r: (recipe_image_variants[rid] or {}).get("srcset"),
+}
+
+# Facet bitsets + time range indexes over English recipes (see facets.py)
+facet_index = FacetIndex(catalog.facets, catalog.times, np.flatnonzero(recipe_english))
+lowercase_names = [n.lower() for n in recipe_names]
+
+def split_values(value: str):
+    """"Vegetarian,Eggetarian" -> ["Vegetarian", "Eggetarian"] (either one matches)."""
+    return [v for v in (value or "").split(",") if v.strip()]
+
+def find_recipes(cuisine: str = None, course: str = None, diet: str = None, max_prep_time: float = None,
+                 max_cook_time: float = None, max_total_time: float = None, q: str = None, counts: bool = True):
+    """Return (ascending rids, facet counts) for the browse filters."""
+    within = None
+    if q and q.strip():
+        needle = q.strip().lower()
+        within = [rid for rid, name in enumerate(lowercase_names) if needle in name]
+    return facet_index.search(
+        filters={"Cuisine": split_values(cuisine), "Course": split_values(course), "Diet": split_values(diet)},
+        ranges={
+            "PrepTimeInMins": (None, max_prep_time),
+            "CookTimeInMins": (None, max_cook_time),
+            "TotalTimeInMins": (None, max_total_time),
+        },
+        within=within,
+        counts=counts,
+    )
 
+def parse_fields(fields: str):
+    if not fields:
+        return DEFAULT_BROWSE_FIELDS
+    selected = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in selected if f not in BROWSE_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return selected
+
+def browse_page(rids, offset: int, limit: int, fields: str, counts: dict = None):
+    selected = parse_fields(fields)
+    limit = max(1, min(limit, BROWSE_MAX_PAGE_SIZE))
+    offset = max(0, offset)
+    items = []
+    for rid in rids[offset:offset + limit].tolist():
+        r = catalog.record(rid)
+        items.append({f: BROWSE_FIELDS[f](rid, r) for f in selected})
+    page = {"total": len(rids), "offset": offset, "limit": limit, "recipes": items}
+    if counts is not None:
+        page["facets"] = {field.lower(): values for field, values in counts.items()}
+    return page
+
+@app.get("/api/cuisines")
+def list_cuisines():
+    cuisines = [{"name": c["value"], "count": c["count"]}
+                for c in facet_index.counts("Cuisine", facet_index.universe)]
+    return {"cuisines": sorted(cuisines, key=lambda c: c["name"].lower())}
+
+@app.get("/api/cuisines/{name}/recipes")
+def list_cuisine_recipes(name: str, course: str = None, diet: str = None, max_prep_time: float = None,
+                         max_cook_time: float = None, max_total_time: float = None, q: str = None,
+                         offset: int = 0, limit: int = BROWSE_PAGE_SIZE, fields: str = None, facets: bool = True):
+    if name.strip().lower() not in facet_index.lookup["Cuisine"]:
+        raise HTTPException(status_code=404, detail=f"Cuisine '{name}' not found")
+    rids, counts = find_recipes(name.strip(), course, diet, max_prep_time, max_cook_time, max_total_time, q,
+                                counts=facets)
+    return browse_page(rids, offset, limit, fields, counts)
+
+@app.get("/api/recipes")
+def list_recipes(cuisine: str = None, course: str = None, diet: str = None, max_prep_time: float = None,
+                 max_cook_time: float = None, max_total_time: float = None, q: str = None,
+                 offset: int = 0, limit: int = BROWSE_PAGE_SIZE, fields: str = None, facets: bool = True):
+    """
+    Browse with facet filters; comma-separated values within one filter are
+    alternatives, e.g. ?cuisine=South Indian Recipes&diet=Vegetarian&course=Dinner&max_total_time=30
+    """
+    rids, counts = find_recipes(cuisine, course, diet, max_prep_time, max_cook_time, max_total_time, q,
+                                counts=facets)
+    return browse_page(rids, offset, limit, fields, counts)
+
+# ---------------- FULL-TEXT SEARCH ----------------
+# BM25 over names, ingredients and instructions (see fulltext.py); built
+# with the catalog and reused until the recipe file changes.
+SEARCH_INDEX_DIR = os.getenv("SEARCH_INDEX_DIR", os.path.join(BASE_DIR, ".search"))
+SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", 50))
+search_index = load_index(catalog, catalog.source_hash, SEARCH_INDEX_DIR)
+
+@app.get("/api/search")
+def search_recipes(q: str, limit: int = 10, cuisine: str = None, course: str = None, diet: str = None,
+                   max_total_time: float = None, fields: str = None):
+    """Ranked recipe search; facet filters narrow the candidates before ranking."""
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Query must not be empty")
+    selected = parse_fields(fields)
+    rids, _ = find_recipes(cuisine, course, diet, max_total_time=max_total_time, counts=False)
+    allowed = np.zeros(len(recipe_names), dtype=bool)
+    allowed[rids] = True
+
+    hits, total = search_index.search(q, max(1, min(limit, SEARCH_MAX_RESULTS)), allowed)
+    results = []
+    for rid, score in hits:
+        r = catalog.record(rid)
+        item = {f: BROWSE_FIELDS[f](rid, r) for f in selected}
+        item["score"] = round(score, 4)
+        results.append(item)
+    return {"query": q, "total": total, "results": results}
+
+@app.get("/api/stats")
+def get_stats():
     return {
-        "TranslatedRecipeName": matched_recipe.get("TranslatedRecipeName"),
-        "TranslatedIngredients": matched_recipe.get("TranslatedIngredients", []),
-        "TranslatedInstructions": matched_recipe.get("TranslatedInstructions", []),
-        "PrepTimeInMins": matched_recipe.get("PrepTimeInMins", ""),
-        "CookTimeInMins": matched_recipe.get("CookTimeInMins", ""),
-        "Servings": matched_recipe.get("Servings", ""),
-        "Course": matched_recipe.get("Course", ""),
-        "Cuisine": matched_recipe.get("Cuisine", ""),
-        "Diet": matched_recipe.get("Diet", ""),
-        "image": f"/static/recipes_images/{img_filename}"
+        "corrections": correction_cache.stats(),
+        "recipe_details": detail_cache.stats(),
+        "ai_responses": ai_cache.stats(),
+        "passwords": passwords.stats(),
+        "history": history.stats(),
     }
 
 @app.get("/get_history")
-def get_history():
-    return {
-        "searched": search_history[::-1],  # latest first
-        "viewed": view_history[::-1]
-    }
+async def get_history(request: Request):
+    """
+    The signed-in user's latest searches and views, newest first.
 
+    History is only kept for signed-in users. Anonymous searches and views
+    are not recorded (this used to be one process-wide list shared by every
+    visitor), so without a session the lists are empty and "recorded" is false.
+    """
+    email = history_email(request)
+    if not email:
+        return {"searched": [], "viewed": [], "recorded": False}
+    try:
+        return {**await history.get(email), "recorded": True}  # latest first
+    except PyMongoError as e:
+        # History is a convenience; an unreachable collection must not break the page
+        print(f"⚠️ History unavailable for {email}: {e}")
+        return {"searched": [], "viewed": [], "recorded": True}
 
-reviews_col = auth_db["reviews"]
 
 # ---------------- REVIEW MODEL ----------------
 class Review(BaseModel):
@@ -497,38 +921,67 @@ class Review(BaseModel):
     review: str
 
 @app.get("/reviews", response_class=HTMLResponse)
-async def reviews_page():
+async def reviews_page(request: Request):
     """
     Serves the main reviews UI (reviews.html)
     """
-    path = os.path.join(FRONTEND_DIR, "reviews.html")
-    if not os.path.isfile(path):
-        raise HTTPException(status_code=404, detail="reviews.html not found")
-    return FileResponse(path)
+    return page_response(request, "reviews.html", "reviews.html not found")
+
+# ---------------- REVIEWS API ----------------
+REVIEWS_PAGE_SIZE = 20
+REVIEWS_CACHE_TTL = float(os.getenv("REVIEWS_CACHE_TTL", 5))  # seconds
+first_page_cache = {}  # limit -> (cached_at, body); this worker's copy, cleared on its inserts
+
+def decode_review_cursor(cursor: str):
+    try:
+        return db.reviews.parse_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def serialize_review(r: dict) -> dict:
+    r["_id"] = str(r["_id"])
+    if isinstance(r.get("createdAt"), datetime):
+        r["createdAt"] = r["createdAt"].isoformat()
+    return r
 
-# GET all reviews
+# GET reviews, newest first, one page at a time
 @app.get("/api/reviews")
-def get_reviews():
-    reviews = list(reviews_col.find().sort("createdAt",-1))
-    for r in reviews:
-        r["_id"]=str(r["_id"])
-        if isinstance(r.get("createdAt"), datetime):
-            r["createdAt"]=r["createdAt"].isoformat()
-    return reviews
+async def get_reviews(limit: int = REVIEWS_PAGE_SIZE, cursor: str = None):
+    """
+    The first page (with the rating stats) is cached per worker for
+    REVIEWS_CACHE_TTL seconds. A worker clears its copy when it stores a
+    review, but other workers may serve the previous first page until
+    their copy expires.
+    """
+    limit = max(1, min(limit, 100))
+    if cursor is None:
+        cached = first_page_cache.get(limit)
+        if cached and time.monotonic() - cached[0] < REVIEWS_CACHE_TTL:
+            return cached[1]
+
+    reviews = await db.reviews.page(limit, decode_review_cursor(cursor) if cursor else None)
+    next_cursor = db.reviews.cursor(reviews[-1]) if len(reviews) == limit else None
+    body = {"reviews": [serialize_review(r) for r in reviews], "next_cursor": next_cursor}
+
+    if cursor is None:
+        # Aggregates ride along with the first page
+        body["stats"] = await db.reviews.stats()
+        first_page_cache[limit] = (time.monotonic(), body)
+    return body
 
 # POST new review
 @app.post("/api/reviews")
-def post_review(r: Review):
+async def post_review(r: Review):
     if r.rating<1 or r.rating>5:
         raise HTTPException(status_code=400, detail="Rating must be 1-5")
     data=r.dict()
     data["createdAt"]=datetime.utcnow()
-    res=reviews_col.insert_one(data)
+    res=await db.reviews.insert(data)
+    first_page_cache.clear()
     return {"status":"success","id":str(res.inserted_id)}
 # ==============================
 # 📦 USER DATA COLLECTION
 # ==============================
-userdata_col = auth_db["userdata"]
 
 class UserData(BaseModel):
     name: str
@@ -542,11 +995,8 @@ class UserData(BaseModel):
 
 # ---------------- PROFILE PAGE ----------------
 @app.get("/profile", response_class=HTMLResponse)
-async def profile_page():
-    path = os.path.join(FRONTEND_DIR, "profile.html")
-    if not os.path.isfile(path):
-        raise HTTPException(status_code=404, detail="profile.html not found")
-    return FileResponse(path)
+async def profile_page(request: Request):
+    return page_response(request, "profile.html", "profile.html not found")
 
 
 # ---------------- FETCH USER PROFILE ----------------
@@ -563,12 +1013,12 @@ async def get_user_profile(request: Request):
     email = payload.get("sub")
 
     # Base user info
-    user = users_col.find_one({"email": email}, {"_id": 0, "password": 0})
+    user = await db.users.find_by_email(email, {"_id": 0, "password": 0})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
     # Extended data
-    userdata = userdata_col.find_one({"email": email}, {"_id": 0}) or {}
+    userdata = await db.userdata.get(email, {"_id": 0}) or {}
 
     return {
         "name": user.get("name", ""),
@@ -599,7 +1049,7 @@ async def upload_profile_pic(request: Request, file: UploadFile = File(...)):
         f.write(await file.read())
 
     file_url = "/" + file_path.replace("\\", "/")
-    userdata_col.update_one({"email": email}, {"$set": {"profilePic": file_url}}, upsert=True)
+    await db.userdata.set_fields(email, {"profilePic": file_url})
     return {"success": True, "profilePic": file_url}
 
 
@@ -612,11 +1062,7 @@ async def add_favorite(request: Request, title: str = Form(...), image: str = Fo
         raise HTTPException(status_code=401, detail="Unauthorized")
 
     email = payload.get("sub")
-    userdata_col.update_one(
-        {"email": email},
-        {"$addToSet": {"favorites": {"title": title, "image": image}}},
-        upsert=True
-    )
+    await db.userdata.add_favorite(email, {"title": title, "image": image})
     return {"success": True, "message": "Added to favorites"}
 
 
@@ -628,10 +1074,7 @@ async def remove_favorite(request: Request, title: str = Form(...)):
         raise HTTPException(status_code=401, detail="Unauthorized")
 
     email = payload.get("sub")
-    userdata_col.update_one(
-        {"email": email},
-        {"$pull": {"favorites": {"title": title}}}
-    )
+    await db.userdata.remove_favorite(email, title)
     return {"success": True, "message": "Removed from favorites"}
 
 
@@ -643,7 +1086,7 @@ async def get_favorites(request: Request):
         raise HTTPException(status_code=401, detail="Unauthorized")
 
     email = payload.get("sub")
-    user = userdata_col.find_one({"email": email}, {"_id": 0, "favorites": 1})
+    user = await db.userdata.get(email, {"_id": 0, "favorites": 1})
     favorites = user.get("favorites", []) if user else []
     return {"favorites": favorites}
 
@@ -657,11 +1100,7 @@ async def add_activity(request: Request, activity: str = Form(...)):
         raise HTTPException(status_code=401, detail="Unauthorized")
 
     email = payload.get("sub")
-    userdata_col.update_one(
-        {"email": email},
-        {"$push": {"activity": {"$each": [activity], "$position": 0}}},
-        upsert=True
-    )
+    await db.userdata.push_activity(email, activity)
     return {"success": True, "message": "Activity added"}
 
 
@@ -673,7 +1112,7 @@ async def clear_activity(request: Request):
         raise HTTPException(status_code=401, detail="Unauthorized")
 
     email = payload.get("sub")
-    userdata_col.update_one({"email": email}, {"$set": {"activity": []}})
+    await db.userdata.set_fields(email, {"activity": []}, upsert=False)
     return {"success": True, "message": "Activity cleared"}
 
 
@@ -686,5 +1125,5 @@ async def update_address(request: Request, address: str = Form(...)):
         raise HTTPException(status_code=401, detail="Unauthorized")
 
     email = payload.get("sub")
-    userdata_col.update_one({"email": email}, {"$set": {"address": address}}, upsert=True)
+    await db.userdata.set_fields(email, {"address": address})
     return {"success": True, "message": "Address updated"}
@@ -0,0 +1,92 @@
+"""
+Password hashing off the event loop.
+
+bcrypt is deliberately slow (tens to hundreds of ms per call), so login and
+signup run it in a small thread pool; bcrypt releases the GIL while it works.
+A semaphore caps concurrent hashes at the pool size and the number of
+callers waiting for a slot is tracked, so a login burst shows up as queue
+depth instead of a frozen worker. With max_queue set, callers beyond it are
+turned away straight away.
+
+When BCRYPT_ROUNDS is set, hashes with a different cost are transparently
+re-hashed to it after a successful login (passlib's verify_and_update).
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+
+class PasswordQueueFull(Exception):
+    """Too many password operations are already waiting."""
+
+
+def make_context(rounds: int = None) -> CryptContext:
+    if not rounds:
+        return CryptContext(schemes=["bcrypt"], deprecated="auto")
+    # min == max == default makes needs_update() flag any other cost factor
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+class PasswordHasher:
+    def __init__(self, context: CryptContext, max_workers: int = 4, max_queue: int = 0):
+        self.context = context
+        self.max_workers = max_workers
+        self.max_queue = max_queue  # 0 = unbounded
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._slots = asyncio.Semaphore(max_workers)
+        self.running = 0
+        self.waiting = 0
+        self.peak_waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+
+    async def _run(self, fn, *args):
+        if self.max_queue and self._slots.locked() and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise PasswordQueueFull("Too many login attempts in progress, please retry")
+        self.waiting += 1
+        self.peak_waiting = max(self.peak_waiting, self.waiting)
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed: str):
+        """Return (valid, new_hash); new_hash is set when the stored hash should be replaced."""
+        valid, new_hash = await self._run(self.context.verify_and_update, password, hashed)
+        if new_hash:
+            self.rehashed += 1
+        return valid, new_hash
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "running": self.running,
+            "waiting": self.waiting,
+            "peak_waiting": self.peak_waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
@@ -0,0 +1,218 @@
+"""
+Compact bipartite recipe–ingredient graph.
+
+Recipes and ingredients are plain integer ids. Edges are stored twice as CSR
+(offset/index) NumPy arrays, ingredient -> recipes and recipe -> ingredients,
+instead of networkx's dict-of-dicts nodes. That is a few bytes per edge and
+neighbour lists come back as array slices.
+
+Compare against the old networkx build with:
+    python -m backend.recipe_graph [path/to/recipes.json]
+"""
+import json
+import os
+import sys
+
+import numpy as np
+
+
+def _csr(rows):
+    """Build (indptr, indices) from a list of iterables of ints."""
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(r) for r in rows])
+    indices = np.fromiter((c for r in rows for c in r), dtype=np.int32, count=int(indptr[-1]))
+    return indptr, indices
+
+
+class RecipeGraph:
+    """Integer-id bipartite graph with CSR adjacency in both directions."""
+
+    def __init__(self, ingredients, ing_indptr, ing_indices, rec_indptr, rec_indices):
+        self.ingredients = ingredients
+        self.ingredient_ids = {ing: i for i, ing in enumerate(ingredients)}
+        self.ing_indptr = ing_indptr      # ingredient id -> slice of recipe ids
+        self.ing_indices = ing_indices
+        self.rec_indptr = rec_indptr      # recipe id -> slice of ingredient ids
+        self.rec_indices = rec_indices
+
+    @classmethod
+    def from_adjacency(cls, recipe_ingredients):
+        """
+        recipe_ingredients[rid] is an iterable of ingredient names for that
+        recipe. Ingredient ids follow sorted name order.
+        """
+        ingredients = sorted({i for ings in recipe_ingredients for i in ings})
+        ids = {ing: i for i, ing in enumerate(ingredients)}
+
+        by_recipe = [sorted({ids[i] for i in ings}) for ings in recipe_ingredients]
+        by_ingredient = [[] for _ in ingredients]
+        for rid, ing_ids in enumerate(by_recipe):
+            for i in ing_ids:
+                by_ingredient[i].append(rid)  # rids ascend, so lists stay sorted
+
+        return cls(ingredients, *_csr(by_ingredient), *_csr(by_recipe))
+
+    @property
+    def num_recipes(self) -> int:
+        return len(self.rec_indptr) - 1
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.rec_indices)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.ing_indptr, self.ing_indices, self.rec_indptr, self.rec_indices))
+
+    # -------- neighbour queries --------
+    def recipes_with(self, ingredient_id: int):
+        return self.ing_indices[self.ing_indptr[ingredient_id]:self.ing_indptr[ingredient_id + 1]]
+
+    def ingredients_of(self, rid: int):
+        return self.rec_indices[self.rec_indptr[rid]:self.rec_indptr[rid + 1]]
+
+    def ingredient_names(self, rid: int):
+        return [self.ingredients[i] for i in self.ingredients_of(rid)]
+
+    def lookup(self, names):
+        """Ids of the known ingredients among `names` (unknown ones dropped)."""
+        ids = {self.ingredient_ids.get(n) for n in names}
+        ids.discard(None)
+        return np.fromiter(sorted(ids), dtype=np.int32, count=len(ids))
+
+    # -------- overlap queries --------
+    def overlap_counts(self, ingredient_ids):
+        """Return (rids, counts) of every recipe sharing an ingredient with the query."""
+        if len(ingredient_ids) == 0:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int64)
+        hits = np.concatenate([self.recipes_with(i) for i in ingredient_ids])
+        counts = np.bincount(hits, minlength=self.num_recipes)
+        rids = np.flatnonzero(counts)
+        return rids, counts[rids]
+
+    def ranked_overlap(self, ingredient_ids):
+        """
+        Yield recipe ids by overlap count (descending), ties in rid order.
+        Works one count level at a time, so stopping early skips the rest.
+        """
+        rids, counts = self.overlap_counts(ingredient_ids)
+        for level in np.unique(counts)[::-1]:
+            for rid in rids[counts == level].tolist():
+                yield rid
+
+    def matched(self, rid: int, ingredient_ids):
+        """Names of the query ingredients that recipe `rid` uses."""
+        common = np.intersect1d(self.ingredients_of(rid), ingredient_ids, assume_unique=True)
+        return {self.ingredients[i] for i in common}
+
+    # -------- persistence --------
+    def save(self, path: str):
+        np.save(os.path.join(path, "ing_indptr.npy"), self.ing_indptr)
+        np.save(os.path.join(path, "ing_indices.npy"), self.ing_indices)
+        np.save(os.path.join(path, "rec_indptr.npy"), self.rec_indptr)
+        np.save(os.path.join(path, "rec_indices.npy"), self.rec_indices)
+        with open(os.path.join(path, "ingredients.json"), "w", encoding="utf-8") as f:
+            json.dump(self.ingredients, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str, mmap_mode="r"):
+        def array(name):
+            return np.load(os.path.join(path, name), mmap_mode=mmap_mode)
+
+        with open(os.path.join(path, "ingredients.json"), "r", encoding="utf-8") as f:
+            ingredients = json.load(f)
+        return cls(ingredients, array("ing_indptr.npy"), array("ing_indices.npy"),
+                   array("rec_indptr.npy"), array("rec_indices.npy"))
+
+
+# ---------------- BENCHMARK ----------------
+def _benchmark(recipes_file: str, queries: int = 500):
+    import random
+    import time
+    import tracemalloc
+
+    import networkx as nx
+
+    from .catalog import preprocess_ingredient
+
+    with open(recipes_file, "r", encoding="utf-8") as f:
+        recipes = json.load(f)
+
+    def build_networkx():
+        G = nx.Graph()
+        for r in recipes:
+            G.add_node(r["TranslatedRecipeName"], type="recipe")
+            for ing in r.get("main_ingredients", []):
+                for i in preprocess_ingredient(ing):
+                    G.add_node(i, type="ingredient")
+                    G.add_edge(r["TranslatedRecipeName"], i)
+        return G
+
+    def build_csr():
+        rids, adjacency = {}, []
+        for r in recipes:
+            rid = rids.setdefault(r["TranslatedRecipeName"], len(rids))
+            if rid == len(adjacency):
+                adjacency.append(set())
+            for ing in r.get("main_ingredients", []):
+                adjacency[rid].update(preprocess_ingredient(ing))
+        return list(rids), RecipeGraph.from_adjacency(adjacency)
+
+    def measure(build):
+        tracemalloc.start()
+        start = time.perf_counter()
+        built = build()
+        elapsed = time.perf_counter() - start
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return built, elapsed, size
+
+    G, nx_build, nx_mem = measure(build_networkx)
+    (names, graph), csr_build, csr_mem = measure(build_csr)
+
+    rng = random.Random(0)
+    vocab = graph.ingredients
+    workload = [rng.sample(vocab, min(len(vocab), rng.randint(1, 4))) for _ in range(queries)]
+
+    def nx_query(q):
+        wanted = set(q)
+        scores = []
+        for recipe in [n for n, d in G.nodes(data=True) if d["type"] == "recipe"]:
+            matched = set(G.neighbors(recipe)) & wanted
+            if matched:
+                scores.append((recipe, matched))
+        scores.sort(key=lambda x: len(x[1]), reverse=True)
+        return [name for name, _ in scores[:9]]
+
+    def csr_query(q):
+        ids = graph.lookup(q)
+        out = []
+        for rid in graph.ranked_overlap(ids):
+            out.append(names[rid])
+            if len(out) == 9:
+                break
+        return out
+
+    def latencies(fn):
+        samples = []
+        for q in workload:
+            start = time.perf_counter()
+            fn(q)
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        return samples[len(samples) // 2], samples[int(len(samples) * 0.99) - 1]
+
+    mismatches = sum(nx_query(q) != csr_query(q) for q in workload[:50])
+    nx_p50, nx_p99 = latencies(nx_query)
+    csr_p50, csr_p99 = latencies(csr_query)
+
+    print(f"{graph.num_recipes} recipes, {len(vocab)} ingredients, {graph.num_edges} edges")
+    print(f"{'':10}{'build s':>10}{'memory MB':>12}{'p50 ms':>10}{'p99 ms':>10}")
+    print(f"{'networkx':10}{nx_build:>10.3f}{nx_mem / 2**20:>12.2f}{nx_p50:>10.3f}{nx_p99:>10.3f}")
+    print(f"{'csr':10}{csr_build:>10.3f}{csr_mem / 2**20:>12.2f}{csr_p50:>10.3f}{csr_p99:>10.3f}")
+    print(f"csr arrays alone: {graph.nbytes / 2**20:.2f} MB; top-9 mismatches in 50 queries: {mismatches}")
+
+
+if __name__ == "__main__":
+    from .catalog import DEFAULT_RECIPES_FILE
+    _benchmark(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_RECIPES_FILE)
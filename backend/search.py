@@ -1,106 +1,130 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from typing import List, Union
-import json, re
-from rapidfuzz import fuzz, process
-from sentence_transformers import SentenceTransformer, util
+import json, os, threading
+import numpy as np
 from spellchecker import SpellChecker
+from .embeddings import DEFAULT_RECIPES_FILE, QueryEncoder, load_embeddings, load_model
+from .ann import IVFIndex
+from .word_index import WordIndex, normalize_word, top_ids
 
 app = FastAPI(title="Hybrid Recipe Suggestion API")
 
-with open(r"C:\Users\tirum\OneDrive\Desktop\AIRecipes\separted_ing.json", "r", encoding="utf-8") as f:
-    RECIPES = json.load(f)
+RECIPES_FILE = DEFAULT_RECIPES_FILE
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", 1024))
 
-model = SentenceTransformer('all-MiniLM-L6-v2')
+with open(RECIPES_FILE, "r", encoding="utf-8") as f:
+    RECIPES = json.load(f)
 
-for r in RECIPES:
-    main_text = " ".join(r.get("main_ingredients", []))
-    r["embedding"] = model.encode(main_text)
+model = load_model()
+
+# Normalized float32 matrix, one row per recipe, memory-mapped from the
+# artifact built by `python -m backend.embeddings` (see embeddings.py)
+EMBEDDINGS = load_embeddings(RECIPES_FILE, len(RECIPES), model=model)
+query_encoder = QueryEncoder(model, QUERY_CACHE_SIZE)
+
+# Optional IVF index for ?approximate=true (see ann.py; benchmark with python -m backend.ann).
+# Built on the first approximate query, so workers that never get one pay nothing.
+ANN_ENABLED = os.getenv("ANN_ENABLED", "true").lower() == "true"
+ANN_NPROBE = int(os.getenv("ANN_NPROBE", 8))
+ANN_CANDIDATES = int(os.getenv("ANN_CANDIDATES", 200))  # semantic candidates re-ranked per query
+ann_index = None
+_ann_lock = threading.Lock()
+
+def get_ann_index():
+    global ann_index
+    if ann_index is None and ANN_ENABLED and len(RECIPES):
+        with _ann_lock:
+            if ann_index is None:
+                ann_index = IVFIndex.build(EMBEDDINGS, nprobe=ANN_NPROBE)
+    return ann_index
 
 spell = SpellChecker()
-def normalize_word(word: str) -> str:
-    w = word.strip().lower()
-    w = re.sub(r"[^a-z0-9\s()]", "", w)
-    if w.endswith("es"):
-        w = w[:-2]
-    elif w.endswith("s"):
-        w = w[:-1]
-    return w
-
-def extract_all_words(text: str):
-    """Return normalized words including bracketed words"""
-    words = []
-    normalized = normalize_word(text)
-    words.append(normalized)
-
-    no_brackets = re.sub(r"\(.*?\)", "", normalized).strip()
-    if no_brackets != normalized:
-        words.append(no_brackets)
-
-    bracket_match = re.findall(r"\((.*?)\)", text)
-    for m in bracket_match:
-        words.append(normalize_word(m))
-    return set(words)
+
+# Ingredient words per recipe, matched against user terms (see word_index.py)
+word_index = WordIndex.from_recipes(RECIPES)
+
+MAIN_INGREDIENT_COUNTS = np.array([max(len(r.get("main_ingredients", [])), 1) for r in RECIPES], dtype=np.float32)
 
 def correct_terms(terms):
     """Auto-correct user input using spellchecker"""
     corrected = []
     for t in terms:
         t_lower = t.lower()
-        c = spell.correction(t_lower)  
+        c = spell.correction(t_lower)
         corrected.append(c)
     return corrected
 
-def fuzzy_match_count(recipe, user_terms, threshold=80):
-    """Count how many user terms match recipe ingredients (including bracket words)"""
-    all_ingredients = recipe.get("main_ingredients", [])
-    all_words = set()
-    for ing in all_ingredients:
-        all_words.update(extract_all_words(ing))
-
-    matched_terms = set()
-    for term in user_terms:
-        match_tuple = process.extractOne(term, all_words, scorer=fuzz.ratio)
-        if match_tuple:
-            match_word, score, _ = match_tuple
-            if score >= threshold:
-                matched_terms.add(term)
-    return len(matched_terms)
-
 class IngredientsInput(BaseModel):
     ingredients: Union[List[str], str]
 
-@app.post("/recipes/suggestions_hybrid")
-def recipe_suggestions_hybrid(payload: IngredientsInput, top_n: int = 5):
-    if isinstance(payload.ingredients, str):
-        raw_terms = [x.strip() for x in payload.ingredients.split(",") if x.strip()]
-        user_input_text = " ".join(raw_terms)
+class BatchIngredientsInput(BaseModel):
+    queries: List[Union[List[str], str]]
+
+def parse_terms(ingredients):
+    if isinstance(ingredients, str):
+        raw_terms = [x.strip() for x in ingredients.split(",") if x.strip()]
     else:
-        raw_terms = [x.strip() for x in payload.ingredients if x.strip()]
-        user_input_text = " ".join(raw_terms)
-
-    corrected_terms = correct_terms(raw_terms)
-    user_terms = list(set(normalize_word(term) for term in corrected_terms))
-    
-    user_emb = model.encode(user_input_text)
-    scored_recipes = []
-    for r in RECIPES:
-        emb_score = float(util.cos_sim(user_emb, r["embedding"])[0][0].item())
-        fuzzy_count = fuzzy_match_count(r, user_terms)
-        max_main_ing = max(len(r.get("main_ingredients", [])), 1)
-        fuzzy_score = fuzzy_count / max_main_ing
-        combined_score = 0.7 * emb_score + 0.3 * fuzzy_score
-
-        if combined_score > 0:
-            scored_recipes.append((combined_score, r))
-    scored_recipes.sort(key=lambda x: x[0], reverse=True)
+        raw_terms = [x.strip() for x in ingredients if x.strip()]
+    return raw_terms, " ".join(raw_terms)
+
+def top_recipes(scores, top_n: int):
+    """Best `top_n` recipes with a positive score, ties in catalog order."""
     results = []
-    for score, r in scored_recipes[:top_n]:
+    for rid in top_ids(scores, top_n).tolist():
+        r = RECIPES[rid]
         results.append({
             "TranslatedRecipeName": r.get("TranslatedRecipeName") or r.get("RecipeName"),
-            "combined_score": round(score, 3),
+            "combined_score": round(float(scores[rid]), 3),
             "main_ingredients": list(set(r.get("main_ingredients", []))),
             "common_ingredients": list(set(r.get("common_ingredients", [])))
         })
+    return results
+
+def hybrid_suggestions(queries, top_n: int, approximate: bool = False):
+    """
+    Rank recipes for many ingredient queries. Exact mode scores every recipe
+    with one matrix product; approximate mode only scores the IVF candidates
+    plus the recipes that fuzzy-match a term.
+    """
+    if not queries:
+        return []
+    index = get_ann_index() if approximate else None
+    if approximate and index is None:
+        raise HTTPException(status_code=400, detail="Approximate search is disabled (ANN_ENABLED=false)")
+    parsed = [parse_terms(q) for q in queries]
+    user_embs = query_encoder.encode([text for _, text in parsed])
+    emb_scores = None if approximate else EMBEDDINGS @ user_embs.T  # (recipes, queries) cosine similarities
 
-    return {"matched_recipes": results}
+    results = []
+    for i, (raw_terms, _) in enumerate(parsed):
+        corrected_terms = correct_terms(raw_terms)
+        user_terms = list(set(normalize_word(term) for term in corrected_terms))
+        fuzzy_score = word_index.match_counts(user_terms) / MAIN_INGREDIENT_COUNTS
+        if approximate:
+            ids, _ = index.search(user_embs[i], max(ANN_CANDIDATES, top_n))
+            candidates = np.union1d(ids, np.flatnonzero(fuzzy_score))
+            combined = np.zeros(len(RECIPES), dtype=np.float32)
+            combined[candidates] = 0.7 * (EMBEDDINGS[candidates] @ user_embs[i]) + 0.3 * fuzzy_score[candidates]
+        else:
+            combined = 0.7 * emb_scores[:, i] + 0.3 * fuzzy_score
+        results.append(top_recipes(combined, top_n))
+    return results
+
+@app.post("/recipes/suggestions_hybrid")
+def recipe_suggestions_hybrid(payload: IngredientsInput, top_n: int = 5, approximate: bool = False):
+    return {"matched_recipes": hybrid_suggestions([payload.ingredients], top_n, approximate)[0]}
+
+@app.post("/recipes/suggestions_hybrid/batch")
+def recipe_suggestions_hybrid_batch(payload: BatchIngredientsInput, top_n: int = 5, approximate: bool = False):
+    results = hybrid_suggestions(payload.queries, top_n, approximate)
+    return {"results": [{"matched_recipes": m} for m in results]}
+
+@app.get("/stats")
+def get_stats():
+    return {
+        "recipes": len(RECIPES),
+        "query_embeddings": query_encoder.stats(),
+        "ann": {"enabled": ANN_ENABLED, "built": ann_index is not None,
+                **({"nlist": ann_index.nlist, "nprobe": ann_index.nprobe} if ann_index else {})},
+    }
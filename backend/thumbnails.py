@@ -0,0 +1,154 @@
+"""
+Resized JPEG thumbnails and WebP variants of the scraped recipe images.
+
+The originals in frontend/recipes_images are whatever the recipe site
+served, often several megabytes. This build step writes each one at a few
+fixed widths, as JPEG and as WebP, into frontend/recipe_thumbs:
+
+    python -m backend.thumbnails [--src DIR] [--out DIR] [--processes N]
+
+File names carry a hash of the original's bytes (<sha256[:16]>-<width>.webp),
+so they can be cached forever and identical images share their variants.
+manifest.json maps each original file name (catalog.image_files) to its
+variants; the API reads it to add `thumbnail` and a `srcset` to recipe
+responses. Originals whose size and mtime are unchanged since the last
+build are not re-read, and variants no longer referenced are deleted.
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+BUILD_VERSION = 1
+WIDTHS = (160, 320, 640)
+JPEG_QUALITY = 82
+WEBP_QUALITY = 78
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp"}
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_DIR = os.getenv("RECIPE_IMAGES_DIR", os.path.join(BASE_DIR, "../frontend/recipes_images"))
+THUMBS_DIR = os.getenv("RECIPE_THUMBS_DIR", os.path.join(BASE_DIR, "../frontend/recipe_thumbs"))
+MANIFEST_NAME = "manifest.json"
+
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def _save(img, path: str, **options):
+    tmp = f"{path}.tmp{os.getpid()}"
+    img.save(tmp, **options)
+    os.replace(tmp, path)
+
+def render(src_path: str, out_dir: str, digest: str, widths=WIDTHS):
+    """Write the variants of one original (in a worker process); returns its manifest entry."""
+    from PIL import Image, ImageOps
+
+    with Image.open(src_path) as img:
+        # JPEG can decode straight to a reduced size, far cheaper than a full decode
+        img.draft("RGB", (max(widths), max(widths)))
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ("RGB", "L"):
+            background = Image.new("RGB", img.size, (255, 255, 255))
+            rgba = img.convert("RGBA")
+            background.paste(rgba, mask=rgba.getchannel("A"))
+            img = background
+        img = img.convert("RGB")
+        width, height = img.size
+
+        variants = []
+        # Never upscale: widths above the original collapse into one full-width variant
+        targets = sorted({min(w, width) for w in widths})
+        for w in targets:
+            h = max(1, round(height * w / width))
+            resized = img if w == width else img.resize((w, h), Image.LANCZOS, reducing_gap=3.0)
+            stem = f"{digest[:16]}-{w}"
+            jpeg, webp = f"{stem}.jpg", f"{stem}.webp"
+            if not os.path.exists(os.path.join(out_dir, jpeg)):
+                _save(resized, os.path.join(out_dir, jpeg), format="JPEG", quality=JPEG_QUALITY,
+                      optimize=True, progressive=True)
+            if not os.path.exists(os.path.join(out_dir, webp)):
+                _save(resized, os.path.join(out_dir, webp), format="WEBP", quality=WEBP_QUALITY, method=4)
+            variants.append({"width": w, "height": h, "jpeg": jpeg, "webp": webp})
+    return {"sha256": digest, "variants": variants}
+
+def _render_job(job):
+    name, src_path, out_dir, digest = job
+    try:
+        return name, render(src_path, out_dir, digest), None
+    except Exception as e:  # a corrupt or unsupported file must not stop the build
+        return name, None, str(e)
+
+
+# ---------------- MANIFEST ----------------
+def read_manifest(out_dir: str = THUMBS_DIR):
+    """The manifest dict, or None if missing or from another build version."""
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != BUILD_VERSION or manifest.get("widths") != list(WIDTHS):
+        return None
+    return manifest
+
+def build(src_dir: str = SOURCE_DIR, out_dir: str = THUMBS_DIR, processes: int = None):
+    """Bring out_dir up to date with src_dir; returns (manifest, originals rendered, failures)."""
+    os.makedirs(out_dir, exist_ok=True)
+    previous = (read_manifest(out_dir) or {}).get("images", {})
+    images, jobs = {}, []
+    for entry in os.scandir(src_dir):
+        if not entry.is_file() or os.path.splitext(entry.name)[1].lower() not in IMAGE_EXTENSIONS:
+            continue
+        st = entry.stat()
+        old = previous.get(entry.name)
+        if old and old.get("size") == st.st_size and old.get("mtime") == st.st_mtime:
+            images[entry.name] = old
+            continue
+        digest = file_digest(entry.path)
+        images[entry.name] = {"size": st.st_size, "mtime": st.st_mtime}
+        jobs.append((entry.name, entry.path, out_dir, digest))
+
+    failures = {}
+    if jobs:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            for name, result, error in pool.map(_render_job, jobs, chunksize=8):
+                if result is None:
+                    # Kept with no variants so an unchanged broken file is not retried every build
+                    failures[name] = error
+                    images[name].update(error=error, variants=[])
+                else:
+                    images[name].update(result)
+
+    manifest = {"version": BUILD_VERSION, "widths": list(WIDTHS), "images": dict(sorted(images.items()))}
+    tmp = os.path.join(out_dir, f"{MANIFEST_NAME}.tmp{os.getpid()}")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, os.path.join(out_dir, MANIFEST_NAME))
+
+    # Variants of deleted or replaced originals
+    keep = {v[fmt] for img in images.values() for v in img["variants"] for fmt in ("jpeg", "webp")}
+    for entry in os.scandir(out_dir):
+        if entry.name != MANIFEST_NAME and entry.name not in keep and ".tmp" not in entry.name:
+            os.remove(entry.path)
+    return manifest, len(jobs) - len(failures), failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build resized JPEG/WebP variants of the recipe images")
+    parser.add_argument("--src", default=SOURCE_DIR)
+    parser.add_argument("--out", default=THUMBS_DIR)
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    manifest, rendered, failures = build(args.src, args.out, args.processes)
+    for name, error in failures.items():
+        print(f"Skipping {name}: {error}")
+    print(f"✅ {len(manifest['images'])} images ({rendered} rendered, {len(failures)} failed) "
+          f"in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,96 @@
+"""
+Ingredient-word matching and ranking for the hybrid search in search.py.
+
+Each recipe's ingredient words are derived once. WordIndex maps every
+distinct word to the recipes containing it (CSR), so a user term is fuzzy
+matched against the vocabulary once (rapidfuzz cdist) instead of against
+every recipe. top_ids() picks the best recipes with argpartition.
+"""
+import re
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+
+def normalize_word(word: str) -> str:
+    w = word.strip().lower()
+    w = re.sub(r"[^a-z0-9\s()]", "", w)
+    if w.endswith("es"):
+        w = w[:-2]
+    elif w.endswith("s"):
+        w = w[:-1]
+    return w
+
+def extract_all_words(text: str):
+    """Return normalized words including bracketed words"""
+    words = []
+    normalized = normalize_word(text)
+    words.append(normalized)
+
+    no_brackets = re.sub(r"\(.*?\)", "", normalized).strip()
+    if no_brackets != normalized:
+        words.append(no_brackets)
+
+    bracket_match = re.findall(r"\((.*?)\)", text)
+    for m in bracket_match:
+        words.append(normalize_word(m))
+    return set(words)
+
+def recipe_words(recipe: dict) -> set:
+    words = set()
+    for ing in recipe.get("main_ingredients", []):
+        words.update(extract_all_words(ing))
+    return words
+
+
+class WordIndex:
+    def __init__(self, vocab, indptr, recipes, num_recipes: int):
+        self.vocab = vocab                  # sorted distinct ingredient words
+        self.indptr = indptr                # word id -> slice of recipes
+        self.recipes = recipes              # int32 rids
+        self.num_recipes = num_recipes
+
+    @classmethod
+    def from_recipes(cls, recipes):
+        per_recipe = [recipe_words(r) for r in recipes]
+        vocab = sorted(set().union(*per_recipe))
+        ids = {w: i for i, w in enumerate(vocab)}
+        by_word = [[] for _ in vocab]
+        for rid, words in enumerate(per_recipe):
+            for w in words:
+                by_word[ids[w]].append(rid)
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(rids) for rids in by_word])
+        rids = np.fromiter((rid for rids in by_word for rid in rids), dtype=np.int32, count=int(indptr[-1]))
+        return cls(vocab, indptr, rids, len(recipes))
+
+    def match_counts(self, user_terms, threshold=80):
+        """
+        Per recipe, how many user terms match one of its ingredient words
+        (including bracket words) with fuzz.ratio >= threshold.
+        """
+        counts = np.zeros(self.num_recipes, dtype=np.float32)
+        if not user_terms or not self.vocab:
+            return counts
+        scores = process.cdist(user_terms, self.vocab, scorer=fuzz.ratio, score_cutoff=threshold, workers=-1)
+        for row in scores:
+            word_ids = np.flatnonzero(row >= threshold)
+            if len(word_ids):
+                rids = np.concatenate([self.recipes[self.indptr[w]:self.indptr[w + 1]] for w in word_ids])
+                counts[np.unique(rids)] += 1
+        return counts
+
+
+def top_ids(scores, top_n: int):
+    """Ids of the best `top_n` positive scores, best first, ties in id order."""
+    if top_n <= 0:
+        return np.zeros(0, dtype=np.int64)
+    candidates = np.flatnonzero(scores > 0)
+    if len(candidates) > top_n:
+        values = scores[candidates]
+        cut = values[np.argpartition(-values, top_n - 1)[top_n - 1]]  # top_n-th best score
+        # argpartition picks arbitrarily among scores equal to the cut; keep the lowest ids
+        above = candidates[values > cut]
+        tied = candidates[values == cut][:top_n - len(above)]
+        candidates = np.concatenate([above, tied])
+    return candidates[np.lexsort((candidates, -scores[candidates]))]
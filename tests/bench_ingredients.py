@@ -0,0 +1,54 @@
+"""
+Rows/s of the ingredient parser against the previous implementation:
+
+    python -m tests.bench_ingredients [FILE] [--rows N]
+
+FILE is a workbook or csv with a TranslatedIngredients column; without one
+a synthetic column is built from the golden corpus fragments.
+"""
+import argparse
+import random
+import time
+
+from backend.ingredients import parse_ingredients, parse_ingredients_batch
+from tests.legacy_ingredients import legacy_parse_ingredients
+from tests.test_ingredients import load_golden
+
+
+def _benchmark(path: str = None, rows: int = 20000, seed: int = 0):
+    if path:
+        from backend.ingest import iter_rows
+        column = [r.get("TranslatedIngredients") for r in iter_rows(path, {"TranslatedIngredients"})]
+        source = path
+    else:
+        # Synthetic column: rows drawn from the corpus fragments, so common
+        # fragments repeat across rows the way they do in the real workbook
+        rng = random.Random(seed)
+        fragments = [f for c in load_golden() if c["input"] for f in str(c["input"]).split(",") if f.strip()]
+        column = [",".join(rng.choices(fragments, k=rng.randint(4, 14))) for _ in range(rows)]
+        source = "synthetic"
+
+    def timed(fn):
+        start = time.perf_counter()
+        result = fn()
+        return result, len(column) / (time.perf_counter() - start)
+
+    legacy, legacy_rate = timed(lambda: [legacy_parse_ingredients(v) for v in column])
+    single, single_rate = timed(lambda: [parse_ingredients(v) for v in column])
+    batch, batch_rate = timed(lambda: parse_ingredients_batch(column))
+    mismatches = sum(a != b or a != c for a, b, c in zip(legacy, single, batch))
+
+    print(f"{len(column)} rows ({source}), {sum(map(len, legacy))} ingredients")
+    print(f"{'':10}{'rows/s':>12}{'speedup':>10}")
+    print(f"{'legacy':10}{legacy_rate:>12.0f}{1.0:>10.2f}")
+    print(f"{'compiled':10}{single_rate:>12.0f}{single_rate / legacy_rate:>10.2f}")
+    print(f"{'batch':10}{batch_rate:>12.0f}{batch_rate / legacy_rate:>10.2f}")
+    print(f"rows parsed differently from legacy: {mismatches}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingredient parser benchmark")
+    parser.add_argument("path", nargs="?", help="workbook or csv with a TranslatedIngredients column")
+    parser.add_argument("--rows", type=int, default=20000, help="synthetic rows when no file is given")
+    args = parser.parse_args()
+    _benchmark(args.path, args.rows)
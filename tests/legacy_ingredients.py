@@ -0,0 +1,73 @@
+"""
+Frozen copy of backend.ingredients.parse_ingredients as it was before the
+compiled rewrite: the equivalence oracle for the tests and the baseline
+for bench_ingredients. Do not change it.
+"""
+import re
+
+from backend.ingredients import UNITS
+
+
+def legacy_parse_ingredients(ingredient_str):
+    def normalize(q):
+        if not q:
+            return q
+        s = str(q).strip()
+        s = re.sub(r'\s*/\s*', '/', s)
+        s = re.sub(r'(\d+)\s+(\d+/\d+)', r'\1-\2', s)
+        s = re.sub(r'\s*-\s*', '-', s)
+        return s.strip()
+
+    def split_note(text):
+        parts = re.split(r"\s*-\s*", text, maxsplit=1)
+        if len(parts) == 2:
+            return parts[0].strip(), parts[1].strip()
+        return text.strip(), ""
+
+    if ingredient_str is None or ingredient_str != ingredient_str or str(ingredient_str).strip() == "":
+        return []
+    parsed = []
+    for raw in str(ingredient_str).split(","):
+        s = raw.strip()
+        if not s:
+            continue
+        s = normalize(s)
+        lower = s.lower()
+        taste_match = None
+        if re.search(r"\bto taste\b", lower):
+            taste_match = "to taste"
+        elif re.search(r"\bas required\b", lower):
+            taste_match = "as required"
+        elif re.search(r"\bas per taste\b", lower):
+            taste_match = "as per taste"
+        if taste_match:
+            name = re.split(r"-|"+taste_match, s, flags=re.I)[0].strip().strip("- ").strip()
+            parsed.append({"quantity": taste_match, "item": name})
+            continue
+        tokens = s.split()
+        if tokens and re.match(r"^\d+(-\d+/\d+)?$|^\d+/\d+$|^\d+(\.\d+)?$", tokens[0]):
+            qty = tokens[0]
+            qty_display = qty
+            idx = 1
+            if idx < len(tokens):
+                t1 = tokens[1].lower().rstrip(".,")
+                if t1 in UNITS:
+                    qty_display = f"{qty} {tokens[1]}"
+                    idx += 1
+            item_part = " ".join(tokens[idx:]).strip()
+            if not item_part:
+                item_part = s[len(str(qty_display)):].strip()
+            item_main, note_part = split_note(item_part)
+            ingredient_data = {"item": item_main}
+            if qty_display:
+                ingredient_data["quantity"] = qty_display
+            if note_part:
+                ingredient_data["note"] = note_part
+            parsed.append(ingredient_data)
+            continue
+        item_main, note_part = split_note(s)
+        ingredient_data = {"item": item_main}
+        if note_part:
+            ingredient_data["note"] = note_part
+        parsed.append(ingredient_data)
+    return parsed
@@ -0,0 +1,61 @@
+import asyncio
+import threading
+
+from backend.ai_cache import MemoryStore, ResponseCache, SQLiteStore, normalize_prompt
+
+
+def cache(store, **kwargs):
+    return ResponseCache(store, ttl=3600, model="m", system_prompt="s", **kwargs)
+
+
+def test_normalized_prompts_share_an_answer():
+    assert normalize_prompt("Paneer recipe, easy!") == normalize_prompt("easy paneer recipe")
+    c = cache(MemoryStore(10))
+    c.put("easy paneer recipe", "answer")
+    assert c.get("Paneer recipe, easy!") == "answer"
+    assert c.get("paneer tikka") is None
+    assert c.stats()["hits"] == 1 and c.stats()["misses"] == 1
+
+def test_sqlite_fuzzy_candidates_stay_in_memory(tmp_path):
+    store = SQLiteStore(str(tmp_path / "cache.sqlite3"), maxsize=10)
+    c = cache(store, fuzzy_threshold=85)
+    c.put("easy paneer butter masala recipe", "answer")
+    assert c.get("easy paneer buter masala recipe") == "answer"
+    assert c.stats()["fuzzy_hits"] == 1
+
+    # Misses reuse the loaded candidates instead of reading every prompt again
+    queries = []
+    store._db.set_trace_callback(queries.append)
+    assert c.get("chocolate cake") is None
+    assert not any("SELECT key, norm" in q for q in queries)
+
+def test_sqlite_sees_other_workers_entries(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    mine = cache(SQLiteStore(path, maxsize=10, prompts_refresh=0), fuzzy_threshold=85)
+    other = cache(SQLiteStore(path, maxsize=10), fuzzy_threshold=85)
+    assert mine.get("dal makhani recipe") is None
+    other.put("dal makhani recipe", "from the other worker")
+    assert mine.get("dal makhani recipes") == "from the other worker"
+
+def test_sqlite_eviction_and_namespaces(tmp_path):
+    store = SQLiteStore(str(tmp_path / "cache.sqlite3"), maxsize=2)
+    c = cache(store)
+    for i in range(3):
+        c.put(f"recipe number {i}", str(i))
+    assert len(store) == 2
+    assert c.get("recipe number 0") is None
+    assert ResponseCache(store, ttl=3600, model="other", system_prompt="s").get("recipe number 2") is None
+
+def test_aget_runs_blocking_stores_off_the_loop(tmp_path):
+    store = SQLiteStore(str(tmp_path / "cache.sqlite3"), maxsize=10)
+    seen = []
+    get = store.get
+    store.get = lambda key: seen.append(threading.current_thread()) or get(key)
+    c = cache(store)
+
+    async def main():
+        await c.aput("aloo gobi", "answer")
+        return await c.aget("gobi aloo")
+
+    assert asyncio.run(main()) == "answer"
+    assert seen and threading.main_thread() not in seen
@@ -0,0 +1,124 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from backend.ai_cache import MemoryStore, ResponseCache
+from backend.ai_stream import MarkdownCleaner, clean_markdown, relay_answer
+from backend.http_client import AsyncHTTP, Upstream, UpstreamBusy
+
+ANSWERS = [
+    "",
+    "\n\n\n",
+    "plain answer",
+    "## Title\n\n\n\nBody **bold** text\n\n\n",
+    "  \n**Rice**\n\n\n\n\n\n- 2 cups\n>quote\n`code`_x_\n\n\n",
+    "#\n\n\n#\n\n\na\n\n\n\n",
+    "a\n\n \n\n\nb",
+    "***\n\n\n***",
+]
+
+
+def cleaned_in_pieces(text, cuts):
+    cleaner = MarkdownCleaner()
+    bounds = [0, *cuts, len(text)]
+    return "".join(cleaner.feed(text[a:b]) for a, b in zip(bounds, bounds[1:]))
+
+@pytest.mark.parametrize("text", ANSWERS)
+def test_every_single_split_matches_whole_text(text):
+    expected = clean_markdown(text)
+    for cut in range(len(text) + 1):
+        assert cleaned_in_pieces(text, [cut]) == expected, cut
+
+@pytest.mark.parametrize("text", ANSWERS)
+def test_one_character_chunks_match_whole_text(text):
+    assert cleaned_in_pieces(text, range(1, len(text))) == clean_markdown(text)
+
+def test_every_pair_of_splits_matches_whole_text():
+    text = ANSWERS[4]
+    expected = clean_markdown(text)
+    for first in range(len(text) + 1):
+        for second in range(first, len(text) + 1):
+            assert cleaned_in_pieces(text, [first, second]) == expected, (first, second)
+
+
+# ---------------- RELAY ----------------
+
+class FailingBody(httpx.AsyncByteStream):
+    """Sends some completion chunks, then fails with the given error."""
+
+    def __init__(self, lines, error=None):
+        self.lines = lines
+        self.error = error
+
+    async def __aiter__(self):
+        for line in self.lines:
+            yield line.encode()
+        if self.error:
+            raise self.error
+
+def chunk(text):
+    return "data: " + json.dumps({"choices": [{"delta": {"content": text}}]}) + "\n\n"
+
+def relay(handler, cache, retries=0):
+    upstream = Upstream("ai", "http://upstream.test/chat", timeout=5, max_concurrency=2,
+                        retries=retries, backoff=0)
+    http = AsyncHTTP([upstream], transport=httpx.MockTransport(handler))
+
+    async def collect():
+        try:
+            return [event async for event in relay_answer(http, "ai", {"json": {}}, cache, "prompt")]
+        finally:
+            await http.aclose()
+
+    return asyncio.run(collect())
+
+def parse(events):
+    parsed = []
+    for event in events:
+        head, _, data = event.strip().rpartition("\n")
+        parsed.append((head[len("event: "):] or None, json.loads(data[len("data: "):])))
+    return parsed
+
+def new_cache():
+    return ResponseCache(MemoryStore(10), ttl=60, model="m", system_prompt="s")
+
+def test_complete_stream_is_cleaned_and_cached():
+    lines = [chunk("## Rice\n"), chunk("\n\n\n**boil**"), chunk(" it\n\n"), "data: [DONE]\n\n"]
+    cache = new_cache()
+    events = parse(relay(lambda request: httpx.Response(200, stream=FailingBody(lines)), cache))
+    assert events[-1] == ("done", {})
+    assert "".join(data["text"] for _, data in events[:-1]) == "Rice\n\nboil it"
+    assert cache.get("prompt") == "## Rice\n\n\n\n**boil** it\n\n"
+
+def test_upstream_busy_mid_stream_ends_with_error_event():
+    lines = [chunk("Boil "), chunk("the rice")]
+    cache = new_cache()
+    handler = lambda request: httpx.Response(200, stream=FailingBody(lines, UpstreamBusy("ai")))
+    events = parse(relay(handler, cache))
+    assert events[:-1] == [(None, {"text": "Boil"}), (None, {"text": " the rice"})]
+    assert events[-1] == ("error", {"error": "ai"})
+    assert cache.get("prompt") is None  # partial answers are not cached
+
+def test_unreachable_upstream_is_an_error_event():
+    def handler(request):
+        raise httpx.ConnectError("refused")
+
+    events = parse(relay(handler, new_cache()))
+    assert len(events) == 1
+    assert events[0][0] == "error"
+    assert events[0][1]["error"].startswith("ai unreachable")
+
+def test_error_status_is_relayed_with_details():
+    events = parse(relay(lambda request: httpx.Response(400, text="bad prompt"), new_cache()))
+    assert events == [("error", {"error": "Perplexity API returned 400", "details": "bad prompt"})]
+
+def test_cached_answer_skips_the_upstream():
+    cache = new_cache()
+    cache.put("prompt", "**cached**\n\n\n\nanswer")
+
+    def handler(request):
+        raise AssertionError("upstream called")
+
+    assert parse(relay(handler, cache)) == [(None, {"text": "cached\n\nanswer"}), ("done", {})]
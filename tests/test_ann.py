@@ -0,0 +1,31 @@
+import numpy as np
+
+from backend.ann import IVFIndex, _normalize, _synthetic, exact_search
+
+
+def test_index_reads_rows_from_the_mapped_matrix(tmp_path):
+    path = tmp_path / "embeddings.npy"
+    np.save(path, _synthetic(2000, dim=32, topics=20))
+    matrix = np.load(path, mmap_mode="r")
+    index = IVFIndex.build(matrix, nprobe=4)
+    # Only ids and centroids are new; the rows stay in the mapped file
+    assert index.matrix is matrix or np.shares_memory(index.matrix, matrix)
+    assert sorted(index.ids.tolist()) == list(range(2000))
+    assert index.indptr[-1] == 2000
+
+def test_probing_every_cluster_is_exact():
+    matrix = _synthetic(1500, dim=32, topics=15, seed=1)
+    index = IVFIndex.build(matrix)
+    rng = np.random.default_rng(2)
+    for q in _normalize(rng.standard_normal((20, 32))).astype(np.float32):
+        ids, scores = index.search(q, 10, nprobe=index.nlist)
+        exact_ids, exact_scores = exact_search(matrix, q, 10)
+        assert set(ids.tolist()) == set(exact_ids.tolist())
+        np.testing.assert_allclose(scores, exact_scores, rtol=1e-5)
+        assert list(scores) == sorted(scores, reverse=True)
+
+def test_fewer_probes_still_find_the_row_itself():
+    matrix = _synthetic(1000, dim=32, topics=10, seed=3)
+    index = IVFIndex.build(matrix, nprobe=1)
+    hits = sum(int(index.search(matrix[i], 1)[0][0]) == i for i in range(0, 1000, 10))
+    assert hits >= 95
@@ -0,0 +1,65 @@
+import gzip
+import os
+
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.routing import Mount, Route
+from starlette.testclient import TestClient
+
+from backend.assets import PageCache, StaticAssets, http_date, precompress
+
+PAGE = b"<html>" + b"recipe " * 400 + b"</html>"
+SCRIPT = b"console.log('x');\n" * 200
+MTIME = 1_700_000_000
+
+
+@pytest.fixture
+def client(tmp_path):
+    (tmp_path / "index.html").write_bytes(PAGE)
+    (tmp_path / "static").mkdir()
+    (tmp_path / "static" / "app.js").write_bytes(SCRIPT)
+    for path in (tmp_path / "index.html", tmp_path / "static" / "app.js"):
+        os.utime(path, (MTIME, MTIME))
+    pages = PageCache(str(tmp_path))
+
+    def index(request: Request):
+        return pages.response(request, "index.html")
+
+    app = Starlette(routes=[Route("/", index), Mount("/static", StaticAssets(directory=str(tmp_path / "static")))])
+    return TestClient(app), tmp_path
+
+
+@pytest.mark.parametrize("url", ["/", "/static/app.js"])
+def test_etag_revalidation(client, url):
+    c, _ = client
+    res = c.get(url, headers={"Accept-Encoding": "identity"})
+    assert res.status_code == 200 and res.headers["etag"]
+    again = c.get(url, headers={"If-None-Match": res.headers["etag"]})
+    assert again.status_code == 304
+    # A different tag wins over a matching date
+    stale = c.get(url, headers={"If-None-Match": '"other"', "If-Modified-Since": http_date(MTIME)})
+    assert stale.status_code == 200
+
+@pytest.mark.parametrize("url", ["/", "/static/app.js"])
+def test_if_modified_since(client, url):
+    c, _ = client
+    res = c.get(url)
+    assert res.headers["last-modified"] == http_date(MTIME)
+    assert c.get(url, headers={"If-Modified-Since": http_date(MTIME)}).status_code == 304
+    assert c.get(url, headers={"If-Modified-Since": http_date(MTIME + 60)}).status_code == 304
+    assert c.get(url, headers={"If-Modified-Since": http_date(MTIME - 60)}).status_code == 200
+    assert c.get(url, headers={"If-Modified-Since": "not a date"}).status_code == 200
+
+def test_compressed_bodies(client):
+    c, root = client
+    res = c.get("/", headers={"Accept-Encoding": "gzip"})
+    assert res.headers["content-encoding"] == "gzip" and res.content == PAGE
+
+    assert precompress(str(root / "static")) >= 1
+    res = c.get("/static/app.js", headers={"Accept-Encoding": "gzip"})
+    assert res.headers["content-encoding"] == "gzip" and res.content == SCRIPT
+    # Range requests always get the identity body
+    res = c.get("/static/app.js", headers={"Accept-Encoding": "gzip", "Range": "bytes=0-9"})
+    assert res.status_code == 206 and "content-encoding" not in res.headers
+    assert gzip.decompress((root / "static" / "app.js.gz").read_bytes()) == SCRIPT
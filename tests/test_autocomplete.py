@@ -0,0 +1,33 @@
+from backend.autocomplete import FUZZY_HEAD_LENGTHS, PrefixIndex
+
+TERMS = ["coriander seeds", "coriander leaves", "green chilli", "red chilli powder", "cumin seeds"]
+COUNTS = [5, 9, 7, 3, 8]
+
+
+def names(index, ids):
+    return [index.terms[i] for i in ids]
+
+
+def test_prefix_matches_any_word_start_ranked_by_use():
+    index = PrefixIndex(TERMS, COUNTS)
+    ids, fuzzy = index.complete("chil")
+    assert not fuzzy
+    assert names(index, ids) == ["green chilli", "red chilli powder"]
+    assert names(index, index.complete("  Corian ")[0]) == ["coriander leaves", "coriander seeds"]
+
+def test_fuzzy_fallback_for_typos():
+    index = PrefixIndex(TERMS, COUNTS)
+    ids, fuzzy = index.complete("corriander")
+    assert fuzzy
+    assert set(names(index, ids)) == {"coriander leaves", "coriander seeds"}
+
+def test_fuzzy_cut_lists_stay_bounded():
+    index = PrefixIndex(TERMS, COUNTS)
+    for n in range(3, 400):
+        index.complete("x" * n)
+    assert len(index._heads) <= FUZZY_HEAD_LENGTHS
+    assert max(index._heads) == index.max_key_length
+    # Queries longer than every key still match like before
+    ids, fuzzy = index.complete("red chilli powder" + "s" * 200)
+    assert fuzzy and ids == []
+    assert names(index, index.complete("red chilli powdr")[0])[0] == "red chilli powder"
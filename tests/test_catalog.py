@@ -0,0 +1,40 @@
+from backend.catalog import Catalog, read_snapshot, write_snapshot
+
+
+RECIPES = [
+    {"Srno": 1, "TranslatedRecipeName": "Dal Fry", "image_path": "recipes_images/dal_1.jpg", "main_ingredients": ["dal"]},
+    {"Srno": 2, "TranslatedRecipeName": "Jeera Rice", "image_path": "recipes_images/rice.jpg", "main_ingredients": ["rice"]},
+    {"Srno": 3, "TranslatedRecipeName": "Dal Fry", "image_path": "recipes_images/dal_2.jpg", "main_ingredients": ["ghee"]},
+]
+
+
+def test_repeated_names_share_a_rid():
+    catalog = Catalog.from_recipes(RECIPES)
+    assert catalog.names == ["Dal Fry", "Jeera Rice"]
+    assert [catalog.rid(pos) for pos in range(len(RECIPES))] == [0, 1, 0]
+    # The rid resolves to the last record with the name
+    assert catalog.record(0)["Srno"] == 3
+    assert catalog.image_files == ["dal_2.jpg", "rice.jpg"]
+    assert catalog.id_index["1"] == 0 and catalog.id_index["3"] == 2
+
+def test_snapshot_round_trip(tmp_path):
+    catalog = Catalog.from_recipes(RECIPES)
+    path = write_snapshot(catalog, str(tmp_path), "ab" * 32)
+    loaded = read_snapshot(path, "ab" * 32)
+    assert loaded is not None
+    assert [loaded.rid(pos) for pos in range(len(RECIPES))] == [0, 1, 0]
+    assert loaded.names == catalog.names
+    assert [loaded.recipes[p] for p in range(len(RECIPES))] == RECIPES
+
+def test_mapped_records_keep_a_bounded_cache(tmp_path):
+    recipes = [dict(RECIPES[i % 3], Srno=i) for i in range(50)]
+    path = write_snapshot(Catalog.from_recipes(recipes), str(tmp_path), "cd" * 32)
+    records = read_snapshot(path, "cd" * 32).recipes
+    records._cache_size = 8
+    assert [r["Srno"] for r in records] == list(range(50))
+    assert len(records._cache) == 0   # iteration does not fill it
+    for pos in range(50):
+        assert records[pos]["Srno"] == pos
+    assert records[-1]["Srno"] == 49
+    assert len(records._cache) == 8
+    assert records[49] is records[49]
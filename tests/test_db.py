@@ -0,0 +1,112 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+from backend.db import Database, connect
+from backend.history import HistoryStore
+
+
+def run(coro_fn):
+    """Run coro_fn(db) against a fresh in-process database."""
+    async def main():
+        db = Database(connect("mongomock://"))
+        await db.ensure_indexes()
+        return await coro_fn(db)
+    return asyncio.run(main())
+
+
+def test_users_email_is_unique():
+    async def scenario(db):
+        await db.users.create({"email": "a@x.in", "password": "h1"})
+        assert await db.users.exists("a@x.in")
+        with pytest.raises(DuplicateKeyError):
+            await db.users.create({"email": "a@x.in", "password": "h2"})
+        user = await db.users.find_by_email("a@x.in")
+        await db.users.set_password(user["_id"], "h3")
+        return await db.users.find_by_email("a@x.in", {"password": 1, "_id": 0})
+
+    assert run(scenario) == {"password": "h3"}
+
+def test_userdata_favorites_and_activity():
+    async def scenario(db):
+        await db.userdata.add_favorite("a@x.in", {"title": "Dal"})
+        await db.userdata.add_favorite("a@x.in", {"title": "Dal"})
+        await db.userdata.add_favorite("a@x.in", {"title": "Poha"})
+        await db.userdata.remove_favorite("a@x.in", "Dal")
+        await db.userdata.push_activity("a@x.in", "first")
+        await db.userdata.push_activity("a@x.in", "second")
+        return await db.userdata.get("a@x.in")
+
+    doc = run(scenario)
+    assert doc["favorites"] == [{"title": "Poha"}]
+    assert doc["activity"] == ["second", "first"]
+
+def test_review_pages_and_running_stats():
+    async def scenario(db):
+        start = datetime(2024, 1, 1)
+        for i, rating in enumerate([5, 4, 4, 1, 5]):
+            await db.reviews.insert({"name": f"r{i}", "rating": rating, "review": "ok",
+                                     "createdAt": start + timedelta(minutes=i)})
+        first = await db.reviews.page(2)
+        second = await db.reviews.page(2, before=(first[-1]["createdAt"], first[-1]["_id"]))
+        stats = await db.reviews.stats()
+        await db.reviews.rebuild_stats()
+        return first, second, stats, await db.reviews.stats()
+
+    first, second, stats, rebuilt = run(scenario)
+    assert [r["name"] for r in first + second] == ["r4", "r3", "r2", "r1"]
+    assert stats == rebuilt == {"count": 5, "average": 3.8,
+                                "histogram": {"1": 1, "2": 0, "3": 0, "4": 2, "5": 2}}
+
+def test_history_is_flushed_and_read_back_latest_first():
+    async def scenario(db):
+        await db.ensure_history_collection(1 << 20)
+        store = HistoryStore(db.history, limit=3, cache_ttl=0)
+        for i in range(5):
+            store.record("a@x.in", "searched", {"q": i})
+        store.record("b@x.in", "viewed", {"recipe": "Dal"})
+        # Unflushed entries are already visible
+        before = await store.get("a@x.in")
+        assert await store.flush() == 6
+        after = await store.get("a@x.in")
+        recent = await db.history.recent("b@x.in", "viewed", 10)
+        return before, after, recent
+
+    before, after, recent = run(scenario)
+    assert before == after == {"searched": [{"q": 4}, {"q": 3}, {"q": 2}], "viewed": []}
+    assert [d["data"] for d in recent] == [{"recipe": "Dal"}]
+
+def test_review_pages_survive_missing_and_string_dates():
+    async def scenario(db):
+        start = datetime(2024, 1, 1)
+        docs = [{"name": f"d{i}", "createdAt": start + timedelta(days=i)} for i in range(3)]
+        docs += [{"name": "same", "createdAt": start}]                       # tie on createdAt
+        docs += [{"name": f"s{i}", "createdAt": f"2023-0{i + 1}-01T00:00:00"} for i in range(3)]
+        docs += [{"name": "none1"}, {"name": "none2", "createdAt": None}, {"name": "none3"}]
+        for d in docs:
+            await db.reviews.col.insert_one(dict(d, rating=4, review="ok"))
+
+        expected = [r["name"] for r in await db.reviews.page(100)]
+        for limit in (1, 2, 3, 4):
+            seen, before = [], None
+            while True:
+                page = await db.reviews.page(limit, before)
+                seen += [r["name"] for r in page]
+                if len(page) < limit:
+                    break
+                before = db.reviews.parse_cursor(db.reviews.cursor(page[-1]))
+            assert seen == expected, limit
+        return expected
+
+    names = run(scenario)
+    assert names[:4] == ["d2", "d1", "same", "d0"]
+    assert names[4:7] == ["s2", "s1", "s0"]
+    assert sorted(names[7:]) == ["none1", "none2", "none3"]
+
+def test_bad_review_cursors_are_rejected():
+    from backend.db import ReviewRepository
+    for cursor in ("", "not-base64!", "W10=", ReviewRepository.cursor({"_id": "x"})):
+        with pytest.raises(ValueError):
+            ReviewRepository.parse_cursor(cursor)
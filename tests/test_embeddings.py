@@ -0,0 +1,91 @@
+import json
+
+import numpy as np
+
+from backend.embeddings import QueryEncoder, build_artifact, load_embeddings, recipe_text
+
+
+class FakeModel:
+    """Deterministic stand-in for SentenceTransformer that records what it encoded."""
+
+    def __init__(self, dim=8):
+        self.dim = dim
+        self.calls = []
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, show_progress_bar=False):
+        self.calls.append(list(texts))
+        return np.stack([np.random.default_rng(sum(map(ord, t)) + len(t)).standard_normal(self.dim)
+                         for t in texts]).astype(np.float32)
+
+    @property
+    def encoded(self):
+        return [t for call in self.calls for t in call]
+
+
+# ---------------- QUERY ENCODER ----------------
+def test_repeated_queries_skip_the_model():
+    model = FakeModel()
+    encoder = QueryEncoder(model, maxsize=10)
+    first = encoder.encode(["rice dal", "paneer"])
+    again = encoder.encode(["paneer", "Rice   DAL"])  # case and spacing do not matter
+    assert model.encoded == ["rice dal", "paneer"]
+    np.testing.assert_array_equal(again, first[::-1])
+    np.testing.assert_allclose(np.linalg.norm(first, axis=1), 1, rtol=1e-6)
+    assert encoder.stats() == {"size": 2, "maxsize": 10, "hits": 2, "misses": 2, "hit_rate": 0.5}
+
+def test_duplicates_in_one_batch_are_encoded_once():
+    model = FakeModel()
+    encoder = QueryEncoder(model)
+    rows = encoder.encode(["dal", "rice", "DAL", "dal "])
+    assert model.calls == [["dal", "rice"]]
+    np.testing.assert_array_equal(rows[0], rows[2])
+    np.testing.assert_array_equal(rows[0], rows[3])
+    assert (encoder.hits, encoder.misses) == (2, 2)
+
+def test_least_recently_used_entry_is_evicted():
+    model = FakeModel()
+    encoder = QueryEncoder(model, maxsize=2)
+    encoder.encode(["a"])
+    encoder.encode(["b"])
+    encoder.encode(["a"])          # "a" is now the most recent
+    encoder.encode(["c"])          # evicts "b"
+    assert list(encoder._cache) == ["a", "c"]
+    encoder.encode(["a", "b"])
+    assert model.encoded == ["a", "b", "c", "b"]
+    assert encoder.stats()["size"] == 2
+
+def test_empty_batch():
+    model = FakeModel()
+    encoder = QueryEncoder(model)
+    assert encoder.encode([]).shape == (0, 0)
+    assert model.calls == []
+    assert encoder.stats()["hit_rate"] == 0.0
+
+
+# ---------------- ARTIFACTS ----------------
+def write_recipes(path, ingredient_lists):
+    path.write_text(json.dumps([{"main_ingredients": ings} for ings in ingredient_lists]), encoding="utf-8")
+
+def test_rebuild_only_encodes_changed_recipes(tmp_path):
+    recipes_file = tmp_path / "recipes.json"
+    artifacts = str(tmp_path / "artifacts")
+    model = FakeModel()
+
+    write_recipes(recipes_file, [["rice", "dal"], ["paneer"], ["rice", "dal"]])
+    path, encoded = build_artifact(str(recipes_file), artifacts, model=model, model_name="fake")
+    assert encoded == 2 and sorted(model.encoded) == ["paneer", "rice dal"]
+    first = load_embeddings(str(recipes_file), 3, artifacts, model_name="fake")
+    np.testing.assert_array_equal(first[0], first[2])
+
+    model.calls.clear()
+    write_recipes(recipes_file, [["paneer"], ["aloo"], ["rice", "dal"]])
+    new_path, encoded = build_artifact(str(recipes_file), artifacts, model=model, model_name="fake")
+    assert encoded == 1 and model.encoded == ["aloo"]
+    assert new_path != path
+    matrix = load_embeddings(str(recipes_file), 3, artifacts, model_name="fake")
+    np.testing.assert_array_equal(matrix[0], first[1])
+    np.testing.assert_array_equal(matrix[2], first[0])
+    assert recipe_text({"main_ingredients": ["rice", "dal"]}) == "rice dal"
@@ -0,0 +1,120 @@
+import itertools
+import random
+
+import numpy as np
+import pytest
+
+from backend.facets import FacetIndex
+
+VALUES = {
+    "Cuisine": ["", "Indian", "Kerala", "Punjabi", "Unused"],
+    "Course": ["Lunch", "", "Dinner", "Snack"],
+    "Diet": ["Vegetarian", "Vegan", ""],
+}
+SIZE = 43  # not a multiple of 8, so the last packed byte is partly padding
+
+
+def make_catalog(seed=0):
+    rng = random.Random(seed)
+    facets = {}
+    for field, values in VALUES.items():
+        used = len(values) - (field == "Cuisine")  # "Unused" is never assigned
+        facets[field] = (values, np.array([rng.randrange(used) for _ in range(SIZE)], dtype=np.int32))
+    times = {
+        field: np.array([np.nan if rng.random() < 0.15 else rng.choice([5, 10, 15, 30, 45, 60])
+                         for _ in range(SIZE)], dtype=np.float32)
+        for field in ("PrepTimeInMins", "TotalTimeInMins")
+    }
+    universe = [rid for rid in range(SIZE) if rng.random() < 0.8]
+    return facets, times, universe
+
+def brute_force(facets, times, universe, filters, ranges, within=None):
+    """Straight per-recipe filter, the meaning FacetIndex.search must match."""
+    def value(field, rid):
+        values, codes = facets[field]
+        return values[codes[rid]]
+
+    def picked(field, rid, wanted):
+        v = value(field, rid)
+        return bool(v) and v.lower() in {w.strip().lower() for w in wanted}
+
+    def in_range(field, rid):
+        low, high = ranges[field]
+        minutes = times[field][rid]
+        if low is None and high is None:
+            return True
+        return (not np.isnan(minutes) and (low is None or minutes >= low)
+                and (high is None or minutes <= high))
+
+    base = [rid for rid in universe
+            if (within is None or rid in within) and all(in_range(f, rid) for f in ranges)]
+    active = {f: v for f, v in filters.items() if v}
+    rids = [rid for rid in base if all(picked(f, rid, v) for f, v in active.items())]
+
+    counts = {}
+    for field, (values, _) in facets.items():
+        pool = [rid for rid in base
+                if all(picked(f, rid, v) for f, v in active.items() if f != field)]
+        totals = {}
+        for rid in pool:
+            if value(field, rid):
+                totals[value(field, rid)] = totals.get(value(field, rid), 0) + 1
+        order = sorted(totals, key=lambda v: (-totals[v], values.index(v)))
+        counts[field] = [{"value": v, "count": totals[v]} for v in order]
+    return rids, counts
+
+def check(index, catalog, filters, ranges=None, within=None):
+    facets, times, universe = catalog
+    rids, counts = index.search(filters, ranges, within=within)
+    expected_rids, expected_counts = brute_force(facets, times, universe, filters, ranges or {}, within)
+    assert rids.tolist() == expected_rids
+    assert counts == expected_counts
+    ids_only, none = index.search(filters, ranges, within=within, counts=False)
+    assert ids_only.tolist() == expected_rids and none is None
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_every_value_combination_matches_brute_force(seed):
+    catalog = make_catalog(seed)
+    index = FacetIndex(*catalog)
+    choices = {field: [[]] + [[v] for v in values] for field, values in VALUES.items()}
+    choices["Cuisine"].append(["Indian", "Punjabi"])
+    for combo in itertools.product(*choices.values()):
+        check(index, catalog, dict(zip(choices, combo)))
+
+def test_ranges_and_within_match_brute_force():
+    catalog = make_catalog(3)
+    index = FacetIndex(*catalog)
+    bounds = [None, 0, 10, 15, 45, 100]
+    for low, high in itertools.product(bounds, bounds):
+        check(index, catalog, {}, {"TotalTimeInMins": (low, high)})
+        check(index, catalog, {"Diet": ["vegan"]}, {"PrepTimeInMins": (None, high), "TotalTimeInMins": (low, None)})
+    within = list(range(0, SIZE, 3))
+    check(index, catalog, {"Course": ["Lunch", "Dinner"]}, {"TotalTimeInMins": (None, 30)}, within=within)
+    check(index, catalog, {}, within=[])
+
+def test_unknown_empty_and_unused_values_match_nothing():
+    catalog = make_catalog(4)
+    index = FacetIndex(*catalog)
+    for wanted in (["Martian"], [""], ["  "], ["Unused"]):
+        rids, counts = index.search({"Cuisine": wanted})
+        assert rids.tolist() == []
+        check(index, catalog, {"Cuisine": wanted})
+        # Disjunctive: the other Cuisine values are still counted
+        assert counts["Cuisine"] == brute_force(*catalog, {}, {})[1]["Cuisine"]
+    # An unknown value next to a known one is ignored
+    check(index, catalog, {"Cuisine": ["Martian", " kerala "]})
+
+def test_empty_facet_values_are_never_counted():
+    catalog = make_catalog(5)
+    _, counts = FacetIndex(*catalog).search({})
+    for field, entries in counts.items():
+        assert all(entry["value"] for entry in entries)
+        assert "Unused" not in {entry["value"] for entry in entries}
+
+def test_padding_bits_stay_outside_the_universe():
+    facets, times, _ = make_catalog(6)
+    index = FacetIndex(facets, times, list(range(SIZE)))
+    assert index.universe.size == (SIZE + 7) // 8
+    rids, _ = index.search({}, counts=False)
+    assert rids.tolist() == list(range(SIZE))
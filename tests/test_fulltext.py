@@ -0,0 +1,132 @@
+import math
+
+import numpy as np
+import pytest
+
+from backend.fulltext import B, K1, SearchIndex, document_terms, search_tokens
+
+RECIPES = [
+    {"TranslatedRecipeName": "Paneer Butter Masala",
+     "TranslatedIngredients": "200 grams Paneer, 2 tablespoons Butter, Salt to taste",
+     "TranslatedInstructions": "Cook the paneer in butter."},
+    {"TranslatedRecipeName": "Jeera Rice",
+     "TranslatedIngredients": "1 cup Rice, 1 teaspoon Jeera",
+     "TranslatedInstructions": "Boil the rice with jeera. Serve with paneer curry."},
+    {"TranslatedRecipeName": "Green Chilli Pickle",
+     "TranslatedIngredients": "10 Green chillies, Salt, Lemon",
+     "TranslatedInstructions": "Slit the chillies and mix with salt."},
+    {"TranslatedRecipeName": "Butter Naan",
+     "TranslatedIngredients": "2 cups Maida, Butter, Curd",
+     "TranslatedInstructions": "Knead, rest and cook the naan; brush with butter."},
+]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return SearchIndex.from_documents([document_terms(r) for r in RECIPES])
+
+def reference_scores(documents, words):
+    """Textbook BM25 over the weighted term counts, one loop per document."""
+    n = len(documents)
+    lengths = [sum(doc.values()) for doc in documents]
+    avg = sum(lengths) / n
+    out = []
+    for doc, length in zip(documents, lengths):
+        score = 0.0
+        for word in words:
+            tf = doc.get(word, 0)
+            if tf:
+                df = sum(word in d for d in documents)
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                score += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / avg))
+        out.append(score)
+    return out
+
+
+# ---------------- TOKENISATION ----------------
+def test_tokens_drop_numbers_units_and_fold_spellings():
+    assert search_tokens("2 cups Paneer, chopped chillies!! and Salt-to-taste") == ["paneer", "chili", "salt"]
+    assert search_tokens("Chilli chilies CHILLIES") == ["chili", "chili", "chili"]
+
+def test_token_inputs_other_than_text():
+    assert search_tokens(["Dal Tadka", 3, None]) == ["dal", "tadka"]
+    assert search_tokens(None) == []
+    assert search_tokens(float("nan")) == []
+    assert search_tokens("") == []
+
+def test_document_terms_are_field_weighted():
+    terms = document_terms(RECIPES[0])
+    # name 3.0 + ingredients 1.5 + instructions 1.0
+    assert terms["paneer"] == pytest.approx(5.5)
+    assert terms["masala"] == pytest.approx(3.0)
+    assert document_terms({}) == {}
+
+
+# ---------------- RANKING ----------------
+def test_scores_match_reference_bm25(index):
+    documents = [document_terms(r) for r in RECIPES]
+    for words in (["paneer"], ["butter"], ["rice", "jeera"], ["butter", "paneer", "salt"]):
+        np.testing.assert_allclose(index.scores(" ".join(words)), reference_scores(documents, words), rtol=1e-5)
+
+def test_name_hits_rank_first(index):
+    hits, total = index.search("paneer")
+    assert total == 2
+    assert [rid for rid, _ in hits] == [0, 1]
+
+    # Same weighted tf in both; the shorter recipe wins
+    hits, total = index.search("butter")
+    assert [rid for rid, _ in hits] == [3, 0] and total == 2
+    assert hits[0][1] > hits[1][1]
+
+    # Ingredients + instructions beats ingredients alone
+    hits, _ = index.search("salt")
+    assert [rid for rid, _ in hits] == [2, 0]
+
+def test_top_k_and_ties_by_rid():
+    twins = {"TranslatedRecipeName": "Lemon Rice"}
+    index = SearchIndex.from_documents([document_terms(twins)] * 5)
+    hits, total = index.search("lemon", k=3)
+    assert total == 5
+    assert [rid for rid, _ in hits] == [0, 1, 2]
+
+def test_top_k_cut_inside_a_tie_keeps_the_lowest_rids():
+    kinds = [{"TranslatedRecipeName": "Lemon Rice"}, {"TranslatedRecipeName": "Lemon Rice Lemon"},
+             {"TranslatedRecipeName": "Rice"}]
+    documents = [document_terms(kinds[rid % 7 % 3]) for rid in range(60)]
+    index = SearchIndex.from_documents(documents)
+    scores = index.scores("lemon")
+    ranked = sorted(np.flatnonzero(scores > 0).tolist(), key=lambda rid: -scores[rid])
+    for k in range(1, 45):
+        hits, total = index.search("lemon", k=k)
+        assert [rid for rid, _ in hits] == ranked[:k]
+        assert total == len(ranked)
+
+def test_allowed_mask_filters_hits(index):
+    allowed = np.array([False, True, True, True])
+    hits, total = index.search("paneer", allowed=allowed)
+    assert [rid for rid, _ in hits] == [1] and total == 1
+
+def test_prefix_and_typo_matches_are_discounted(index):
+    exact = dict(index.search("paneer")[0])
+    prefix = dict(index.search("panee")[0])
+    assert prefix.keys() == exact.keys()
+    assert all(prefix[rid] < exact[rid] for rid in exact)
+    typo = dict(index.search("panner")[0])
+    assert typo.keys() == exact.keys()
+
+
+# ---------------- EMPTY / UNKNOWN ----------------
+@pytest.mark.parametrize("query", ["", "   ", "2 cups", "xylophone", "qq"])
+def test_empty_or_unknown_queries_match_nothing(index, query):
+    assert index.search(query) == ([], 0)
+    assert not index.scores(query).any()
+
+def test_empty_index():
+    index = SearchIndex.from_documents([])
+    assert index.search("paneer") == ([], 0)
+
+def test_save_and_load_round_trip(index, tmp_path):
+    index.save(str(tmp_path / "idx"))
+    loaded = SearchIndex.load(str(tmp_path / "idx"))
+    for query in ("paneer", "butter rice", "chillies"):
+        assert loaded.search(query) == index.search(query)
@@ -0,0 +1,106 @@
+import asyncio
+
+import httpx
+import pytest
+
+from backend.http_client import AsyncHTTP, Upstream, UpstreamBusy
+
+
+def client(handler, retries=2, max_concurrency=4):
+    upstream = Upstream("api", "http://upstream.test/v1", timeout=5, max_concurrency=max_concurrency,
+                        retries=retries, backoff=0)
+    return AsyncHTTP([upstream], transport=httpx.MockTransport(handler))
+
+def replies(*answers):
+    """Handler returning the given statuses (or raising the given errors) in order."""
+    calls = []
+
+    def handler(request):
+        answer = answers[len(calls)]
+        calls.append(request)
+        if isinstance(answer, Exception):
+            raise answer
+        return httpx.Response(answer, headers={"Retry-After": "0"}, text=str(answer))
+
+    return handler, calls
+
+async def post(http):
+    try:
+        return await http.post("api", json={})
+    finally:
+        await http.aclose()
+
+
+@pytest.mark.parametrize("status", [429, 502, 503, 504])
+def test_retryable_statuses_are_retried(status):
+    handler, calls = replies(status, 200)
+    assert asyncio.run(post(client(handler))).status_code == 200
+    assert len(calls) == 2
+
+def test_last_retryable_answer_is_returned():
+    handler, calls = replies(503, 503, 503)
+    assert asyncio.run(post(client(handler))).status_code == 503
+    assert len(calls) == 3
+
+@pytest.mark.parametrize("status", [400, 401, 500])
+def test_other_statuses_are_not_retried(status):
+    handler, calls = replies(status)
+    assert asyncio.run(post(client(handler))).status_code == status
+    assert len(calls) == 1
+
+def test_connect_errors_are_retried_then_give_up():
+    error = httpx.ConnectError("refused")
+    handler, calls = replies(error, error, error)
+    with pytest.raises(UpstreamBusy):
+        asyncio.run(post(client(handler)))
+    assert len(calls) == 3
+
+def test_read_timeouts_are_not_retried():
+    # The upstream may already have acted on the request
+    handler, calls = replies(httpx.ReadTimeout("slow"), 200)
+    with pytest.raises(httpx.ReadTimeout):
+        asyncio.run(post(client(handler)))
+    assert len(calls) == 1
+
+def test_retry_after_is_honoured_and_capped():
+    u = Upstream("api", "http://upstream.test", timeout=5, max_concurrency=1, backoff=0.5)
+    assert AsyncHTTP._delay(u, 0, "2") == 2
+    assert AsyncHTTP._delay(u, 0, "120") == 5
+    assert 0.25 <= AsyncHTTP._delay(u, 1, "soon") <= 1.5
+
+def test_stream_retries_before_the_body():
+    handler, calls = replies(429, 200)
+    http = client(handler)
+
+    async def main():
+        async with http.stream("api", json={}) as res:
+            body = await res.aread()
+        await http.aclose()
+        return res.status_code, body
+
+    assert asyncio.run(main()) == (200, b"200")
+    assert len(calls) == 2
+
+def test_one_pooled_client_and_bounded_concurrency():
+    in_flight, peak = 0, 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(200)
+
+    http = client(handler, max_concurrency=2)
+
+    async def main():
+        first = http.client
+        await asyncio.gather(*(http.post("api", json={}) for _ in range(8)))
+        assert http.client is first
+        await http.aclose()
+        assert http.client is not first  # recreated after close
+        await http.aclose()
+
+    asyncio.run(main())
+    assert peak == 2
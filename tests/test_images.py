@@ -0,0 +1,138 @@
+import asyncio
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from backend.images import MANIFEST_NAME, ImageCrawler
+
+JPEG = b"\xff\xd8\xff\xe0" + b"0" * 2048
+
+
+class Site:
+    """Local stand-in for the recipe site: path -> (status, headers, body)."""
+
+    def __init__(self):
+        self.routes = {}
+        self.hits = []
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                site.hits.append(self.path)
+                status, headers, body = site.routes.get(self.path, (404, {}, b""))
+                if callable(status):
+                    status, headers, body = status()
+                self.send_response(status)
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def page(self, path: str, image: str):
+        html = f'<html><head><meta property="og:image" content="{image}"></head></html>'
+        self.routes[path] = (200, {"Content-Type": "text/html"}, html.encode())
+
+    def image(self, path: str, body: bytes = JPEG):
+        self.routes[path] = (200, {"Content-Type": "image/jpeg", "ETag": '"v1"'}, body)
+
+
+@pytest.fixture
+def site():
+    s = Site()
+    yield s
+    s.server.shutdown()
+    s.server.server_close()
+
+
+def crawl(out_dir, recipes, **kwargs):
+    crawler = ImageCrawler(str(out_dir), concurrency=4, delay=0, backoff=0, **kwargs)
+    return asyncio.run(crawler.run(recipes))
+
+def manifest(out_dir):
+    with open(os.path.join(out_dir, MANIFEST_NAME), encoding="utf-8") as f:
+        return {e["url"]: e for e in map(json.loads, f)}
+
+
+def test_downloads_and_resumes(site, tmp_path):
+    site.page("/a", "/img/a.jpg")
+    site.image("/img/a.jpg")
+    site.page("/b", "//127.0.0.1:%d/img/b.jpg" % site.server.server_port)
+    site.image("/img/b.jpg")
+    recipes = [{"URL": site.url + "/a", "TranslatedRecipeName": "Aloo Gobi"},
+               {"URL": site.url + "/b", "TranslatedRecipeName": "Bhindi Masala"}]
+
+    counts = crawl(tmp_path, recipes)
+    assert counts["downloaded"] == 2
+    assert (tmp_path / "Aloo_Gobi.jpg").read_bytes() == JPEG
+    assert (tmp_path / "Bhindi_Masala.jpg").exists()
+    assert {e["status"] for e in manifest(tmp_path).values()} == {"ok"}
+
+    # A second run finds everything in the manifest and makes no requests
+    hits = len(site.hits)
+    counts = crawl(tmp_path, recipes)
+    assert counts["skipped"] == 2 and counts["downloaded"] == 0
+    assert len(site.hits) == hits
+
+def test_refresh_revalidates(site, tmp_path):
+    site.page("/a", "/img/a.jpg")
+    calls = []
+
+    def image():
+        calls.append(1)
+        if len(calls) > 1:
+            return 304, {}, b""
+        return 200, {"Content-Type": "image/jpeg", "ETag": '"v1"'}, JPEG
+
+    site.routes["/img/a.jpg"] = (image, None, None)
+    recipes = [{"URL": site.url + "/a", "TranslatedRecipeName": "a"}]
+    assert crawl(tmp_path, recipes)["downloaded"] == 1
+    assert crawl(tmp_path, recipes, refresh=True)["not_modified"] == 1
+    assert (tmp_path / "a.jpg").read_bytes() == JPEG
+
+def test_retries_server_errors(site, tmp_path):
+    site.page("/a", "/img/a.jpg")
+    answers = [(503, {"Retry-After": "0"}, b""), (200, {"Content-Type": "image/jpeg"}, JPEG)]
+    site.routes["/img/a.jpg"] = (lambda: answers.pop(0), None, None)
+    counts = crawl(tmp_path, [{"URL": site.url + "/a", "TranslatedRecipeName": "a"}])
+    assert counts["downloaded"] == 1 and not answers
+
+def test_malformed_image_url_is_recorded(site, tmp_path):
+    site.page("/bad", "http://[bad")
+    site.page("/good", "/img/good.jpg")
+    site.image("/img/good.jpg")
+    recipes = [{"URL": site.url + "/bad", "TranslatedRecipeName": "bad"},
+               {"URL": site.url + "/good", "TranslatedRecipeName": "good"}]
+
+    counts = crawl(tmp_path, recipes)
+    assert counts["error"] == 1 and counts["downloaded"] == 1
+    entry = manifest(tmp_path)[site.url + "/bad"]
+    assert entry["status"] == "error" and "url" in entry["error"]
+
+    # Failed recipes are retried on resume, and fail the same way without crashing
+    counts = crawl(tmp_path, recipes)
+    assert counts["error"] == 1 and counts["skipped"] == 1
+
+def test_write_error_is_recorded(site, tmp_path):
+    site.page("/a", "/img/a.jpg")
+    site.image("/img/a.jpg")
+    (tmp_path / "a.jpg").mkdir()  # the final rename fails with an OSError
+    counts = crawl(tmp_path, [{"URL": site.url + "/a", "TranslatedRecipeName": "a"}])
+    assert counts["error"] == 1
+    assert manifest(tmp_path)[site.url + "/a"]["status"] == "error"
+    assert not any(p.name.endswith(".part") for p in tmp_path.iterdir())
+
+def test_missing_page_is_gone(site, tmp_path):
+    counts = crawl(tmp_path, [{"URL": site.url + "/missing", "TranslatedRecipeName": "m"}])
+    assert counts["gone"] == 1
+    assert crawl(tmp_path, [{"URL": site.url + "/missing", "TranslatedRecipeName": "m"}])["skipped"] == 1
@@ -0,0 +1,66 @@
+import csv
+
+import mongomock
+import pytest
+
+from backend import ingest
+
+FIELDS = ["Srno", "TranslatedRecipeName", "TranslatedIngredients", "TranslatedInstructions"]
+
+
+def write_csv(path, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    return str(path)
+
+def rows(n, loose=2):
+    out = [{"Srno": str(i), "TranslatedRecipeName": f" Dish {i} ",
+            "TranslatedIngredients": "2 1 / 2 cups Rice - soaked, Salt to taste",
+            "TranslatedInstructions": "Wash rice. Cook it."} for i in range(1, n + 1)]
+    # Rows without a Srno
+    out += [{"Srno": "", "TranslatedRecipeName": f"Loose {i}", "TranslatedIngredients": "1 cup Dal",
+             "TranslatedInstructions": ""} for i in range(loose)]
+    return out
+
+
+@pytest.fixture
+def collection():
+    return mongomock.MongoClient().db.recipes
+
+
+@pytest.mark.parametrize("processes", [0, 2])
+def test_reload_is_idempotent(tmp_path, collection, processes):
+    path = write_csv(tmp_path / "recipes.csv", rows(30))
+    first = ingest.run(path, collection, "recipes", chunk_size=7, processes=processes)
+    assert first["rows"] == 32 and first["upserted"] == 32 and first["row_keyed"] == 2
+
+    again = ingest.run(path, collection, "recipes", chunk_size=7, processes=processes)
+    assert again["upserted"] == 0
+    assert collection.count_documents({}) == 32
+    doc = collection.find_one({"Srno": "3"})
+    assert doc["TranslatedRecipeName"] == "dish 3"
+    assert doc["TranslatedInstructions"] == ["Wash rice", "Cook it"]
+
+def test_rows_without_srno_are_keyed_on_content(tmp_path, collection):
+    path = write_csv(tmp_path / "recipes.csv", rows(0, loose=3))
+    ingest.run(path, collection, "recipes", processes=0)
+    ingest.run(path, collection, "recipes", processes=0)
+    keys = {d[ingest.ROW_KEY] for d in collection.find()}
+    assert len(keys) == collection.count_documents({}) == 3
+
+def test_prune_removes_rows_gone_from_the_file(tmp_path, collection):
+    ingest.run(write_csv(tmp_path / "a.csv", rows(10)), collection, "recipes", processes=0)
+    totals = ingest.run(write_csv(tmp_path / "b.csv", rows(6, loose=1)), collection, "recipes",
+                        processes=0, prune=True)
+    assert totals["deleted"] == 5
+    assert collection.count_documents({}) == 7
+
+def test_parsed_transform(tmp_path, collection):
+    path = write_csv(tmp_path / "recipes.csv", rows(3, loose=0))
+    ingest.run(path, collection, "parsed", processes=0)
+    assert collection.find_one({"Srno": "1"})["TranslatedIngredients"] == [
+        {"item": "Rice", "quantity": "2-1/2 cups", "note": "soaked"},
+        {"quantity": "to taste", "item": "Salt"},
+    ]
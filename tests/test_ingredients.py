@@ -0,0 +1,45 @@
+import json
+import os
+import random
+
+import pytest
+
+from backend.ingredients import parse_ingredients, parse_ingredients_batch
+from tests.legacy_ingredients import legacy_parse_ingredients
+
+GOLDEN_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "ingredients_golden.json")
+
+
+def load_golden():
+    with open(GOLDEN_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+GOLDEN = load_golden()
+
+
+@pytest.mark.parametrize("case", GOLDEN, ids=lambda c: repr(c["input"])[:40])
+def test_golden_case(case):
+    assert parse_ingredients(case["input"]) == case["expected"]
+    assert legacy_parse_ingredients(case["input"]) == case["expected"]
+
+def test_batch_matches_golden():
+    assert parse_ingredients_batch([c["input"] for c in GOLDEN]) == [c["expected"] for c in GOLDEN]
+
+def test_batch_rows_do_not_share_dicts():
+    first, second = parse_ingredients_batch(["Salt to taste", "Salt to taste"])
+    first[0]["item"] = "changed"
+    assert second[0]["item"] == "Salt"
+
+def test_nan_is_empty():
+    assert parse_ingredients(float("nan")) == [] == parse_ingredients_batch([float("nan")])[0]
+
+def test_random_input_matches_legacy_parser():
+    # Key order included: the documents are stored as they come out
+    rng = random.Random(0)
+    alphabet = list("0123456789 /-.,aAsStToOqQ\tr") + ["to taste", "as required", "as per taste",
+                                                       "cup", "Tbsp.", "½", "१", " - "]
+    values = ["".join(rng.choices(alphabet, k=rng.randint(0, 25))) for _ in range(20000)]
+    for value, batched in zip(values, parse_ingredients_batch(values)):
+        expected = json.dumps(legacy_parse_ingredients(value))
+        assert json.dumps(parse_ingredients(value)) == expected, value
+        assert json.dumps(batched) == expected, value
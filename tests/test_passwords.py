@@ -0,0 +1,119 @@
+import asyncio
+import threading
+
+import pytest
+
+from backend.passwords import PasswordHasher, PasswordQueueFull, make_context
+
+
+def run(hasher, coro_fn):
+    async def main():
+        try:
+            return await coro_fn()
+        finally:
+            hasher.shutdown()
+    return asyncio.run(main())
+
+
+def test_hash_and_verify_round_trip():
+    hasher = PasswordHasher(make_context(4), max_workers=2)
+
+    async def scenario():
+        hashed = await hasher.hash("s3cret")
+        assert hashed.startswith("$2b$04$")
+        assert await hasher.verify_and_update("s3cret", hashed) == (True, None)
+        assert await hasher.verify_and_update("wrong", hashed) == (False, None)
+
+    run(hasher, scenario)
+    assert hasher.stats()["completed"] == 3
+    assert hasher.rehashed == 0
+
+def test_other_cost_is_rehashed_on_login():
+    old = make_context(4).hash("s3cret")
+    hasher = PasswordHasher(make_context(5))
+
+    valid, new_hash = run(hasher, lambda: hasher.verify_and_update("s3cret", old))
+    assert valid and new_hash.startswith("$2b$05$")
+    assert make_context(5).verify("s3cret", new_hash)
+    assert hasher.rehashed == 1
+
+    # A wrong password never triggers a re-hash
+    hasher = PasswordHasher(make_context(5))
+    assert run(hasher, lambda: hasher.verify_and_update("wrong", old)) == (False, None)
+    assert hasher.rehashed == 0
+
+@pytest.mark.parametrize("stored", ["", "plain-text", "$2b$04$short", "$1$md5$notbcrypt"])
+def test_invalid_hashes_raise_and_free_the_slot(stored):
+    hasher = PasswordHasher(make_context(4), max_workers=1)
+
+    async def scenario():
+        with pytest.raises(ValueError):
+            await hasher.verify_and_update("s3cret", stored)
+        # The only worker slot was released
+        return await hasher.hash("next")
+
+    assert run(hasher, scenario).startswith("$2b$")
+    stats = hasher.stats()
+    assert (stats["running"], stats["waiting"], stats["completed"]) == (0, 0, 2)
+
+
+class GatedContext:
+    """Stands in for CryptContext; hash() blocks until the gate opens."""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.started = threading.Semaphore(0)
+
+    def hash(self, password):
+        self.started.release()
+        self.gate.wait(5)
+        return "hashed:" + password
+
+async def wait_for(predicate):
+    for _ in range(500):
+        if predicate():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+def test_queue_metrics_and_rejection():
+    context = GatedContext()
+    hasher = PasswordHasher(context, max_workers=1, max_queue=2)
+
+    async def scenario():
+        tasks = [asyncio.create_task(hasher.hash(f"p{i}")) for i in range(3)]
+        await wait_for(lambda: hasher.running == 1 and hasher.waiting == 2)
+        assert hasher.stats()["peak_waiting"] == 2
+
+        with pytest.raises(PasswordQueueFull):
+            await hasher.hash("one too many")
+        assert hasher.rejected == 1
+
+        context.gate.set()
+        return await asyncio.gather(*tasks)
+
+    assert run(hasher, scenario) == ["hashed:p0", "hashed:p1", "hashed:p2"]
+    assert hasher.stats() == {
+        "workers": 1,
+        "max_queue": 2,
+        "running": 0,
+        "waiting": 0,
+        "peak_waiting": 2,
+        "completed": 3,
+        "rejected": 1,
+        "rehashed": 0,
+    }
+
+def test_unbounded_queue_never_rejects():
+    context = GatedContext()
+    hasher = PasswordHasher(context, max_workers=1)
+
+    async def scenario():
+        tasks = [asyncio.create_task(hasher.hash(str(i))) for i in range(20)]
+        await wait_for(lambda: hasher.waiting == 19)
+        context.gate.set()
+        return await asyncio.gather(*tasks)
+
+    assert len(run(hasher, scenario)) == 20
+    assert hasher.rejected == 0
+    assert hasher.peak_waiting == 19
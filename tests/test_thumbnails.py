@@ -0,0 +1,82 @@
+import hashlib
+import os
+import shutil
+
+import pytest
+from PIL import Image
+
+from backend import assets
+from backend.thumbnails import MANIFEST_NAME, build, read_manifest
+
+
+@pytest.fixture
+def originals(tmp_path):
+    src = tmp_path / "recipes_images"
+    src.mkdir()
+    Image.new("RGB", (1000, 500), (200, 120, 40)).save(src / "dal.jpg", quality=90)
+    shutil.copy(src / "dal.jpg", src / "dal_copy.jpg")
+    Image.new("RGBA", (200, 100), (0, 128, 0, 128)).save(src / "leaf.png")
+    (src / "broken.jpg").write_bytes(b"not an image")
+    (src / "notes.txt").write_text("ignored")
+    return src
+
+def sha256(path):
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+def sizes(variants):
+    return [(v["width"], v["height"]) for v in variants]
+
+
+def test_build_writes_hashed_variants_at_each_width(originals, tmp_path):
+    out = tmp_path / "recipe_thumbs"
+    manifest, rendered, failures = build(str(originals), str(out), processes=1)
+
+    assert set(manifest["images"]) == {"dal.jpg", "dal_copy.jpg", "leaf.png", "broken.jpg"}
+    assert rendered == 3 and set(failures) == {"broken.jpg"}
+    assert manifest["images"]["broken.jpg"]["variants"] == []
+
+    dal = manifest["images"]["dal.jpg"]
+    assert dal["sha256"] == sha256(originals / "dal.jpg")
+    assert sizes(dal["variants"]) == [(160, 80), (320, 160), (640, 320)]
+    # Never upscaled: 320 and 640 collapse into one full-width variant
+    assert sizes(manifest["images"]["leaf.png"]["variants"]) == [(160, 80), (200, 100)]
+    # Identical bytes share their files
+    assert manifest["images"]["dal_copy.jpg"]["variants"] == dal["variants"]
+
+    for image in manifest["images"].values():
+        for v in image["variants"]:
+            for fmt, pil_format in (("jpeg", "JPEG"), ("webp", "WEBP")):
+                name = v[fmt]
+                assert name == f"{image['sha256'][:16]}-{v['width']}.{'jpg' if fmt == 'jpeg' else 'webp'}"
+                assert assets.HASHED_NAME.search(name)
+                assert assets.cache_control(name) == assets.IMMUTABLE
+                with Image.open(out / name) as img:
+                    assert img.format == pil_format
+                    assert img.size == (v["width"], v["height"])
+                    assert img.mode == "RGB"
+    assert assets.cache_control(MANIFEST_NAME) == assets.REVALIDATE
+    assert read_manifest(str(out)) == manifest
+
+def test_rebuild_skips_unchanged_and_drops_orphans(originals, tmp_path):
+    out = tmp_path / "recipe_thumbs"
+    first, _, _ = build(str(originals), str(out), processes=1)
+
+    manifest, rendered, failures = build(str(originals), str(out), processes=1)
+    assert (rendered, failures) == (0, {})  # the broken file is not retried either
+    assert manifest == first
+
+    leaf = {v[fmt] for v in first["images"]["leaf.png"]["variants"] for fmt in ("jpeg", "webp")}
+    os.remove(originals / "leaf.png")
+    Image.new("RGB", (400, 300), (10, 20, 30)).save(originals / "dal.jpg")
+    manifest, rendered, _ = build(str(originals), str(out), processes=1)
+    assert rendered == 1
+    assert "leaf.png" not in manifest["images"]
+    assert sizes(manifest["images"]["dal.jpg"]["variants"]) == [(160, 120), (320, 240), (400, 300)]
+
+    on_disk = set(os.listdir(out)) - {MANIFEST_NAME}
+    referenced = {v[fmt] for image in manifest["images"].values() for v in image["variants"]
+                  for fmt in ("jpeg", "webp")}
+    assert on_disk == referenced
+    assert not leaf & on_disk
+    # The copy still holds the old dal.jpg variants
+    assert manifest["images"]["dal_copy.jpg"]["variants"] == first["images"]["dal.jpg"]["variants"]
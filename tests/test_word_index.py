@@ -0,0 +1,83 @@
+import random
+
+import numpy as np
+import pytest
+from rapidfuzz import fuzz, process
+
+from backend.word_index import WordIndex, extract_all_words, normalize_word, top_ids
+
+RECIPES = [
+    {"main_ingredients": ["Tomatoes", "Onion", "Green Chillies"]},
+    {"main_ingredients": ["Paneer (Cottage Cheese)", "Butter"]},
+    {"main_ingredients": ["Potatoes", "Onions", "Tomato"]},
+    {"main_ingredients": []},
+    {"main_ingredients": ["Curd (Dahi)", "Cucumber", "Onion"]},
+    {"main_ingredients": ["Basmati Rice", "Ghee"]},
+    {},
+    {"main_ingredients": ["Cottage cheese", "Tomatoes"]},
+]
+TERMS = [[], ["tomato"], ["onion", "tomato"], ["panner"], ["cottage cheese"], ["dahi", "rice"],
+         ["chilli"], ["xyz"], ["potato", "onion", "tomato", "ghee"]]
+
+
+def reference_counts(recipes, user_terms, threshold=80):
+    """The per-recipe loop the vectorised path replaced."""
+    counts = []
+    for recipe in recipes:
+        words = set()
+        for ing in recipe.get("main_ingredients", []):
+            words.update(extract_all_words(ing))
+        matched = set()
+        for term in user_terms:
+            match = process.extractOne(term, words, scorer=fuzz.ratio)
+            if match and match[1] >= threshold:
+                matched.add(term)
+        counts.append(len(matched))
+    return counts
+
+def reference_top(scores, top_n):
+    """Sort everything positive, best first; the stable sort keeps ties in catalog order."""
+    ranked = sorted((rid for rid in range(len(scores)) if scores[rid] > 0), key=lambda rid: -scores[rid])
+    return ranked[:max(top_n, 0)]
+
+
+def test_normalized_words_include_bracket_parts():
+    assert normalize_word(" Tomatoes ") == "tomato"
+    assert normalize_word("Onions") == "onion"
+    assert extract_all_words("Paneer (Cottage Cheese)") == {"paneer (cottage cheese)", "paneer", "cottage cheese"}
+
+@pytest.mark.parametrize("terms", TERMS)
+@pytest.mark.parametrize("threshold", [60, 80, 95])
+def test_match_counts_equal_the_per_recipe_loop(terms, threshold):
+    index = WordIndex.from_recipes(RECIPES)
+    terms = [normalize_word(t) for t in terms]
+    assert index.match_counts(terms, threshold).tolist() == reference_counts(RECIPES, terms, threshold)
+
+def test_random_catalog_equals_the_per_recipe_loop():
+    rng = random.Random(0)
+    words = ["tomato", "tomatoes", "onion", "garlic", "ginger", "gram", "green peas", "peas (matar)",
+             "jeera", "jira", "rice", "rise", "dal", "dahi", "ghee"]
+    recipes = [{"main_ingredients": rng.sample(words, rng.randrange(4))} for _ in range(60)]
+    index = WordIndex.from_recipes(recipes)
+    for _ in range(30):
+        terms = list({normalize_word(w) for w in rng.sample(words + ["xyz", "tomatoe"], 3)})
+        assert index.match_counts(terms).tolist() == reference_counts(recipes, terms)
+
+def test_empty_catalog_and_terms():
+    assert WordIndex.from_recipes([]).match_counts(["tomato"]).tolist() == []
+    assert WordIndex.from_recipes([{}]).match_counts(["tomato"]).tolist() == [0]
+    assert WordIndex.from_recipes(RECIPES).match_counts([]).tolist() == [0] * len(RECIPES)
+
+
+@pytest.mark.parametrize("top_n", [0, 1, 2, 3, 5, 8, 20])
+def test_top_ids_keep_ties_in_catalog_order(top_n):
+    scores = np.array([0.5, 0.9, 0.5, 0, 0.9, 0.5, -0.2, 0.5, 0.1, 0.9], dtype=np.float32)
+    assert top_ids(scores, top_n).tolist() == reference_top(scores, top_n)
+
+def test_top_ids_equal_a_full_sort():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        # Few distinct values, so the cut nearly always falls inside a tie
+        scores = rng.integers(-2, 4, size=rng.integers(1, 40)).astype(np.float32) / 4
+        top_n = int(rng.integers(-1, 12))
+        assert top_ids(scores, top_n).tolist() == reference_top(scores, top_n)